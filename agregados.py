@@ -0,0 +1,147 @@
+# agregados.py
+"""
+Estatísticas de notas mantidas de forma incremental, por turma e no geral:
+quantidade, soma, soma dos quadrados (média e desvio padrão), mínimo, máximo
+e histograma por faixa de nota (0-1, 1-2, ..., 9-10).
+
+Alunos só são acrescentados (não há edição nem exclusão de alunos), então cada
+inserção custa O(1): soma, soma dos quadrados e histograma são incrementados,
+e mínimo e máximo são comparados com a nota nova.
+
+Persistência: salvar()/carregar() gravam data/agregados.json junto com a
+"versão" dos dados a que se referem (assinatura do alunos.json ou versão da
+tabela no SQLite). Quem lê compara a versão; se bater, usa as estatísticas sem
+ler nenhum aluno. Gravado pela interface (repositorio.py) e pelo servidor (central.py).
+"""
+
+import math
+import os
+
+import arquivos
+
+FAIXAS_HISTOGRAMA = 10
+ARQUIVO = os.path.join("data", "agregados.json")
+
+
+def _faixa(nota: float) -> int:
+    if not nota >= 0:  # negativa ou nan
+        return 0
+    if nota >= FAIXAS_HISTOGRAMA:  # inclusive inf
+        return FAIXAS_HISTOGRAMA - 1
+    return int(nota)
+
+
+class Agregado:
+    __slots__ = ("quantidade", "soma", "soma_quadrados", "histograma", "minimo", "maximo")
+
+    def __init__(self):
+        self.quantidade = 0
+        self.soma = 0.0
+        self.soma_quadrados = 0.0
+        self.histograma = [0] * FAIXAS_HISTOGRAMA
+        self.minimo = None
+        self.maximo = None
+
+    def adicionar(self, nota: float) -> None:
+        self.quantidade += 1
+        self.soma += nota
+        self.soma_quadrados += nota * nota
+        self.histograma[_faixa(nota)] += 1
+        if self.minimo is None or nota < self.minimo:
+            self.minimo = nota
+        if self.maximo is None or nota > self.maximo:
+            self.maximo = nota
+
+    @property
+    def media(self) -> float:
+        return self.soma / self.quantidade if self.quantidade else 0.0
+
+    @property
+    def desvio_padrao(self) -> float:
+        """Desvio padrão populacional."""
+        if not self.quantidade:
+            return 0.0
+        variancia = self.soma_quadrados / self.quantidade - self.media ** 2
+        return math.sqrt(max(variancia, 0.0))
+
+    def resumo(self) -> dict:
+        return {"quantidade": self.quantidade, "media": round(self.media, 2),
+                "desvio_padrao": round(self.desvio_padrao, 2),
+                "minimo": self.minimo, "maximo": self.maximo,
+                "histograma": list(self.histograma)}
+
+    def como_dict(self) -> dict:
+        return {"quantidade": self.quantidade, "soma": self.soma,
+                "soma_quadrados": self.soma_quadrados, "histograma": self.histograma,
+                "minimo": self.minimo, "maximo": self.maximo}
+
+    @classmethod
+    def de_dict(cls, dados: dict) -> "Agregado":
+        agregado = cls()
+        agregado.quantidade = int(dados["quantidade"])
+        agregado.soma = float(dados["soma"])
+        agregado.soma_quadrados = float(dados["soma_quadrados"])
+        agregado.histograma = [int(n) for n in dados["histograma"]]
+        agregado.minimo = dados["minimo"]  # arquivo de versão anterior (sem a chave): remontado
+        agregado.maximo = dados["maximo"]
+        return agregado
+
+
+class AgregadosTurmas:
+    """Um Agregado por turma e um geral, atualizados juntos."""
+    __slots__ = ("geral", "turmas")
+
+    def __init__(self):
+        self.geral = Agregado()
+        self.turmas = {}
+
+    @classmethod
+    def de_alunos(cls, pares) -> "AgregadosTurmas":
+        """Monta a partir de pares (turma, nota) — ex.: zip das colunas de TabelaAlunos."""
+        agregados = cls()
+        for turma, nota in pares:
+            agregados.adicionar(turma, nota)
+        return agregados
+
+    def adicionar(self, turma: str, nota: float) -> None:
+        self.geral.adicionar(nota)
+        agregado = self.turmas.get(turma)
+        if agregado is None:
+            agregado = self.turmas[turma] = Agregado()
+        agregado.adicionar(nota)
+
+    def resumo(self, turma: str = None) -> dict:
+        """Estatísticas de uma turma, ou {"geral": ..., "turmas": {...}} sem turma."""
+        if turma is not None:
+            agregado = self.turmas.get(turma)
+            return agregado.resumo() if agregado is not None else None
+        return {"geral": self.geral.resumo(),
+                "turmas": {t: a.resumo() for t, a in sorted(self.turmas.items())}}
+
+
+# ---------------------------------------------------------
+# Persistência (data/agregados.json)
+# ---------------------------------------------------------
+def _versao_json(versao):
+    return list(versao) if isinstance(versao, tuple) else versao
+
+
+def salvar(agregados: AgregadosTurmas, versao, caminho: str = ARQUIVO) -> None:
+    """Grava os agregados com a versão dos dados que eles descrevem (escrita atômica)."""
+    dados = {"versao": _versao_json(versao), "geral": agregados.geral.como_dict(),
+             "turmas": {t: a.como_dict() for t, a in agregados.turmas.items()}}
+    arquivos.gravar_json(caminho, dados, duravel=False)  # é um cache: sem fsync
+
+
+def carregar(versao, caminho: str = ARQUIVO):
+    """Agregados persistidos para exatamente esta versão dos dados, ou None."""
+    try:
+        dados = arquivos.ler_json(caminho, {})
+        if dados.get("versao") != _versao_json(versao):
+            return None
+        agregados = AgregadosTurmas()
+        agregados.geral = Agregado.de_dict(dados["geral"])
+        agregados.turmas = {t: Agregado.de_dict(a) for t, a in dados["turmas"].items()}
+        return agregados
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
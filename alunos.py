@@ -1,71 +1,95 @@
 # alunos.py
 """
 Módulo de gestão de alunos:
-- carregar / salvar alunos (data/alunos.json)
-- adicionar aluno (modal com Nome, Turma e Nota) -> integra com cliente C
-- buscar aluno (lista atualizável em tempo real)
-- ordenar por nota (maior -> menor)
-- gerar_relatorio() em PDF (tabela formatada, cores e opção de abrir)
+- carregar / salvar alunos (data/alunos.json ou SQLite, com cache em repositorio.py)
+- adicionar aluno (modal com Nome, Turma e Nota) -> envia ao servidor em background
+  (conexao_servidor.enviar_duravel: caixa de saída persistente, reenviada
+  automaticamente quando o servidor estiver fora do ar)
+- buscar aluno (lista atualizável em tempo real; alunos gravados no servidor
+  chegam pelo feed SUBSCRIBE enquanto a janela está aberta)
+- ordenar por nota (maior -> menor): ranking paginado sobre o índice por nota,
+  com filtro por turma e por faixa de notas
+- gerar_relatorio() em PDF (tabela formatada, cores e opção de abrir), com
+  estatísticas gerais e por turma lidas dos agregados (repositorio.agregados_alunos)
 """
 
-import json
 import os
-import socket
-import subprocess
 import customtkinter as ctk
 from tkinter import messagebox
 from interface import configurar_janela, garantir_pasta_data
+from turmas import carregar_turmas
+import conexao_servidor
+import repositorio
+from tabela_alunos import TabelaAlunos
+from indice_nomes import BuscaIncremental
+from agregados import AgregadosTurmas
 
 # ---------------------------------------------------------
 # Caminhos e constantes
 # ---------------------------------------------------------
 PASTA = garantir_pasta_data()
-CAMINHO_ALUNOS = os.path.join(PASTA, "alunos.json")
-CAMINHO_TURMAS = os.path.join(PASTA, "turmas.json")
+CAMINHO_ALUNOS = repositorio.caminho("alunos")
 CAMINHO_RELATORIO = os.path.join(PASTA, "relatorio_alunos.json")
 PDF_RELATORIO = os.path.join(PASTA, "relatorio_alunos.pdf")
+# Ranking por nota: linhas por página; opção "todas" dos filtros de turma
+ALUNOS_POR_PAGINA = 50
+TODAS_AS_TURMAS = "Todas as turmas"
+# Busca ao vivo: máximo de alunos desenhados por tecla
+LIMITE_BUSCA = 200
 
 
 # ---------------------------------------------------------
 # Utilidades de persistência
 # ---------------------------------------------------------
 def carregar_alunos():
-    """Lê alunos do JSON; retorna lista vazia se não existir ou inválido."""
-    if not os.path.exists(CAMINHO_ALUNOS):
-        return []
-    try:
-        with open(CAMINHO_ALUNOS, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (json.JSONDecodeError, IOError):
-        return []
+    """Alunos do JSON (lista compartilhada em cache; copie antes de alterar)."""
+    return repositorio.carregar("alunos")
 
 
 def salvar_alunos(lista):
     """Salva lista de alunos no arquivo JSON (cria pasta se necessário)."""
-    if not os.path.exists(PASTA):
-        os.makedirs(PASTA)
-    with open(CAMINHO_ALUNOS, "w", encoding="utf-8") as f:
-        json.dump(lista, f, indent=4, ensure_ascii=False)
+    repositorio.salvar("alunos", lista)
 
 
-def carregar_turmas():
-    """Lê turmas do JSON; retorna lista vazia se não existir."""
-    if not os.path.exists(CAMINHO_TURMAS):
-        return []
-    try:
-        with open(CAMINHO_TURMAS, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (json.JSONDecodeError, IOError):
-        return []
+def servidor_ativo():
+    """Último estado conhecido do servidor (PING em cache); não bloqueia a interface."""
+    return conexao_servidor.servidor_ativo()
 
 
-def servidor_ativo(host="127.0.0.1", port=5050, timeout=0.8):
-    """Tenta abrir conexão curta com servidor; True se houver servidor."""
-    try:
-        with socket.create_connection((host, port), timeout=timeout):
-            return True
-    except:
-        return False
+def _acompanhar_servidor(janela, alunos: TabelaAlunos, redesenhar):
+    """
+    Mantém a tabela 'alunos' de uma janela aberta em dia com o feed do servidor
+    (SUBSCRIBE): cada aluno gravado entra na tabela sem reler o arquivo; vários
+    eventos seguidos geram um único redesenho. O feed é cancelado ao fechar a janela.
+    """
+    recebidos = []
+
+    def aplicar():
+        if not janela.winfo_exists():
+            return
+        while recebidos:
+            evento = recebidos.pop(0)  # pop é atômico: a thread do feed pode acrescentar ao mesmo tempo
+            if evento["tipo"] == "inserido":
+                alunos.acrescentar(evento["aluno"])
+            else:
+                alunos.copiar_de(repositorio.tabela_alunos())
+        redesenhar()
+
+    def ao_evento(evento):
+        recebidos.append(evento)
+        if len(recebidos) == 1:
+            janela.after(50, aplicar)
+
+    assinatura = conexao_servidor.assinar(ao_evento)
+    janela.bind("<Destroy>", lambda e: assinatura.cancelar() if e.widget is janela else None, add="+")
+
+
+def _aviso_envio(app, nome, ok, resposta):
+    """Chamado pela thread de envio; só incomoda o usuário se o servidor não confirmou."""
+    if ok:
+        return
+    app.after(0, lambda: messagebox.showwarning(
+        "Aviso", f"Servidor recusou o aluno {nome} ({resposta}) — salvo apenas localmente."))
 
 
 # ---------------------------------------------------------
@@ -77,9 +101,9 @@ def adicionar_aluno(app):
     Campos: Nome (Entry), Turma (OptionMenu), Nota (Entry).
     - Valida campos
     - Salva localmente em JSON
-    - Se servidor ativo e cliente.exe existir, chama cliente.exe para enviar dados ao servidor
+    - Grava na caixa de saída para envio em background (a janela fecha sem esperar a
+      resposta; com o servidor desligado ele aparece como pendente no rodapé do painel)
     """
-    alunos = carregar_alunos()
     turmas = carregar_turmas()
 
     janela = ctk.CTkToplevel(app)
@@ -121,39 +145,29 @@ def adicionar_aluno(app):
 
         try:
             nota = float(nota_txt)
-            if nota < 0 or nota > 10:
+            if not 0 <= nota <= 10:  # também recusa nan
                 raise ValueError
         except Exception:
             messagebox.showwarning("Erro", "Digite uma nota válida entre 0 e 10.")
             return
 
-        # Salvar localmente
-        alunos.append({"nome": nome, "turma": turma, "nota": round(nota, 2)})
+        # Salvar localmente (no SQLite é um único INSERT)
         try:
-            salvar_alunos(alunos)
+            repositorio.inserir("alunos", {"nome": nome, "turma": turma, "nota": round(nota, 2)})
         except Exception as e:
             messagebox.showerror("Erro", f"Falha ao salvar localmente: {e}")
             return
 
-        # Tentar executar cliente.exe (módulo em C) para envio ao servidor
-        cliente_exe = os.path.join(os.getcwd(), "cliente.exe")
-        if servidor_ativo() and os.path.exists(cliente_exe):
-            try:
-                # Em Windows, usar CREATE_NO_WINDOW para não mostrar console extra
-                creation_flags = 0
-                if os.name == "nt" and hasattr(subprocess, "CREATE_NO_WINDOW"):
-                    creation_flags = subprocess.CREATE_NO_WINDOW
-                subprocess.Popen([cliente_exe, nome, turma, str(nota)], creationflags=creation_flags)
-            except Exception as e:
-                # Não bloquear a aplicação; apenas avisar
-                messagebox.showwarning("Aviso", f"Falha ao executar cliente.exe: {e}")
-        else:
-            # Se servidor não ativo ou cliente não encontrado, já foi salvo localmente
-            if not servidor_ativo():
-                messagebox.showinfo("Aviso", "Servidor desligado — salvo apenas localmente.")
-            else:
-                messagebox.showinfo("Aviso", "Cliente (cliente.exe) não encontrado — salvo apenas localmente.")
+        # Vai para a caixa de saída (durável) e é enviado em background, agora ou
+        # quando o servidor voltar; a resposta chega em _aviso_envio
+        try:
+            conexao_servidor.enviar_duravel(nome, turma, nota,
+                                            lambda ok, resposta: _aviso_envio(app, nome, ok, resposta))
+        except ValueError as e:
+            messagebox.showwarning("Aviso", f"Não foi possível enviar ao servidor: {e}")
 
+        # com o servidor desligado o registro fica na caixa de saída: o rodapé do
+        # painel mostra os pendentes de envio, sem outra janela
         messagebox.showinfo("Sucesso", f"Aluno {nome} cadastrado com sucesso!")
         janela.destroy()
 
@@ -173,69 +187,155 @@ def adicionar_aluno(app):
 def buscar_aluno(app):
     """
     Abre modal para buscar alunos.
-    Exibe todos inicialmente; filtra em tempo real conforme se digita.
+    Exibe todos inicialmente; filtra em tempo real conforme se digita, pelo
+    índice de nomes (indice_nomes.py: sem acentos/maiúsculas, em qualquer parte
+    do nome). Cada tecla refina o resultado anterior.
+    Filtro opcional por turma.
     """
-    alunos = carregar_alunos()
+    compartilhada = repositorio.tabela_alunos()
+    compartilhada.indice_nomes()  # monta uma vez; fica na tabela em cache para as próximas aberturas
+    alunos = compartilhada.copia()  # cópia (com o índice): o feed do servidor acrescenta nela
+    busca = BuscaIncremental(alunos.indice_nomes())
 
     janela = ctk.CTkToplevel(app)
-    configurar_janela(janela, "Buscar Aluno", "560x520")
+    configurar_janela(janela, "Buscar Aluno", "560x560")
 
     ctk.CTkLabel(janela, text="Buscar Aluno", font=ctk.CTkFont(size=18, weight="bold")).pack(pady=8)
 
     entrada = ctk.CTkEntry(janela, width=460, placeholder_text="Digite o nome ou parte do nome")
     entrada.pack(pady=8)
 
+    turma_menu = ctk.CTkOptionMenu(janela, values=[TODAS_AS_TURMAS] + sorted(alunos.turmas()), width=200,
+                                   command=lambda _: atualizar())
+    turma_menu.set(TODAS_AS_TURMAS)
+    turma_menu.pack(pady=4)
+
     resultado = ctk.CTkTextbox(janela, width=520, height=360)
     resultado.pack(pady=6)
     resultado.configure(state="disabled")
 
     def atualizar(event=None):
-        termo = entrada.get().lower().strip()
+        filtrados = busca.buscar(entrada.get())
+        if filtrados is None:
+            filtrados = range(len(alunos))
+        turma = turma_menu.get()
+        if turma != TODAS_AS_TURMAS:
+            codigo, codigos = alunos.codigo_turma(turma), alunos.codigos
+            filtrados = [i for i in filtrados if codigos[i] == codigo]
+
         resultado.configure(state="normal")
         resultado.delete("1.0", "end")
-
-        if termo == "":
-            filtrados = alunos
-        else:
-            filtrados = [a for a in alunos if termo in a.get("nome", "").lower()]
-
         if not filtrados:
             resultado.insert("end", "Nenhum aluno encontrado.")
         else:
-            for a in filtrados:
-                resultado.insert("end", f"Nome: {a.get('nome','')}\nTurma: {a.get('turma','')}\nNota: {a.get('nota','')}\n\n")
-
+            for i in filtrados[:LIMITE_BUSCA]:
+                resultado.insert("end", f"Nome: {alunos.nomes[i]}\nTurma: {alunos.turma(i)}\nNota: {alunos.notas[i]}\n\n")
+            if len(filtrados) > LIMITE_BUSCA:
+                resultado.insert("end", f"... e mais {len(filtrados) - LIMITE_BUSCA} aluno(s). Refine a busca.")
         resultado.configure(state="disabled")
 
+    def ao_mudar_alunos():
+        # alunos novos (ou recarga) não estão no resultado guardado: a próxima busca recomeça
+        busca.indice = alunos.indice_nomes()
+        busca.reiniciar()
+        turma_menu.configure(values=[TODAS_AS_TURMAS] + sorted(alunos.turmas()))
+        atualizar()
+
     # Mostra todos inicialmente
     atualizar()
     entrada.bind("<KeyRelease>", atualizar)
     entrada.bind("<Return>", atualizar)
+    # Alunos gravados no servidor enquanto a janela está aberta
+    _acompanhar_servidor(janela, alunos, ao_mudar_alunos)
 
 
 # ---------------------------------------------------------
 # ORDENAR POR NOTA
 # ---------------------------------------------------------
 def ordenar_alunos_por_nota(app):
-    alunos = carregar_alunos()
+    """
+    Ranking paginado (maior -> menor) sobre o índice por nota da tabela de alunos
+    (indice_notas.py): cada página é uma fatia do índice, sem ordenar nada ao
+    abrir ou ao trocar de página. Filtros por turma e por faixa de notas.
+    """
+    compartilhada = repositorio.tabela_alunos()
+    compartilhada.indice_notas()  # monta uma vez; fica na tabela em cache para as próximas aberturas
+    alunos = compartilhada.copia()  # cópia (com o índice): o feed do servidor acrescenta nela
+    estado = {"pagina": 0, "faixa": None}
 
     janela = ctk.CTkToplevel(app)
-    configurar_janela(janela, "Alunos por Nota", "520x520")
+    configurar_janela(janela, "Alunos por Nota", "560x580")
 
     ctk.CTkLabel(janela, text="Alunos Ordenados por Nota (maior → menor)", font=ctk.CTkFont(size=16, weight="bold")).pack(pady=10)
-    texto = ctk.CTkTextbox(janela, width=500, height=420)
+
+    filtros = ctk.CTkFrame(janela, fg_color="transparent")
+    filtros.pack(pady=4)
+    turma_menu = ctk.CTkOptionMenu(filtros, values=[TODAS_AS_TURMAS] + sorted(alunos.turmas()), width=170,
+                                   command=lambda _: filtrar())
+    turma_menu.set(TODAS_AS_TURMAS)
+    turma_menu.pack(side="left", padx=4)
+    minimo_entry = ctk.CTkEntry(filtros, width=80, placeholder_text="Nota de")
+    minimo_entry.pack(side="left", padx=4)
+    maximo_entry = ctk.CTkEntry(filtros, width=80, placeholder_text="até")
+    maximo_entry.pack(side="left", padx=4)
+
+    texto = ctk.CTkTextbox(janela, width=520, height=400)
     texto.pack(pady=6)
-    texto.configure(state="normal")
-    texto.delete("1.0", "end")
 
-    ordenados = sorted(alunos, key=lambda a: float(a.get("nota", 0)), reverse=True)
-    if not ordenados:
-        texto.insert("end", "Nenhum aluno cadastrado.")
-    else:
-        for i, a in enumerate(ordenados, start=1):
-            texto.insert("end", f"{i}. {a.get('nome','')} - {a.get('turma','')} - Nota: {a.get('nota','')}\n")
+    navegacao = ctk.CTkFrame(janela, fg_color="transparent")
+    navegacao.pack(pady=4)
+    btn_anterior = ctk.CTkButton(navegacao, text="◀ Anterior", width=110, command=lambda: ir_para(estado["pagina"] - 1))
+    btn_anterior.pack(side="left", padx=6)
+    rotulo_pagina = ctk.CTkLabel(navegacao, text="")
+    rotulo_pagina.pack(side="left", padx=6)
+    btn_proxima = ctk.CTkButton(navegacao, text="Próxima ▶", width=110, command=lambda: ir_para(estado["pagina"] + 1))
+    btn_proxima.pack(side="left", padx=6)
+
+    def desenhar():
+        turma = turma_menu.get()
+        indice = alunos.indice_notas().de(None if turma == TODAS_AS_TURMAS else turma)
+        inicio, fim = indice.limites_faixa(*estado["faixa"]) if estado["faixa"] else (0, len(indice))
+        total = fim - inicio
+        paginas = max(1, -(-total // ALUNOS_POR_PAGINA))
+        estado["pagina"] = min(max(estado["pagina"], 0), paginas - 1)
+        primeiro = inicio + estado["pagina"] * ALUNOS_POR_PAGINA
+
+        texto.configure(state="normal")
+        texto.delete("1.0", "end")
+        if not total:
+            texto.insert("end", "Nenhum aluno encontrado.")
+        else:
+            posicoes = indice.pagina(primeiro, min(ALUNOS_POR_PAGINA, fim - primeiro))
+            for colocacao, i in enumerate(posicoes, start=primeiro + 1):
+                texto.insert("end", f"{colocacao}. {alunos.nomes[i]} - {alunos.turma(i)} - Nota: {alunos.notas[i]}\n")
+        texto.configure(state="disabled")
+
+        rotulo_pagina.configure(text=f"Página {estado['pagina'] + 1} de {paginas} ({total} alunos)")
+        btn_anterior.configure(state="normal" if estado["pagina"] > 0 else "disabled")
+        btn_proxima.configure(state="normal" if estado["pagina"] < paginas - 1 else "disabled")
+        turma_menu.configure(values=[TODAS_AS_TURMAS] + sorted(alunos.turmas()))
+
+    def ir_para(pagina):
+        estado["pagina"] = pagina
+        desenhar()
+
+    def filtrar(event=None):
+        de = minimo_entry.get().strip().replace(",", ".")
+        ate = maximo_entry.get().strip().replace(",", ".")
+        try:
+            estado["faixa"] = (float(de) if de else float("-inf"), float(ate) if ate else float("inf")) \
+                if de or ate else None
+        except ValueError:
+            messagebox.showwarning("Erro", "Digite notas válidas no filtro (ex: 5 e 7.5).")
+            return
+        ir_para(0)
+
+    ctk.CTkButton(filtros, text="Filtrar", width=80, command=filtrar).pack(side="left", padx=4)
+    minimo_entry.bind("<Return>", filtrar)
+    maximo_entry.bind("<Return>", filtrar)
 
-    texto.configure(state="disabled")
+    desenhar()
+    _acompanhar_servidor(janela, alunos, desenhar)
 
 
 # ---------------------------------------------------------
@@ -247,9 +347,9 @@ def gerar_relatorio(app):
     Usa reportlab; se a biblioteca não existir, pede para instalar.
     Ao finalizar, pergunta ao usuário se quer abrir o PDF.
     """
-    alunos = carregar_alunos()
+    alunos = repositorio.tabela_alunos()
 
-    if not alunos:
+    if not len(alunos):
         messagebox.showinfo("Relatório", "Nenhum aluno cadastrado.")
         return
 
@@ -265,10 +365,19 @@ def gerar_relatorio(app):
                              "python -m pip install reportlab")
         return
 
-    total = len(alunos)
-    media = sum(float(a.get("nota", 0)) for a in alunos) / total
-    maior = max(alunos, key=lambda x: float(x.get("nota", 0)))
-    menor = min(alunos, key=lambda x: float(x.get("nota", 0)))
+    # estatísticas mantidas incrementalmente (agregados.py): nada é recalculado aqui
+    estatisticas = repositorio.agregados_alunos()
+    if estatisticas.geral.quantidade != len(alunos):
+        # os alunos mudaram entre as duas leituras: agregados da própria tabela
+        estatisticas = AgregadosTurmas.de_alunos(alunos.turmas_e_notas())
+    geral = estatisticas.geral
+    total = geral.quantidade
+    media = geral.media
+    # maior e menor nota pelo índice ordenado, sem percorrer as notas; nos empates
+    # fica o primeiro cadastrado, como no max()/min() sobre a lista
+    indice = alunos.indice_notas().de(None)
+    maior = alunos.registro(indice.top(1)[0])
+    menor = alunos.registro(indice.pagina(indice.limites_faixa(geral.minimo, geral.minimo)[0], 1)[0])
 
     nome_pdf = PDF_RELATORIO
 
@@ -285,13 +394,31 @@ def gerar_relatorio(app):
     story.append(Paragraph(f"Média Geral das Notas: <b>{media:.2f}</b>", estilo_sub))
     story.append(Paragraph(f"Maior Nota: <b>{maior.get('nome','')}</b> - {maior.get('turma','')} ({maior.get('nota','')})", estilo_sub))
     story.append(Paragraph(f"Menor Nota: <b>{menor.get('nome','')}</b> - {menor.get('turma','')} ({menor.get('nota','')})", estilo_sub))
+    story.append(Paragraph(f"Desvio Padrão: <b>{geral.desvio_padrao:.2f}</b>", estilo_sub))
+    story.append(Spacer(1, 12))
+
+    # Resumo por turma
+    dados_turmas = [["Turma", "Alunos", "Média", "Desvio", "Mínima", "Máxima"]]
+    for turma, ag in sorted(estatisticas.turmas.items()):
+        dados_turmas.append([turma, ag.quantidade, f"{ag.media:.2f}", f"{ag.desvio_padrao:.2f}",
+                             f"{ag.minimo:.1f}", f"{ag.maximo:.1f}"])
+    tabela_turmas = Table(dados_turmas, colWidths=[130, 60, 60, 60, 60, 60])
+    tabela_turmas.setStyle(TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#27AE60")),  # verde cabeçalho
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.gray),
+        ("FONTSIZE", (0, 0), (-1, -1), 10),
+    ]))
+    story.append(tabela_turmas)
     story.append(Spacer(1, 12))
 
     # Tabela: cabeçalho + linhas
     dados_tabela = [["Nome do Aluno", "Turma", "Nota"]]
     # ordenar por nome para apresentar
-    for a in sorted(alunos, key=lambda x: x.get("nome","").lower()):
-        dados_tabela.append([a.get("nome",""), a.get("turma",""), f"{float(a.get('nota',0)):.1f}"])
+    for i in alunos.ordem_por_nome():
+        dados_tabela.append([alunos.nomes[i], alunos.turma(i), f"{alunos.notas[i]:.1f}"])
 
     tabela = Table(dados_tabela, colWidths=[300, 90, 70])
     tabela.setStyle(TableStyle([
@@ -0,0 +1,226 @@
+# arquivos.py
+"""
+Primitiva de armazenamento compartilhada pelos arquivos de data/ (interface,
+servidor e várias instâncias da interface numa mesma pasta).
+
+- Travas de leitura/escrita entre processos (fcntl.flock) num arquivo irmão
+  "<arquivo>.lock": leitura() é compartilhada (leitores não esperam uns pelos
+  outros), escrita() é exclusiva (espera os leitores e escritores atuais).
+  A trava fica num arquivo separado porque a escrita atômica troca o inode do
+  arquivo de dados a cada gravação.
+- Escrita atômica: gravar_json()/gravar_texto() escrevem num temporário da mesma
+  pasta, fazem fsync e o renomeiam por cima (os.replace); quem lê vê o arquivo
+  antigo ou o novo inteiro, nunca um pedaço.
+- Leia-modifica-grave (ex.: acrescentar um registro) deve ficar inteiro dentro
+  de escrita(): assim duas instâncias não perdem o registro uma da outra.
+  Quando montar o conteúdo novo é caro, substituir_se_inalterado() faz a
+  leitura e o temporário fora da trava e só troca o arquivo se ninguém o
+  alterou nesse meio tempo (assinatura()).
+
+As travas são reentrantes na mesma thread: dentro de escrita(), ler_json() e
+gravar_json() do mesmo arquivo não travam de novo. Pedir escrita() dentro de
+leitura() do mesmo arquivo levanta RuntimeError (evita deadlock entre dois
+leitores querendo escrever). Entre threads do mesmo processo as travas também
+valem (cada uma abre o seu descritor).
+
+truncar_linha_incompleta(): reparo da cauda de arquivos JSONL só com acréscimo
+(journal do servidor, caixa de saída), antes de reabri-los para acrescentar.
+
+Sem fcntl (Windows), as travas não fazem nada; a escrita atômica continua valendo.
+"""
+
+import contextlib
+import json
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+_local = threading.local()  # caminho da trava -> [modo, profundidade] desta thread
+
+
+def _caminho_trava(caminho: str) -> str:
+    return os.path.abspath(caminho) + ".lock"
+
+
+def _mantidas() -> dict:
+    mantidas = getattr(_local, "travas", None)
+    if mantidas is None:
+        mantidas = _local.travas = {}
+    return mantidas
+
+
+@contextlib.contextmanager
+def _travar(caminho: str, exclusiva: bool):
+    trava = _caminho_trava(caminho)
+    mantidas = _mantidas()
+    atual = mantidas.get(trava)
+    if atual is not None:
+        if exclusiva and atual[0] != "escrita":
+            raise RuntimeError(f"escrita pedida dentro de leitura de {caminho}")
+        atual[1] += 1
+        try:
+            yield
+        finally:
+            atual[1] -= 1
+        return
+
+    pasta = os.path.dirname(trava)
+    if pasta and not os.path.exists(pasta):
+        os.makedirs(pasta, exist_ok=True)
+    fd = os.open(trava, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusiva else fcntl.LOCK_SH)
+        mantidas[trava] = ["escrita" if exclusiva else "leitura", 1]
+        try:
+            yield
+        finally:
+            del mantidas[trava]
+    finally:
+        os.close(fd)  # fechar o descritor libera o flock
+
+
+def leitura(caminho: str):
+    """Trava compartilhada do arquivo (with arquivos.leitura(caminho): ...)."""
+    return _travar(caminho, exclusiva=False)
+
+
+def escrita(caminho: str):
+    """Trava exclusiva do arquivo (with arquivos.escrita(caminho): ...)."""
+    return _travar(caminho, exclusiva=True)
+
+
+def _fsync_pasta(pasta: str) -> None:
+    """Torna a troca de nome durável (no Windows não é possível abrir a pasta)."""
+    try:
+        fd = os.open(pasta or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _gravar_temporario(caminho: str, texto: str, duravel: bool) -> str:
+    """Escreve o texto num temporário da mesma pasta do arquivo (com fsync se durável)."""
+    pasta = os.path.dirname(caminho)
+    if pasta and not os.path.exists(pasta):
+        os.makedirs(pasta, exist_ok=True)
+    temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temporario, "w", encoding="utf-8") as f:
+            f.write(texto)
+            if duravel:
+                f.flush()
+                os.fsync(f.fileno())
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temporario)
+        raise
+    return temporario
+
+
+def _trocar(temporario: str, caminho: str, duravel: bool) -> None:
+    try:
+        os.replace(temporario, caminho)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temporario)
+        raise
+    if duravel:
+        _fsync_pasta(os.path.dirname(caminho))
+
+
+def gravar_texto(caminho: str, texto: str, duravel: bool = True) -> None:
+    """Substitui o conteúdo do arquivo de forma atômica, com a trava de escrita."""
+    with escrita(caminho):
+        _trocar(_gravar_temporario(caminho, texto, duravel), caminho, duravel)
+
+
+def assinatura(caminho: str):
+    """(inode, tamanho, mtime) do arquivo, ou None se ele não existir: muda a cada acréscimo ou troca."""
+    try:
+        info = os.stat(caminho)
+    except FileNotFoundError:
+        return None
+    return info.st_ino, info.st_size, info.st_mtime_ns
+
+
+def substituir_se_inalterado(caminho: str, texto: str, lido, duravel: bool = True) -> bool:
+    """
+    Como gravar_texto(), para um conteúdo montado a partir de uma leitura feita
+    sem a trava de escrita ('lido' = assinatura() tirada antes dela). O temporário
+    é escrito e sincronizado fora da trava, que só cobre a conferência e a troca
+    de nome. Devolve False, sem trocar nada, se o arquivo mudou nesse meio tempo
+    (o chamador relê e monta de novo).
+    """
+    temporario = _gravar_temporario(caminho, texto, duravel)
+    with escrita(caminho):
+        if assinatura(caminho) == lido:
+            _trocar(temporario, caminho, duravel)
+            return True
+    with contextlib.suppress(OSError):
+        os.remove(temporario)
+    return False
+
+
+def gravar_json(caminho: str, dados, indent: int = None, duravel: bool = True) -> None:
+    gravar_texto(caminho, json.dumps(dados, indent=indent, ensure_ascii=False), duravel)
+
+
+def ler_json(caminho: str, padrao=None):
+    """
+    Conteúdo JSON do arquivo, lido com a trava de leitura. Devolve 'padrao' se
+    o arquivo não existir; JSON inválido levanta ValueError (json.JSONDecodeError).
+    """
+    if not os.path.exists(caminho):
+        return padrao
+    with leitura(caminho):
+        try:
+            with open(caminho, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return padrao
+
+
+def truncar_linha_incompleta(caminho: str, bloco: int = 65536) -> int:
+    """
+    Arquivos JSONL só com acréscimo (journal, caixa de saída): uma queda no meio
+    de um write deixa a última linha sem "\\n". Corta o arquivo logo depois do
+    último "\\n" (com fsync) para que o próximo acréscimo comece numa linha nova
+    em vez de ser colado ao pedaço. Devolve quantos bytes foram descartados.
+    """
+    try:
+        f = open(caminho, "rb+")
+    except FileNotFoundError:
+        return 0
+    with f:
+        tamanho = f.seek(0, os.SEEK_END)
+        if tamanho == 0:
+            return 0
+        f.seek(tamanho - 1)
+        if f.read(1) == b"\n":
+            return 0  # caso comum: só o último byte é lido
+        fim = tamanho
+        while fim > 0:
+            inicio = max(0, fim - bloco)
+            f.seek(inicio)
+            pedaco = f.read(fim - inicio)
+            i = pedaco.rfind(b"\n")
+            if i >= 0:
+                fim = inicio + i + 1
+                break
+            fim = inicio
+        if fim == tamanho:
+            return 0
+        f.truncate(fim)
+        f.flush()
+        os.fsync(f.fileno())
+        return tamanho - fim
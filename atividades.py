@@ -1,30 +1,24 @@
 # atividades.py
-import json, os, shutil
+import os, shutil
 import customtkinter as ctk
 from tkinter import messagebox, filedialog
 from interface import configurar_janela, garantir_pasta_data
 from turmas import carregar_turmas
+import repositorio
 
 
 PASTA = garantir_pasta_data()
-CAMINHO = os.path.join(PASTA, "atividades.json")
+CAMINHO = repositorio.caminho("atividades")
 DESTINO = os.path.join(PASTA, "uploads")
 
 if not os.path.exists(DESTINO):
     os.makedirs(DESTINO)
 
 def carregar_atividades():
-    if not os.path.exists(CAMINHO):
-        return []
-    try:
-        with open(CAMINHO, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (json.JSONDecodeError, IOError):
-        return []
+    return repositorio.carregar("atividades")
 
 def salvar_atividades(lista):
-    with open(CAMINHO, "w", encoding="utf-8") as f:
-        json.dump(lista, f, indent=4, ensure_ascii=False)
+    repositorio.salvar("atividades", lista)
 
 def abrir_atividades(app):
     """Tela de upload e consulta de atividades."""
@@ -71,12 +65,11 @@ def abrir_atividades(app):
         destino_final = os.path.join(DESTINO, nome_arquivo)
         shutil.copy2(origem, destino_final)
 
-        atividades.append({
+        repositorio.inserir("atividades", {
             "turma": turma,
             "descricao": desc,
             "arquivo": nome_arquivo
         })
-        salvar_atividades(atividades)
         messagebox.showinfo("Sucesso", f"Atividade '{desc}' registrada!")
         janela.destroy()
 
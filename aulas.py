@@ -1,43 +1,25 @@
 # aulas.py
-import os
-import json
 import customtkinter as ctk
 from tkinter import messagebox
-from interface import configurar_janela, garantir_pasta_data
+from interface import configurar_janela
+from turmas import carregar_turmas
+from indice_aulas import trechos
+from indice_registros import CAMPO_ID
+import repositorio
 
-PASTA = garantir_pasta_data()
-CAMINHO_AULAS = os.path.join(PASTA, "aulas.json")
-CAMINHO_TURMAS = os.path.join(PASTA, "turmas.json")
+CAMINHO_AULAS = repositorio.caminho("aulas")
 
 
 # ---------------------------
 # utilitários de arquivo
 # ---------------------------
 def carregar_aulas():
-    if not os.path.exists(CAMINHO_AULAS):
-        return []
-    try:
-        with open(CAMINHO_AULAS, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except:
-        return []
+    """Aulas do JSON (lista compartilhada em cache: não altere, copie antes)."""
+    return repositorio.carregar("aulas")
 
 
 def salvar_aulas(lista):
-    if not os.path.exists(PASTA):
-        os.makedirs(PASTA)
-    with open(CAMINHO_AULAS, "w", encoding="utf-8") as f:
-        json.dump(lista, f, indent=4, ensure_ascii=False)
-
-
-def carregar_turmas():
-    if not os.path.exists(CAMINHO_TURMAS):
-        return []
-    try:
-        with open(CAMINHO_TURMAS, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except:
-        return []
+    repositorio.salvar("aulas", lista)
 
 
 # ---------------------------
@@ -85,6 +67,7 @@ def abrir_aulas(app):
     # caixa de listagem (centralizada)
     lista = ctk.CTkTextbox(janela, width=640, height=300)
     lista.pack(pady=(10,12))
+    lista.tag_config("destaque", background="#F2C94C", foreground="black")  # termos encontrados
 
     # variável para manter o último conjunto filtrado (lista de referencias aos objetos)
     last_filtradas = []
@@ -95,24 +78,21 @@ def abrir_aulas(app):
         lista.configure(state="normal")
         lista.delete("1.0", "end")
 
-        # recarrega aulas sempre para garantir sincronização com arquivo
-        registros = carregar_aulas()
-
         turma_sel = turma_var.get()
+        if turma_sel == "Nenhuma turma cadastrada":
+            turma_sel = ""
         filtro_raw = filtro_entry.get().strip()
-        filtro_txt = filtro_raw.lower()
-
-        filtradas = []
-        for a in registros:
-            # filtra por turma (se existir turma selecionada)
-            if turma_sel and turma_sel != "Nenhuma turma cadastrada":
-                if a.get("turma") != turma_sel:
-                    continue
-            # filtra por texto no conteúdo, se houver texto e não for apenas número de índice
-            if filtro_txt and not filtro_txt.isdigit():
-                if filtro_txt not in a.get("conteudo", "").lower():
-                    continue
-            filtradas.append(a)
+
+        encontrados = {}  # id(aula) -> termos a destacar
+        if filtro_raw and not filtro_raw.isdigit():
+            # busca no índice invertido: todas as palavras, mais relevantes primeiro
+            resultados = repositorio.indice_aulas().buscar(filtro_raw, turma_sel or None)
+            filtradas = [a for a, _, _ in resultados]
+            encontrados = {id(a): termos for a, _, termos in resultados}
+        else:
+            # sempre a versão atual do arquivo; sem releitura se ele não mudou (cache)
+            registros = carregar_aulas()
+            filtradas = [a for a in registros if not turma_sel or a.get("turma") == turma_sel]
 
         last_filtradas = filtradas  # salva referência
 
@@ -121,11 +101,15 @@ def abrir_aulas(app):
         else:
             for idx, a in enumerate(filtradas):
                 # mostra índices relativos ao conjunto filtrado — use este número para editar/excluir
-                lista.insert("end",
-                    f"[{idx}] Turma: {a.get('turma')}\n"
-                    f"Conteúdo:\n{a.get('conteudo')}\n"
-                    f"------------------------------\n"
-                )
+                lista.insert("end", f"[{idx}] Turma: {a.get('turma')}\nConteúdo:\n")
+                termos = encontrados.get(id(a))
+                if termos:
+                    for parte, destacada in trechos(a.get("conteudo", ""), termos):
+                        lista.insert("end", parte, "destaque" if destacada else ())
+                    lista.insert("end", "\n")
+                else:
+                    lista.insert("end", f"{a.get('conteudo')}\n")
+                lista.insert("end", "------------------------------\n")
 
         lista.configure(state="disabled")
 
@@ -158,7 +142,7 @@ def abrir_aulas(app):
     # Funções de seleção por índice (índice relativo ao filtered list)
     # ---------------------------
     def selecionar_indice_relativo():
-        """Retorna (idx_relativo, idx_global) ou (None, None) se inválido."""
+        """Retorna (idx_relativo, aula atual) ou (None, None) se inválido."""
         val = filtro_entry.get().strip()
         if not val:
             messagebox.showwarning("Aviso", "Digite o número da aula no campo de filtro.")
@@ -174,23 +158,15 @@ def abrir_aulas(app):
             messagebox.showwarning("Aviso", "Índice fora do intervalo das aulas filtradas.")
             return None, None
 
-        # localizar o índice global do objeto (primeira ocorrência)
-        registros = carregar_aulas()
-        aula_obj = last_filtradas[idx_rel]
-        try:
-            idx_global = registros.index(aula_obj)
-        except ValueError:
-            # fallback: procurar por igualdade de conteúdo/turma se objetos diferentes
-            idx_global = None
-            for i, r in enumerate(registros):
-                if r.get("turma") == aula_obj.get("turma") and r.get("conteudo") == aula_obj.get("conteudo"):
-                    idx_global = i
-                    break
-            if idx_global is None:
-                messagebox.showerror("Erro", "Não foi possível localizar a aula selecionada nos registros.")
-                return None, None
-
-        return idx_rel, idx_global
+        # localiza a aula pelo id (índice id -> registro): aulas com o mesmo conteúdo não se confundem
+        aula = repositorio.registro_por_id("aulas", last_filtradas[idx_rel].get(CAMPO_ID))
+        if aula is None:
+            messagebox.showerror("Erro", "A aula selecionada não existe mais (alterada por outra janela?). "
+                                         "A lista foi atualizada.")
+            atualizar_lista()
+            return None, None
+
+        return idx_rel, aula
 
     # ---------------------------
     # Ações: salvar nova, editar, salvar alteração, excluir
@@ -207,27 +183,24 @@ def abrir_aulas(app):
             messagebox.showwarning("Erro", "Digite o conteúdo da aula.")
             return
 
-        registros = carregar_aulas()
-        registros.append({"turma": turma, "conteudo": conteudo})
-        salvar_aulas(registros)
+        repositorio.inserir("aulas", {"turma": turma, "conteudo": conteudo})
         conteudo_box.delete("1.0", "end")
         atualizar_lista()
         messagebox.showinfo("OK", "Aula registrada com sucesso!")
 
     def editar_aula():
-        idx_rel, idx_global = selecionar_indice_relativo()
+        idx_rel, aula = selecionar_indice_relativo()
         if idx_rel is None:
             return
-        registros = carregar_aulas()
         # carrega conteúdo atual na caixa para editar
         conteudo_box.delete("1.0", "end")
-        conteudo_box.insert("1.0", registros[idx_global].get("conteudo", ""))
+        conteudo_box.insert("1.0", aula.get("conteudo", ""))
         # garante que a combo mostre a turma da aula selecionada
-        turma_box.set(registros[idx_global].get("turma", turma_var.get()))
+        turma_box.set(aula.get("turma", turma_var.get()))
         messagebox.showinfo("Editar", "Altere o conteúdo e clique em 'Salvar Alteração'.")
 
     def salvar_alteracao():
-        idx_rel, idx_global = selecionar_indice_relativo()
+        idx_rel, aula = selecionar_indice_relativo()
         if idx_rel is None:
             return
         novos_conteudo = conteudo_box.get("1.0", "end").strip()
@@ -235,23 +208,18 @@ def abrir_aulas(app):
         if not novos_conteudo:
             messagebox.showwarning("Erro", "Digite algo para salvar na alteração.")
             return
-        registros = carregar_aulas()
-        registros[idx_global]["conteudo"] = novos_conteudo
-        registros[idx_global]["turma"] = nova_turma
-        salvar_aulas(registros)
+        repositorio.substituir_registro("aulas", aula[CAMPO_ID], dict(aula, conteudo=novos_conteudo, turma=nova_turma))
         atualizar_lista()
         messagebox.showinfo("OK", "Aula alterada com sucesso!")
 
     def excluir_aula():
-        idx_rel, idx_global = selecionar_indice_relativo()
+        idx_rel, aula = selecionar_indice_relativo()
         if idx_rel is None:
             return
-        registros = carregar_aulas()
         # confirmação
         if not messagebox.askyesno("Confirmar", "Deseja realmente excluir esta aula?"):
             return
-        del registros[idx_global]
-        salvar_aulas(registros)
+        repositorio.substituir_registro("aulas", aula[CAMPO_ID])
         conteudo_box.delete("1.0", "end")
         atualizar_lista()
         messagebox.showinfo("OK", "Aula excluída.")
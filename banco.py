@@ -0,0 +1,313 @@
+# banco.py
+"""
+Backend SQLite opcional (data/sistema.db) para alunos, turmas, aulas,
+atividades e usuarios, no lugar dos arquivos data/*.json.
+- Uma tabela por store, com índices em turma, nome e nota (alunos por turma
+  ordenados por nota saem do índice, sem carregar todos).
+- Modo WAL: a interface e o servidor leem enquanto outro processo grava.
+- Campos que não têm coluna própria (origem_ip, recebido_em, ...) ficam em
+  "extra" (JSON) e voltam no mesmo dicionário.
+- Tabela "versoes": cada escrita incrementa a versão do store, o que permite
+  validar caches (repositorio.py) e perceber alterações de outro processo (central.py).
+- O "id" estável dos registros (indice_registros.py) fica em "extra", com índice
+  sobre json_extract(extra, '$.id'): atualizar()/remover() acham a linha pelo
+  índice. Linhas antigas sem id recebem um em conectar().
+
+Ativação: o backend é usado quando data/sistema.db existe (criado pela migração)
+ou com SISTEMA_ARMAZENAMENTO=sqlite; SISTEMA_ARMAZENAMENTO=json força os arquivos.
+
+Migração dos JSON existentes (com o servidor parado):
+    python banco.py migrar [--substituir]
+"""
+
+import argparse
+import json
+import math
+import os
+import sqlite3
+
+import arquivos
+from indice_registros import CAMPO_ID, STORES_COM_ID, novo_id
+
+DATA_FOLDER = "data"
+DB_FILE = os.path.join(DATA_FOLDER, "sistema.db")
+ARMAZENAMENTOS = ("json", "sqlite")
+
+# Colunas próprias de cada store (o restante vai para "extra")
+TABELAS = {
+    "alunos": ("nome", "turma", "nota", "seq", "id_envio"),
+    "turmas": ("nome", "professor", "turno"),
+    "aulas": ("turma", "conteudo"),
+    "atividades": ("turma", "descricao", "arquivo"),
+    "usuarios": ("usuario", "senha"),
+}
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS alunos (
+    id INTEGER PRIMARY KEY, nome TEXT, turma TEXT, nota REAL,
+    seq INTEGER UNIQUE, id_envio TEXT UNIQUE, extra TEXT);
+CREATE INDEX IF NOT EXISTS alunos_turma_nota ON alunos (turma, nota);
+CREATE INDEX IF NOT EXISTS alunos_nome ON alunos (nome COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS alunos_nota ON alunos (nota);
+
+CREATE TABLE IF NOT EXISTS turmas (
+    id INTEGER PRIMARY KEY, nome TEXT, professor TEXT, turno TEXT, extra TEXT);
+CREATE INDEX IF NOT EXISTS turmas_nome ON turmas (nome COLLATE NOCASE);
+
+CREATE TABLE IF NOT EXISTS aulas (
+    id INTEGER PRIMARY KEY, turma TEXT, conteudo TEXT, extra TEXT);
+CREATE INDEX IF NOT EXISTS aulas_turma ON aulas (turma);
+
+CREATE TABLE IF NOT EXISTS atividades (
+    id INTEGER PRIMARY KEY, turma TEXT, descricao TEXT, arquivo TEXT, extra TEXT);
+CREATE INDEX IF NOT EXISTS atividades_turma ON atividades (turma);
+
+CREATE TABLE IF NOT EXISTS usuarios (
+    id INTEGER PRIMARY KEY, usuario TEXT, senha TEXT, extra TEXT);
+CREATE INDEX IF NOT EXISTS usuarios_usuario ON usuarios (usuario);
+
+CREATE INDEX IF NOT EXISTS alunos_id ON alunos (json_extract(extra, '$.id'));
+CREATE INDEX IF NOT EXISTS turmas_id ON turmas (json_extract(extra, '$.id'));
+CREATE INDEX IF NOT EXISTS aulas_id ON aulas (json_extract(extra, '$.id'));
+CREATE INDEX IF NOT EXISTS atividades_id ON atividades (json_extract(extra, '$.id'));
+
+CREATE TABLE IF NOT EXISTS versoes (tabela TEXT PRIMARY KEY, versao INTEGER NOT NULL);
+"""
+
+
+def armazenamento_padrao() -> str:
+    """'sqlite' se SISTEMA_ARMAZENAMENTO pedir ou se data/sistema.db existir; senão 'json'."""
+    escolhido = os.environ.get("SISTEMA_ARMAZENAMENTO", "").lower()
+    if escolhido in ARMAZENAMENTOS:
+        return escolhido
+    return "sqlite" if os.path.exists(DB_FILE) else "json"
+
+
+def conectar(caminho: str = None, sincrono: str = "FULL") -> sqlite3.Connection:
+    """
+    Abre (e cria, se preciso) o banco em modo WAL. A conexão pode ser usada por
+    várias threads, desde que o chamador serialize o acesso (lock próprio).
+    sincrono: "FULL" (commit durável) ou "NORMAL" (mais rápido; no WAL perde só
+    os últimos commits numa queda de energia).
+    """
+    caminho = caminho or DB_FILE
+    pasta = os.path.dirname(caminho)
+    if pasta and not os.path.exists(pasta):
+        os.makedirs(pasta)
+    conn = sqlite3.connect(caminho, timeout=10, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA synchronous={sincrono}")
+    conn.executescript(ESQUEMA)
+    _preencher_ids(conn)
+    return conn
+
+
+def _onde_id() -> str:
+    return f"json_extract(extra, '$.{CAMPO_ID}') = ?"
+
+
+def _preencher_ids(conn: sqlite3.Connection) -> None:
+    """Dá um id às linhas gravadas antes dos ids estáveis (não faz nada se todas já têm)."""
+    for tabela in STORES_COM_ID:
+        with conn:
+            cursor = conn.execute(
+                f"UPDATE {tabela} SET extra = json_set(COALESCE(extra, '{{}}'), '$.{CAMPO_ID}', "
+                f"lower(hex(randomblob(16)))) WHERE json_extract(extra, '$.{CAMPO_ID}') IS NULL")
+            if cursor.rowcount:
+                _incrementar_versao(conn, tabela)
+
+
+def _nota_real(valor):
+    try:
+        nota = float(valor)
+    except (TypeError, ValueError):
+        return None
+    return nota if math.isfinite(nota) else None
+
+
+def _para_linha(tabela: str, registro: dict) -> tuple:
+    colunas = TABELAS[tabela]
+    valores = [registro.get(c) for c in colunas]
+    extra = {k: v for k, v in registro.items() if k not in colunas}
+    if tabela in STORES_COM_ID and not extra.get(CAMPO_ID):
+        extra[CAMPO_ID] = novo_id()
+    if tabela == "alunos":
+        i = colunas.index("nota")
+        nota = _nota_real(valores[i])
+        if nota is None and valores[i] is not None:
+            extra["nota"] = valores[i]  # nota que não é número: preservada como veio
+        valores[i] = nota
+    return tuple(valores) + (json.dumps(extra, ensure_ascii=False) if extra else None,)
+
+
+def _para_dict(tabela: str, linha: tuple) -> dict:
+    registro = {c: v for c, v in zip(TABELAS[tabela], linha) if v is not None}
+    if linha[-1]:
+        registro.update(json.loads(linha[-1]))
+    return registro
+
+
+def _incrementar_versao(conn: sqlite3.Connection, tabela: str):
+    conn.execute("INSERT INTO versoes (tabela, versao) VALUES (?, 1) "
+                 "ON CONFLICT(tabela) DO UPDATE SET versao = versao + 1", (tabela,))
+
+
+def versao(conn: sqlite3.Connection, tabela: str) -> int:
+    linha = conn.execute("SELECT versao FROM versoes WHERE tabela = ?", (tabela,)).fetchone()
+    return linha[0] if linha else 0
+
+
+def ler(conn: sqlite3.Connection, tabela: str, onde: str = "", parametros=(),
+        ordem: str = "id", limite: int = None) -> list:
+    """Registros da tabela como dicionários (filtro/ordem em SQL, ex.: onde="turma = ?")."""
+    sql = f"SELECT {', '.join(TABELAS[tabela])}, extra FROM {tabela}"
+    if onde:
+        sql += f" WHERE {onde}"
+    sql += f" ORDER BY {ordem}"
+    if limite is not None:
+        sql += f" LIMIT {int(limite)}"
+    return [_para_dict(tabela, linha) for linha in conn.execute(sql, parametros)]
+
+
+def inserir(conn: sqlite3.Connection, tabela: str, registros: list) -> None:
+    """Acrescenta registros numa única transação (um commit)."""
+    colunas = TABELAS[tabela] + ("extra",)
+    sql = f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})"
+    with conn:
+        conn.executemany(sql, [_para_linha(tabela, r) for r in registros])
+        _incrementar_versao(conn, tabela)
+
+
+def substituir(conn: sqlite3.Connection, tabela: str, registros: list) -> None:
+    """Troca todo o conteúdo da tabela (equivalente a reescrever o arquivo JSON)."""
+    colunas = TABELAS[tabela] + ("extra",)
+    sql = f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})"
+    with conn:
+        conn.execute(f"DELETE FROM {tabela}")
+        conn.executemany(sql, [_para_linha(tabela, r) for r in registros])
+        _incrementar_versao(conn, tabela)
+
+
+def sincronizar(conn: sqlite3.Connection, tabela: str, registros: list, removidos=()) -> None:
+    """
+    Grava a lista editada de um store com id sem reescrever a tabela: cada registro
+    é atualizado pelo id (ou inserido, se o id ainda não existe) e só os ids em
+    'removidos' são apagados, numa única transação. Linhas gravadas por outro
+    processo depois que a lista foi lida (ex.: alunos recebidos pelo servidor)
+    continuam na tabela, ao contrário de substituir().
+    """
+    colunas = TABELAS[tabela] + ("extra",)
+    atualizar_sql = f"UPDATE {tabela} SET {', '.join(f'{c} = ?' for c in colunas)} WHERE {_onde_id()}"
+    inserir_sql = f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})"
+    with conn:
+        for id_registro in removidos:
+            conn.execute(f"DELETE FROM {tabela} WHERE {_onde_id()}", (id_registro,))
+        for registro in registros:
+            linha = _para_linha(tabela, registro)
+            if not conn.execute(atualizar_sql, linha + (registro[CAMPO_ID],)).rowcount:
+                conn.execute(inserir_sql, linha)
+        _incrementar_versao(conn, tabela)
+
+
+def atualizar(conn: sqlite3.Connection, tabela: str, id_registro: str, registro: dict) -> bool:
+    """Troca a linha do registro com esse id (pelo índice do id). False se ele não existir."""
+    colunas = TABELAS[tabela] + ("extra",)
+    atribuicoes = ", ".join(f"{c} = ?" for c in colunas)
+    with conn:
+        cursor = conn.execute(f"UPDATE {tabela} SET {atribuicoes} WHERE {_onde_id()}",
+                              _para_linha(tabela, dict(registro, **{CAMPO_ID: id_registro})) + (id_registro,))
+        if cursor.rowcount:
+            _incrementar_versao(conn, tabela)
+    return cursor.rowcount > 0
+
+
+def remover(conn: sqlite3.Connection, tabela: str, id_registro: str) -> bool:
+    """Apaga o registro com esse id. False se ele não existir."""
+    with conn:
+        cursor = conn.execute(f"DELETE FROM {tabela} WHERE {_onde_id()}", (id_registro,))
+        if cursor.rowcount:
+            _incrementar_versao(conn, tabela)
+    return cursor.rowcount > 0
+
+
+def maior_seq(conn: sqlite3.Connection) -> int:
+    return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM alunos").fetchone()[0]
+
+
+# ---------------------------------------------------------
+# Migração data/*.json -> data/sistema.db
+# ---------------------------------------------------------
+def _ler_json(caminho: str) -> list:
+    dados = arquivos.ler_json(caminho, [])
+    return dados if isinstance(dados, list) else []
+
+
+def _alunos_com_journal(pasta: str) -> list:
+    """Snapshot + registros do journal do servidor ainda não compactados."""
+    alunos = _ler_json(os.path.join(pasta, "alunos.json"))
+    base = max([a["seq"] for a in alunos if isinstance(a, dict) and isinstance(a.get("seq"), int)] or [0])
+    for nome in ("alunos.journal.old.jsonl", "alunos.journal.jsonl"):
+        caminho = os.path.join(pasta, nome)
+        if not os.path.exists(caminho):
+            continue
+        with open(caminho, "r", encoding="utf-8") as f:
+            for linha in f:
+                try:
+                    registro = json.loads(linha)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(registro.get("seq"), int) and registro["seq"] > base:
+                    alunos.append(registro)
+                    base = registro["seq"]
+    return alunos
+
+
+def migrar(pasta: str = DATA_FOLDER, caminho: str = None, substituir_existente: bool = False) -> dict:
+    """
+    Importa data/*.json para o banco. Retorna {store: quantidade}.
+    Levanta RuntimeError se o banco já tiver dados (use substituir_existente).
+    """
+    conn = conectar(caminho or os.path.join(pasta, "sistema.db"))
+    try:
+        if not substituir_existente:
+            for tabela in TABELAS:
+                if conn.execute(f"SELECT 1 FROM {tabela} LIMIT 1").fetchone():
+                    raise RuntimeError(f"O banco já tem dados em '{tabela}' (use --substituir).")
+        importados = {}
+        for tabela in TABELAS:
+            if tabela == "alunos":
+                registros = _alunos_com_journal(pasta)
+            else:
+                registros = _ler_json(os.path.join(pasta, f"{tabela}.json"))
+            registros = [r for r in registros if isinstance(r, dict)]
+            substituir(conn, tabela, registros)
+            importados[tabela] = len(registros)
+        return importados
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backend SQLite do Sistema Acadêmico")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p_migrar = sub.add_parser("migrar", help="importa data/*.json para data/sistema.db")
+    p_migrar.add_argument("--pasta", default=DATA_FOLDER)
+    p_migrar.add_argument("--substituir", action="store_true",
+                          help="apaga o que já existir no banco antes de importar")
+    args = parser.parse_args(argv)
+
+    if args.comando == "migrar":
+        try:
+            importados = migrar(args.pasta, substituir_existente=args.substituir)
+        except (RuntimeError, ValueError, OSError) as e:
+            print(f"[ERRO] {e}")
+            return 1
+        for tabela, quantidade in importados.items():
+            print(f"[MIGRAÇÃO] {tabela}: {quantidade} registro(s)")
+        print(f"[OK] Banco criado em {os.path.join(args.pasta, 'sistema.db')}. "
+              "Interface e servidor passam a usá-lo automaticamente.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
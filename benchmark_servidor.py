@@ -0,0 +1,407 @@
+# benchmark_servidor.py
+"""
+Gerador de carga e benchmark do caminho de gravação do servidor TCP (servidor.py).
+- Simula N clientes simultâneos enviando 'nome;turma;nota' por um tempo
+  (--duracao) ou até um total de registros (--registros).
+- Protocolo legado (uma conexão por registro, como o cliente C), v2
+  (conexão persistente, com até --pipeline registros em voo por cliente) ou
+  binário (protocolo_binario.py, um quadro LOTE de --pipeline registros por vez).
+- Sobe o servidor localmente numa porta livre, numa pasta temporária, já com
+  0 / 10k / 100k alunos no snapshot (--preexistentes) para mostrar como o
+  custo por inserção varia com o tamanho dos dados; ou mede um servidor já
+  em execução (--alvo host:porta).
+- Relata vazão, latência p50/p95/p99 e taxa de erro e grava tudo em JSON
+  (data/benchmarks/) para comparar rodadas.
+
+Exemplos:
+    python benchmark_servidor.py
+    python benchmark_servidor.py --clientes 200 --duracao 20 --engine asyncio --workers 4
+    python benchmark_servidor.py --protocolo legado --registros 5000 --preexistentes 0
+    python benchmark_servidor.py --alvo 192.168.0.10:5050 --duracao 30
+"""
+
+import argparse
+import datetime
+import json
+import math
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import arquivos
+import conexao_servidor
+import protocolo
+import protocolo_binario
+
+PASTA_RESULTADOS = os.path.join("data", "benchmarks")
+SERVIDOR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "servidor.py")
+TIMEOUT_SUBIDA = 30.0
+TIMEOUT_RESPOSTA = 30.0
+TURMAS = ("1A", "1B", "2A", "2B", "3A", "3B")
+
+
+def ts():
+    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def log(msg: str):
+    print(f"[{ts()}] {msg}")
+
+
+# ---------------------------------------------------------
+# Servidor local (porta livre, pasta temporária, dados pré-carregados)
+# ---------------------------------------------------------
+def _porta_livre() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _gerar_snapshot(pasta: str, quantidade: int):
+    """Grava data/alunos.json com 'quantidade' alunos sintéticos (com seq, como o central)."""
+    os.makedirs(os.path.join(pasta, "data"), exist_ok=True)
+    alunos = [{"nome": f"Pre {i}", "turma": TURMAS[i % len(TURMAS)], "nota": float(i % 11),
+               "origem_ip": "benchmark", "origem_port": 0, "recebido_em": ts(), "seq": i + 1}
+              for i in range(quantidade)]
+    with open(os.path.join(pasta, "data", "alunos.json"), "w", encoding="utf-8") as f:
+        json.dump(alunos, f, ensure_ascii=False)
+
+
+def _esperar_servidor(host: str, porta: int, processo=None):
+    """Espera o servidor responder ao PING."""
+    limite = time.monotonic() + TIMEOUT_SUBIDA
+    while time.monotonic() < limite:
+        if processo is not None and processo.poll() is not None:
+            raise RuntimeError(f"servidor terminou na subida (código {processo.returncode})")
+        if conexao_servidor.ping(host, porta, timeout=1.0) is not None:
+            return
+        time.sleep(0.2)
+    raise RuntimeError(f"servidor não respondeu em {TIMEOUT_SUBIDA:.0f}s")
+
+
+def iniciar_servidor_local(preexistentes: int, args):
+    """Sobe servidor.py numa pasta temporária; devolve (processo, pasta, porta)."""
+    pasta = tempfile.mkdtemp(prefix="benchmark_servidor_")
+    _gerar_snapshot(pasta, preexistentes)
+    porta = _porta_livre()
+    comando = [sys.executable, SERVIDOR, "--host", "127.0.0.1", "--port", str(porta),
+               "--engine", args.engine, "--workers", str(args.workers), "--fsync", args.fsync,
+               "--sem-log-conexoes", "--log-nivel", "WARNING"]
+    saida = open(os.path.join(pasta, "servidor.out"), "w", encoding="utf-8")
+    processo = subprocess.Popen(comando, cwd=pasta, stdout=saida, stderr=subprocess.STDOUT)
+    saida.close()
+    try:
+        _esperar_servidor("127.0.0.1", porta, processo)
+    except Exception:
+        parar_servidor_local(processo, pasta)
+        raise
+    return processo, pasta, porta
+
+
+def parar_servidor_local(processo, pasta: str):
+    if processo.poll() is None:
+        processo.terminate()
+        try:
+            processo.wait(TIMEOUT_SUBIDA)
+        except subprocess.TimeoutExpired:
+            processo.kill()
+            processo.wait()
+    shutil.rmtree(pasta, ignore_errors=True)
+
+
+# ---------------------------------------------------------
+# Clientes
+# ---------------------------------------------------------
+class _Controle:
+    """Estado compartilhado entre os clientes de uma rodada."""
+
+    def __init__(self, registros: int, duracao: float):
+        self.lock = threading.Lock()
+        self.limitado = registros > 0   # False: limitado só pela duração
+        self.restantes = registros
+        self.fim = time.monotonic() + duracao if duracao else None
+        self.latencias = []             # segundos, por registro
+        self.enviados = 0
+        self.erros = 0
+        self.motivos = {}
+
+    def reservar(self, n: int) -> int:
+        """Quantos registros o cliente ainda pode enviar (até n)."""
+        if self.fim is not None and time.monotonic() >= self.fim:
+            return 0
+        if not self.limitado:
+            return n
+        with self.lock:
+            n = min(n, self.restantes)
+            self.restantes -= n
+            return n
+
+    def anotar(self, latencias: list, erros: list):
+        with self.lock:
+            self.latencias.extend(latencias)
+            self.enviados += len(latencias)
+            for motivo in erros:
+                self.erros += 1
+                self.motivos[motivo] = self.motivos.get(motivo, 0) + 1
+
+
+def _registro(cliente: int, i: int) -> bytes:
+    return protocolo.formatar_registro(f"Bench {cliente}-{i}", TURMAS[i % len(TURMAS)], i % 11)
+
+
+def _cliente_legado(cliente: int, host: str, porta: int, controle: _Controle):
+    """Uma conexão por registro, mensagem sem '\\n' (como o cliente.c)."""
+    i = 0
+    while controle.reservar(1):
+        inicio = time.perf_counter()
+        erro = None
+        try:
+            with socket.create_connection((host, porta), timeout=TIMEOUT_RESPOSTA) as s:
+                s.sendall(_registro(cliente, i).rstrip(b"\n"))
+                resposta = s.recv(1024).decode("utf-8", errors="replace")
+            if resposta != "OK":
+                erro = resposta or "conexão fechada"
+        except OSError as e:
+            erro = type(e).__name__
+        controle.anotar([time.perf_counter() - inicio], [erro] if erro else [])
+        i += 1
+
+
+def _cliente_linhas(cliente: int, host: str, porta: int, controle: _Controle, pipeline: int):
+    """Conexão persistente (v2): envia até 'pipeline' registros e lê as respostas."""
+    try:
+        s = socket.create_connection((host, porta), timeout=TIMEOUT_RESPOSTA)
+    except OSError as e:
+        controle.anotar([0.0], [type(e).__name__])
+        return
+    leitor = s.makefile("rb")
+    i = 0
+    try:
+        while True:
+            n = controle.reservar(pipeline)
+            if not n:
+                break
+            inicio = time.perf_counter()
+            s.sendall(b"".join(_registro(cliente, i + k) for k in range(n)))
+            erros = []
+            for _ in range(n):
+                linha = leitor.readline()
+                if not linha:
+                    raise ConnectionError("conexão fechada pelo servidor")
+                resposta = linha.decode("utf-8", errors="replace").strip()
+                if resposta != "OK":
+                    erros.append(resposta)
+            # todos os registros da janela são confirmados juntos
+            controle.anotar([time.perf_counter() - inicio] * n, erros)
+            i += n
+        s.sendall(b"QUIT\n")
+        leitor.readline()
+    except OSError as e:
+        controle.anotar([0.0], [type(e).__name__])
+    finally:
+        leitor.close()
+        s.close()
+
+
+def _cliente_binario(cliente: int, host: str, porta: int, controle: _Controle, pipeline: int):
+    """Protocolo binário: um quadro LOTE com até 'pipeline' registros por vez."""
+    pb = protocolo_binario
+    try:
+        s = socket.create_connection((host, porta), timeout=TIMEOUT_RESPOSTA)
+    except OSError as e:
+        controle.anotar([0.0], [type(e).__name__])
+        return
+    leitor = s.makefile("rb")
+
+    def ler_quadro():
+        cabecalho = leitor.read(pb.CABECALHO.size)
+        if len(cabecalho) < pb.CABECALHO.size:
+            raise ConnectionError("conexão fechada pelo servidor")
+        tipo, id_quadro, tamanho = pb.CABECALHO.unpack(cabecalho)
+        return tipo, id_quadro, leitor.read(tamanho)
+
+    i = 0
+    try:
+        s.sendall(pb.codificar_saudacao())
+        if leitor.read(len(pb.MAGICO) + 1)[:len(pb.MAGICO)] != pb.MAGICO:
+            raise ConnectionError("saudação binária recusada")
+        while True:
+            n = controle.reservar(pipeline)
+            if not n:
+                break
+            lote = [(f"Bench {cliente}-{i + k}", TURMAS[(i + k) % len(TURMAS)], (i + k) % 11)
+                    for k in range(n)]
+            inicio = time.perf_counter()
+            s.sendall(pb.codificar_lote(lote, i))
+            tipo, _, payload = ler_quadro()
+            if tipo == pb.RESULTADO:
+                erros = [pb.MENSAGENS_STATUS.get(st, str(st))
+                         for st in pb.decodificar_resultado(payload) if st != pb.STATUS_OK]
+            else:
+                erros = [pb.decodificar_erro(payload)[1]] * n
+            controle.anotar([time.perf_counter() - inicio] * n, erros)
+            i += n
+        s.sendall(pb.codificar_quit())
+        ler_quadro()
+    except OSError as e:
+        controle.anotar([0.0], [type(e).__name__])
+    finally:
+        leitor.close()
+        s.close()
+
+
+def consultar_stats(host: str, porta: int):
+    """Métricas do servidor (comando STATS); None se não disponível."""
+    try:
+        with socket.create_connection((host, porta), timeout=5.0) as s:
+            s.sendall(b"STATS\nQUIT\n")
+            leitor = s.makefile("rb")
+            return protocolo.ler_resposta_consulta(leitor.readline().decode("utf-8").strip())
+    except (OSError, ValueError):
+        return None
+
+
+# ---------------------------------------------------------
+# Rodada
+# ---------------------------------------------------------
+def _percentil(ordenadas: list, p: float) -> float:
+    if not ordenadas:
+        return 0.0
+    return ordenadas[min(len(ordenadas) - 1, max(0, math.ceil(len(ordenadas) * p) - 1))]
+
+
+def resumir_latencias(latencias: list) -> dict:
+    ordenadas = sorted(latencias)
+    ms = lambda s: round(s * 1000, 3)
+    return {
+        "media_ms": ms(sum(ordenadas) / len(ordenadas)) if ordenadas else 0.0,
+        "p50_ms": ms(_percentil(ordenadas, 0.50)),
+        "p95_ms": ms(_percentil(ordenadas, 0.95)),
+        "p99_ms": ms(_percentil(ordenadas, 0.99)),
+        "max_ms": ms(ordenadas[-1]) if ordenadas else 0.0,
+    }
+
+
+def executar_rodada(host: str, porta: int, args) -> dict:
+    """Dispara os clientes e devolve vazão, latências e erros."""
+    controle = _Controle(args.registros, args.duracao)
+    if args.protocolo == "legado":
+        alvo, extra = _cliente_legado, ()
+    else:
+        alvo = _cliente_binario if args.protocolo == "binario" else _cliente_linhas
+        extra = (args.pipeline,)
+    threads = [threading.Thread(target=alvo, args=(c, host, porta, controle) + extra, daemon=True)
+               for c in range(args.clientes)]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    duracao = time.perf_counter() - inicio
+
+    confirmados = controle.enviados - controle.erros
+    return {
+        "registros": controle.enviados,
+        "confirmados": confirmados,
+        "erros": controle.erros,
+        "taxa_erro": round(controle.erros / controle.enviados, 4) if controle.enviados else 0.0,
+        "motivos_erro": controle.motivos,
+        "duracao_s": round(duracao, 3),
+        "vazao_rps": round(confirmados / duracao, 1) if duracao else 0.0,
+        "latencia": resumir_latencias(controle.latencias),
+    }
+
+
+def salvar_resultado(resultado: dict, caminho: str = None) -> str:
+    if not caminho:
+        os.makedirs(PASTA_RESULTADOS, exist_ok=True)
+        caminho = os.path.join(PASTA_RESULTADOS,
+                               f"benchmark-{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    arquivos.gravar_json(caminho, resultado, indent=4)
+    return caminho
+
+
+def _linha_tabela(rodada: dict) -> str:
+    lat = rodada["latencia"]
+    return (f"{rodada['preexistentes'] if rodada['preexistentes'] is not None else '-':>12} "
+            f"{rodada['registros']:>10} {rodada['vazao_rps']:>11.1f} {lat['p50_ms']:>9.2f} "
+            f"{lat['p95_ms']:>9.2f} {lat['p99_ms']:>9.2f} {rodada['taxa_erro'] * 100:>7.2f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do servidor acadêmico TCP.")
+    parser.add_argument("--clientes", type=int, default=50, help="clientes simultâneos")
+    parser.add_argument("--duracao", type=float, default=10.0,
+                        help="segundos por rodada (0 = só pelo --registros)")
+    parser.add_argument("--registros", type=int, default=0,
+                        help="total de registros por rodada (0 = só pela --duracao)")
+    parser.add_argument("--protocolo", choices=("linhas", "legado", "binario"), default="linhas",
+                        help="linhas: conexão persistente (v2) | legado: uma conexão por registro | binario: quadros LOTE")
+    parser.add_argument("--pipeline", type=int, default=1,
+                        help="registros em voo por cliente (linhas) ou por quadro LOTE (binario)")
+    parser.add_argument("--preexistentes", default="0,10000,100000",
+                        help="alunos já no snapshot, uma rodada para cada (lista separada por vírgula)")
+    parser.add_argument("--alvo", help="host:porta de um servidor já em execução (não sobe servidor local)")
+    parser.add_argument("--engine", default="threads", help="engine do servidor local")
+    parser.add_argument("--workers", type=int, default=1, help="workers do servidor local")
+    parser.add_argument("--fsync", default="sempre", help="política de fsync do servidor local")
+    parser.add_argument("--saida", help=f"arquivo JSON do resultado (padrão: {PASTA_RESULTADOS}/benchmark-<data>.json)")
+    args = parser.parse_args(argv)
+    if not args.duracao and not args.registros:
+        parser.error("informe --duracao e/ou --registros")
+    args.pipeline = max(1, args.pipeline)
+
+    if args.alvo:
+        host, _, porta = args.alvo.rpartition(":")
+        tamanhos = [None]
+    else:
+        tamanhos = [int(t) for t in args.preexistentes.split(",") if t.strip()]
+
+    rodadas = []
+    for preexistentes in tamanhos:
+        processo = pasta = None
+        if args.alvo:
+            alvo_host, alvo_porta = host, int(porta)
+            _esperar_servidor(alvo_host, alvo_porta)
+            log(f"[BENCHMARK] Servidor em {args.alvo}")
+        else:
+            log(f"[BENCHMARK] Subindo servidor local com {preexistentes} aluno(s) pré-carregado(s)...")
+            processo, pasta, alvo_porta = iniciar_servidor_local(preexistentes, args)
+            alvo_host = "127.0.0.1"
+        try:
+            log(f"[BENCHMARK] {args.clientes} cliente(s), protocolo {args.protocolo}"
+                f"{f', pipeline {args.pipeline}' if args.protocolo != 'legado' else ''}")
+            rodada = {"preexistentes": preexistentes}
+            rodada.update(executar_rodada(alvo_host, alvo_porta, args))
+            rodada["stats_servidor"] = consultar_stats(alvo_host, alvo_porta)
+            rodadas.append(rodada)
+            lat = rodada["latencia"]
+            log(f"[RESULTADO] {rodada['confirmados']} registro(s) em {rodada['duracao_s']}s — "
+                f"{rodada['vazao_rps']} reg/s | p50 {lat['p50_ms']} ms, p95 {lat['p95_ms']} ms, "
+                f"p99 {lat['p99_ms']} ms | erros {rodada['erros']} ({rodada['taxa_erro'] * 100:.2f}%)")
+        finally:
+            if processo is not None:
+                parar_servidor_local(processo, pasta)
+
+    resultado = {
+        "gerado_em": ts(),
+        "configuracao": {k: v for k, v in vars(args).items() if k != "saida"},
+        "rodadas": rodadas,
+    }
+    caminho = salvar_resultado(resultado, args.saida)
+
+    print()
+    print(f"{'pré-carga':>12} {'registros':>10} {'reg/s':>11} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'erros':>8}")
+    for rodada in rodadas:
+        print(_linha_tabela(rodada))
+    print()
+    log(f"[BENCHMARK] Resultado gravado em {caminho}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,790 @@
+# central.py
+"""
+Armazenamento central do servidor: os alunos recebidos por servidor.py, em
+disco e em memória.
+
+Gravação
+- Group commit: uma única thread escritora junta os pedidos que chegam dentro
+  da janela configurada (ou até LOTE_MAX registros) numa escrita com um só
+  fsync, e só então devolve a cada chamador. Um pedido BULK sai inteiro numa
+  mesma escrita.
+- Cada registro recebe "seq" crescente e um "id" estável (indice_registros.py,
+  o mesmo da interface).
+- id_envio (gerado pelo cliente): o reenvio de um id já gravado devolve o
+  registro original com "duplicado": True, sem gravar. O índice _por_id_envio
+  é refeito do disco na inicialização.
+
+Em disco
+- JSON (padrão): journal append-only data/alunos.journal.jsonl + snapshot
+  data/alunos.json (a lista lida pela interface, sob as travas de arquivos.py).
+  A compactação em background junta os dois num novo snapshot atômico, levando
+  só os seq maiores que os já presentes (uma queda no meio não duplica); na
+  inicialização, o journal ainda não compactado é reaplicado.
+- SQLite (configurar(armazenamento="sqlite"), banco.py): cada lote é uma
+  transação INSERT em data/sistema.db; não há compactação, só a conferência
+  da versão da tabela.
+
+Em memória
+- Todos os alunos, com índices por turma, nome e nota e os agregados por turma:
+  listar_turma(), buscar_prefixo(), top_notas() e resumo_turmas() não releem
+  o disco. Uma alteração feita por fora (interface) recarrega a memória na
+  próxima compactação.
+- assinar(): callback chamado pela thread escritora a cada lote (eventos
+  "inserido" e "recarregado"), retomável a partir do último seq recebido.
+- Workers (servidor.py --workers): só o processo principal escreve; os
+  workers chamam usar_remoto() e passam gravações e consultas a ele por pipe.
+"""
+
+import bisect
+import json
+import math
+import os
+import queue
+import threading
+import time
+import datetime
+
+import agregados
+import arquivos
+import banco
+from indice_nomes import normalizar
+from indice_notas import IndiceNotasTurmas
+from indice_registros import CAMPO_ID, garantir_ids, novo_id
+import log_servidor
+import metricas
+
+DATA_FOLDER = "data"
+DATA_FILE = os.path.join(DATA_FOLDER, "alunos.json")
+JOURNAL_FILE = os.path.join(DATA_FOLDER, "alunos.journal.jsonl")
+# journal "congelado" durante uma compactação em andamento
+JOURNAL_OLD_FILE = os.path.join(DATA_FOLDER, "alunos.journal.old.jsonl")
+
+# Compacta a cada N segundos ou quando o journal acumular N registros
+INTERVALO_COMPACTACAO = 5.0
+LIMITE_JOURNAL = 1000
+
+# Group commit: janela de agrupamento e tamanho máximo do lote
+JANELA_MS = 2.0
+LOTE_MAX = 256
+
+# Política de fsync do journal:
+#   "sempre"    -> fsync a cada lote (resposta só após o lote estar no disco)
+#   "intervalo" -> fsync no máximo a cada FSYNC_INTERVALO_MS
+#   "nenhum"    -> deixa a descarga para o sistema operacional
+POLITICAS_FSYNC = ("sempre", "intervalo", "nenhum")
+POLITICA_FSYNC = "sempre"
+FSYNC_INTERVALO_MS = 100.0
+
+# "json" (journal + snapshot) ou "sqlite" (data/sistema.db, ver banco.py)
+ARMAZENAMENTO = "json"
+
+# Protege o journal aberto, o contador de seq e a lista de pendentes
+journal_lock = threading.Lock()
+# Garante uma única compactação por vez (snapshot é reescrito só aqui)
+compact_lock = threading.Lock()
+
+_journal = None
+_ultimo_seq = 0
+_pendentes = []          # registros no journal que ainda não estão no snapshot
+_fila = queue.Queue()    # pedidos de escrita para a thread escritora
+_thread_escrita = None
+_sujo = False            # há linhas gravadas ainda sem fsync (políticas relaxadas)
+_ultimo_fsync = 0.0
+_banco = None            # conexão SQLite (só com ARMAZENAMENTO "sqlite"; usar com journal_lock)
+_versao_banco = 0        # versão da tabela alunos após a nossa última escrita
+
+# Tamanhos de lote alcançados pelo group commit
+lock_lotes = threading.Lock()
+stats_lotes = {"lotes": 0, "registros": 0, "maior": 0, "fsyncs": 0, "duplicados": 0, "distribuicao": {}}
+
+# Conjunto de alunos em memória e seus índices (protegidos por memoria_lock)
+memoria_lock = threading.Lock()
+_alunos = []             # snapshot + journal, na ordem de chegada
+_por_turma = {}          # turma -> lista de alunos
+_indice_nomes = []       # (nome normalizado, posição em _alunos), ordenado
+_agregados = agregados.AgregadosTurmas()  # estatísticas de notas (geral e por turma)
+_indice_notas = IndiceNotasTurmas()       # posições em _alunos ordenadas por nota (geral e por turma)
+_por_id_envio = {}       # id_envio -> registro gravado (só escrito com journal_lock)
+_assinatura = None       # (mtime, tamanho, inode) do snapshot na última leitura/escrita
+
+# data/agregados.json: estatísticas exatamente do que está no armazenamento
+# (no modo JSON, só do snapshot; o journal pendente entra na próxima compactação)
+_agregados_snapshot = agregados.AgregadosTurmas()
+_versao_agregados = None  # versão dos dados do último agregados.json gravado
+
+# Feed de alterações: callbacks(eventos) dos assinantes (protegidos por journal_lock)
+_assinantes = []
+
+_parar = threading.Event()
+_acordar = threading.Event()
+_thread_compactacao = None
+
+# Worker do servidor (--workers): gravações e consultas vão para o processo
+# escritor pelo pipe (ver escritor_remoto.py); None = este processo é o escritor
+_remoto = None
+
+
+def ts():
+    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def ensure_data_folder():
+    if not os.path.exists(DATA_FOLDER):
+        os.makedirs(DATA_FOLDER)
+
+
+def read_alunos() -> list:
+    """Lê o snapshot de alunos; retorna lista vazia se inexistente ou inválido."""
+    ensure_data_folder()
+    if not os.path.exists(DATA_FILE):
+        return []
+    try:
+        return arquivos.ler_json(DATA_FILE, [])
+    except Exception:
+        log_servidor.aviso("[WARN] Arquivo JSON inválido - recuperando lista vazia.")
+        return []
+
+
+def write_alunos_atomic(alunos: list) -> None:
+    """Grava o snapshot de forma atômica (temporário + fsync + rename, com a trava de escrita)."""
+    ensure_data_folder()
+    arquivos.gravar_json(DATA_FILE, alunos, indent=4)
+
+
+def _maior_seq(alunos: list) -> int:
+    maior = 0
+    for a in alunos:
+        seq = a.get("seq") if isinstance(a, dict) else None
+        if isinstance(seq, int) and seq > maior:
+            maior = seq
+    return maior
+
+
+def _ler_journal(caminho: str) -> list:
+    """Lê as linhas válidas de um journal; uma última linha truncada (queda) é ignorada."""
+    if not os.path.exists(caminho):
+        return []
+    registros = []
+    with open(caminho, "r", encoding="utf-8") as f:
+        for linha in f:
+            linha = linha.strip()
+            if not linha:
+                continue
+            try:
+                registros.append(json.loads(linha))
+            except json.JSONDecodeError:
+                log_servidor.aviso(f"[WARN] Linha inválida no journal ignorada ({caminho}).",
+                                   chave="journal_linha_invalida")
+    return registros
+
+
+def _assinatura_snapshot():
+    try:
+        st = os.stat(DATA_FILE)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _nota(aluno: dict) -> float:
+    """Nota como float (registros da interface podem ter a nota como texto; nan/inf antigos valem 0)."""
+    try:
+        nota = float(aluno.get("nota", 0))
+    except (TypeError, ValueError):
+        return 0.0
+    return nota if math.isfinite(nota) else 0.0
+
+
+def _indexar(aluno: dict, ordenar: bool = True):
+    """
+    Acrescenta um aluno aos índices em memória (chamar com memoria_lock).
+    ordenar=False deixa de fora os índices ordenados (por nota e por nome),
+    montados de uma vez na recarga.
+    """
+    if not isinstance(aluno, dict):
+        return
+    _alunos.append(aluno)
+    turma = str(aluno.get("turma", ""))
+    _por_turma.setdefault(turma, []).append(aluno)
+    id_envio = aluno.get("id_envio")
+    if id_envio:
+        _por_id_envio.setdefault(id_envio, aluno)
+    if ordenar:
+        bisect.insort(_indice_nomes, (normalizar(aluno.get("nome", "")), len(_alunos) - 1))
+    nota = _nota(aluno)
+    _agregados.adicionar(turma, nota)
+    if ordenar:
+        _indice_notas.adicionar(turma, nota, len(_alunos) - 1)
+
+
+def _recarregar_memoria(alunos: list):
+    """Reconstrói a memória a partir de uma lista completa de alunos."""
+    global _alunos, _por_turma, _indice_nomes, _agregados, _por_id_envio, _indice_notas
+    with memoria_lock:
+        _alunos, _por_turma, _indice_nomes, _por_id_envio = [], {}, [], {}
+        _agregados = agregados.AgregadosTurmas()
+        for aluno in alunos:
+            _indexar(aluno, ordenar=False)
+        _indice_notas = IndiceNotasTurmas.de_alunos(
+            (str(a.get("turma", "")), _nota(a), i) for i, a in enumerate(_alunos))
+        _indice_nomes = sorted((normalizar(a.get("nome", "")), i) for i, a in enumerate(_alunos))
+
+
+def _turma_e_nota(alunos: list):
+    return ((str(a.get("turma", "")), _nota(a)) for a in alunos if isinstance(a, dict))
+
+
+def _arquivo_agregados() -> str:
+    return os.path.join(DATA_FOLDER, os.path.basename(agregados.ARQUIVO))
+
+
+def _persistir_agregados(estatisticas, versao) -> None:
+    """Grava data/agregados.json para a versão dada dos dados (se ainda não gravado)."""
+    global _versao_agregados
+    if versao is None or versao == _versao_agregados:
+        return
+    try:
+        agregados.salvar(estatisticas, versao, _arquivo_agregados())
+        _versao_agregados = versao
+    except OSError as e:
+        log_servidor.aviso(f"[WARN] Não foi possível gravar os agregados: {e}", chave="agregados")
+
+
+def configurar(intervalo=None, limite=None, janela_ms=None, lote_max=None,
+               fsync=None, fsync_intervalo_ms=None, armazenamento=None):
+    """Ajusta compactação, group commit, política de fsync e armazenamento (chamar antes de iniciar)."""
+    global INTERVALO_COMPACTACAO, LIMITE_JOURNAL, JANELA_MS, LOTE_MAX, POLITICA_FSYNC, FSYNC_INTERVALO_MS
+    global ARMAZENAMENTO
+    if fsync is not None and fsync not in POLITICAS_FSYNC:
+        raise ValueError(f"Política de fsync inválida: {fsync} (use {', '.join(POLITICAS_FSYNC)})")
+    if armazenamento is not None and armazenamento not in banco.ARMAZENAMENTOS:
+        raise ValueError(f"Armazenamento inválido: {armazenamento} (use {', '.join(banco.ARMAZENAMENTOS)})")
+    if armazenamento is not None:
+        ARMAZENAMENTO = armazenamento
+    if intervalo is not None:
+        INTERVALO_COMPACTACAO = intervalo
+    if limite is not None:
+        LIMITE_JOURNAL = limite
+    if janela_ms is not None:
+        JANELA_MS = janela_ms
+    if lote_max is not None:
+        LOTE_MAX = max(1, int(lote_max))
+    if fsync is not None:
+        POLITICA_FSYNC = fsync
+    if fsync_intervalo_ms is not None:
+        FSYNC_INTERVALO_MS = fsync_intervalo_ms
+
+
+def iniciar(**opcoes):
+    """Recupera o estado do disco e inicia as threads de escrita e de compactação."""
+    global _thread_compactacao, _thread_escrita
+    configurar(**opcoes)
+    ensure_data_folder()
+
+    if ARMAZENAMENTO == "sqlite":
+        _iniciar_banco()
+    else:
+        _iniciar_journal()
+
+    _thread_escrita = threading.Thread(target=_loop_escrita, daemon=True)
+    _thread_escrita.start()
+
+    _parar.clear()
+    _thread_compactacao = threading.Thread(target=_loop_compactacao, daemon=True)
+    _thread_compactacao.start()
+
+
+def _iniciar_banco():
+    global _banco, _ultimo_seq, _versao_banco
+    with journal_lock:
+        _banco = banco.conectar(banco.DB_FILE, "FULL" if POLITICA_FSYNC == "sempre" else "NORMAL")
+        _versao_banco = banco.versao(_banco, "alunos")
+        alunos = banco.ler(_banco, "alunos")
+        _ultimo_seq = banco.maior_seq(_banco)
+        _recarregar_memoria(alunos)
+        _persistir_agregados(_agregados, _versao_banco)
+    if os.path.exists(JOURNAL_FILE) and os.path.getsize(JOURNAL_FILE) > 0:
+        log_servidor.aviso(f"[WARN] {JOURNAL_FILE} não está vazio e não é lido no modo SQLite "
+                           "(importe-o com: python banco.py migrar --substituir).")
+
+
+def _iniciar_journal():
+    global _journal, _ultimo_seq, _pendentes, _assinatura, _agregados_snapshot, _versao_agregados
+    # mesma ordem de travas de compactar(): snapshot, depois journal
+    with arquivos.escrita(DATA_FILE), journal_lock:
+        alunos = read_alunos()
+        novos_ids = garantir_ids(alunos)
+        if novos_ids:
+            # registros de antes dos ids: o id sorteado é gravado uma vez e vale para todos os processos
+            write_alunos_atomic(alunos)
+            log_servidor.info(f"[MIGRAÇÃO] {novos_ids} registro(s) antigo(s) receberam id em {DATA_FILE}.")
+        _assinatura = _assinatura_snapshot()
+        salvos = agregados.carregar(_assinatura, _arquivo_agregados())
+        if salvos is not None:
+            _agregados_snapshot, _versao_agregados = salvos, _assinatura
+        else:
+            _agregados_snapshot = agregados.AgregadosTurmas.de_alunos(_turma_e_nota(alunos))
+            _persistir_agregados(_agregados_snapshot, _assinatura)
+        base_seq = _maior_seq(alunos)
+        # linha cortada por uma queda no meio do write: sai do arquivo antes do
+        # próximo acréscimo, senão o registro seguinte seria colado a ela e perdido
+        for caminho in (JOURNAL_OLD_FILE, JOURNAL_FILE):
+            descartados = arquivos.truncar_linha_incompleta(caminho)
+            if descartados:
+                log_servidor.aviso(f"[RECUPERAÇÃO] Linha incompleta ({descartados} bytes) "
+                                   f"removida do final de {caminho}.")
+        # journal antigo (compactação interrompida) vem antes do atual
+        cauda = _ler_journal(JOURNAL_OLD_FILE) + _ler_journal(JOURNAL_FILE)
+        _pendentes = [r for r in cauda if isinstance(r.get("seq"), int) and r["seq"] > base_seq]
+        _ultimo_seq = max([base_seq] + [r["seq"] for r in _pendentes])
+        _journal = open(JOURNAL_FILE, "a", encoding="utf-8")
+        _recarregar_memoria(alunos + _pendentes)
+
+    if _pendentes:
+        log_servidor.info(f"[RECUPERAÇÃO] {len(_pendentes)} registro(s) reaplicados do journal.")
+        compactar()
+
+
+def destino() -> str:
+    """Arquivo onde as inserções ficam duráveis (para mensagens de log)."""
+    return banco.DB_FILE if ARMAZENAMENTO == "sqlite" else JOURNAL_FILE
+
+
+def usar_remoto(remoto) -> None:
+    """
+    Faz este processo delegar gravações e consultas a outro processo
+    (escritor_remoto.EscritorRemoto). Usado pelos workers; iniciar() não é chamado.
+    """
+    global _remoto
+    _remoto = remoto
+
+
+def enfileirar_lote(registros: list, ao_concluir) -> None:
+    """
+    Enfileira vários registros como um único pedido: todos são gravados na mesma
+    escrita (e no mesmo fsync). Não bloqueia.
+    ao_concluir(registros_com_seq, erro) é chamado pela thread escritora; um
+    registro cujo id_envio já foi gravado volta como o original, com "duplicado".
+    """
+    if _remoto is not None:
+        _remoto.enfileirar_lote(registros, ao_concluir)
+        return
+    _fila.put({"registros": list(registros), "ao_concluir": ao_concluir, "erro": None,
+               "enfileirado": time.perf_counter()})
+
+
+def enfileirar(registro: dict, ao_concluir) -> None:
+    """
+    Enfileira um registro para a thread escritora sem bloquear.
+    ao_concluir(registro_com_seq, erro) é chamado quando o lote for gravado
+    (erro=None) ou falhar.
+    """
+    enfileirar_lote([registro], lambda gravados, erro: ao_concluir(gravados[0], erro))
+
+
+def anexar(registro: dict) -> dict:
+    """
+    Enfileira o registro e espera o seu lote ser gravado.
+    Devolve o registro com seq; levanta a exceção da escrita se ela falhar.
+    """
+    resultado = anexar_grupos([[registro]])[0]
+    if isinstance(resultado, Exception):
+        raise resultado
+    return resultado[0]
+
+
+def anexar_grupos(grupos: list) -> list:
+    """
+    Enfileira vários grupos de registros de uma vez e espera todos. Cada grupo é
+    gravado numa única escrita; grupos diferentes entram no mesmo lote quando possível.
+    Devolve, na mesma ordem, a lista de registros gravados (com seq) ou a exceção da falha.
+    """
+    resultados = [[] for _ in grupos]
+    indices = [i for i, g in enumerate(grupos) if g]
+    if not indices:
+        return resultados
+    pronto = threading.Event()
+    lock = threading.Lock()
+    faltam = [len(indices)]
+
+    def concluir_em(i):
+        def concluir(gravados, erro):
+            resultados[i] = erro if erro is not None else gravados
+            with lock:
+                faltam[0] -= 1
+                if faltam[0] == 0:
+                    pronto.set()
+        return concluir
+
+    for i in indices:
+        enfileirar_lote(grupos[i], concluir_em(i))
+    pronto.wait()
+    return resultados
+
+
+def _fsync_journal():
+    global _sujo, _ultimo_fsync
+    os.fsync(_journal.fileno())
+    _sujo = False
+    _ultimo_fsync = time.monotonic()
+    with lock_lotes:
+        stats_lotes["fsyncs"] += 1
+
+
+def _gravar_lote(lote: list):
+    """
+    Grava todas as linhas do lote com um único write/flush e (conforme a política)
+    um fsync; no SQLite, com um único INSERT numa transação.
+    """
+    global _ultimo_seq, _sujo, _versao_banco
+    inicio = time.perf_counter()
+    for pedido in lote:
+        metricas.registrar("espera_escrita", inicio - pedido["enfileirado"])
+    with journal_lock:
+        novos = []
+        vistos = {}  # id_envio -> registro, para repetições dentro do próprio lote
+        for pedido in lote:
+            gravados = []
+            for registro in pedido["registros"]:
+                id_envio = registro.get("id_envio")
+                original = (vistos.get(id_envio) or _por_id_envio.get(id_envio)) if id_envio else None
+                if original is not None:
+                    gravados.append(dict(original, duplicado=True))
+                    continue
+                _ultimo_seq += 1
+                registro = dict(registro, seq=_ultimo_seq)
+                if not registro.get(CAMPO_ID):
+                    registro[CAMPO_ID] = novo_id()
+                gravados.append(registro)
+                novos.append(registro)
+                if id_envio:
+                    vistos[id_envio] = registro
+            pedido["registros"] = gravados
+        if novos and _banco is not None:
+            banco.inserir(_banco, "alunos", novos)
+            _versao_banco = banco.versao(_banco, "alunos")
+        elif novos:
+            _journal.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in novos))
+            _journal.flush()
+            _sujo = True
+            if POLITICA_FSYNC == "sempre":
+                _fsync_journal()
+            elif POLITICA_FSYNC == "intervalo" and \
+                    (time.monotonic() - _ultimo_fsync) * 1000 >= FSYNC_INTERVALO_MS:
+                _fsync_journal()
+        if novos:
+            metricas.registrar("escrita_fsync", time.perf_counter() - inicio)
+            metricas.incrementar("registros_gravados", len(novos))
+        with memoria_lock:
+            if _banco is None:
+                _pendentes.extend(novos)
+            for registro in novos:
+                _indexar(registro)
+        if _assinantes and novos:
+            _notificar([_evento_insercao(r) for r in novos])
+        cheio = len(_pendentes) >= LIMITE_JOURNAL
+    if cheio:
+        _acordar.set()
+
+    total = len(novos)
+    with lock_lotes:
+        stats_lotes["duplicados"] += sum(len(p["registros"]) for p in lote) - total
+        if not total:
+            return  # lote só com reenvios: nada foi escrito
+        stats_lotes["lotes"] += 1
+        stats_lotes["registros"] += total
+        stats_lotes["maior"] = max(stats_lotes["maior"], total)
+        faixa = _faixa_lote(total)
+        stats_lotes["distribuicao"][faixa] = stats_lotes["distribuicao"].get(faixa, 0) + 1
+
+
+def _faixa_lote(n: int) -> str:
+    """Agrupa tamanhos de lote em potências de 2 (1, 2, 3-4, 5-8, ...)."""
+    limite = 1
+    while limite < n:
+        limite *= 2
+    inicio = limite // 2 + 1 if limite > 1 else 1
+    return str(limite) if inicio == limite else f"{inicio}-{limite}"
+
+
+def _loop_escrita():
+    """Thread escritora única: agrupa pedidos da fila e grava cada grupo de uma vez."""
+    parar = False
+    while not parar:
+        espera = None
+        if POLITICA_FSYNC == "intervalo" and _sujo:
+            espera = FSYNC_INTERVALO_MS / 1000
+        try:
+            primeiro = _fila.get(timeout=espera)
+        except queue.Empty:
+            # fila ociosa: garante o fsync atrasado da política "intervalo"
+            with journal_lock:
+                if _sujo:
+                    _fsync_journal()
+            continue
+        if primeiro is None:
+            break
+
+        lote = [primeiro]
+        total = len(primeiro["registros"])
+        limite = time.monotonic() + JANELA_MS / 1000
+        while total < LOTE_MAX:
+            try:
+                restante = limite - time.monotonic()
+                pedido = _fila.get(timeout=restante) if restante > 0 else _fila.get_nowait()
+            except queue.Empty:
+                break
+            if pedido is None:
+                parar = True
+                break
+            lote.append(pedido)
+            total += len(pedido["registros"])
+
+        try:
+            _gravar_lote(lote)
+        except Exception as e:
+            log_servidor.erro(f"[ERRO JOURNAL] {e}", exc=True)
+            metricas.incrementar("erros_gravacao", sum(len(p["registros"]) for p in lote))
+            for pedido in lote:
+                pedido["erro"] = e
+        for pedido in lote:
+            try:
+                pedido["ao_concluir"](pedido["registros"], pedido["erro"])
+            except Exception as e:
+                log_servidor.erro(f"[ERRO CALLBACK] {e}", exc=True)
+
+    with journal_lock:
+        if _sujo and POLITICA_FSYNC != "nenhum":
+            _fsync_journal()
+
+
+def estatisticas_lotes() -> dict:
+    """Cópia dos contadores do group commit (lotes, registros, média, maior, reenvios, distribuição)."""
+    if _remoto is not None:
+        return _remoto.consultar("estatisticas_lotes")
+    with lock_lotes:
+        copia = dict(stats_lotes, distribuicao=dict(stats_lotes["distribuicao"]))
+    copia["media"] = round(copia["registros"] / copia["lotes"], 2) if copia["lotes"] else 0.0
+    return copia
+
+
+def compactar():
+    """Incorpora o journal ao snapshot (alunos.json) e reinicia o journal."""
+    global _journal, _pendentes, _assinatura, _versao_banco, _agregados_snapshot
+    if _banco is not None:
+        # SQLite: nada a compactar; só percebe gravações feitas pela interface
+        # e grava os agregados da versão atual da tabela
+        with journal_lock:
+            versao = banco.versao(_banco, "alunos")
+            if versao != _versao_banco:
+                _versao_banco = versao
+                _recarregar_memoria(banco.ler(_banco, "alunos"))
+                _notificar([_evento_recarga()])
+            with memoria_lock:
+                _persistir_agregados(_agregados, _versao_banco)
+        return 0
+    # trava exclusiva do snapshot durante todo o ler-acrescentar-gravar: uma gravação
+    # da interface no meio dele seria sobrescrita (e perdida) pelo snapshot novo
+    with compact_lock, arquivos.escrita(DATA_FILE):
+        externo = _assinatura_snapshot() != _assinatura
+        with journal_lock:
+            if not _pendentes and not os.path.exists(JOURNAL_OLD_FILE):
+                if externo:
+                    # snapshot alterado pela interface: memória passa a refletir o arquivo
+                    _assinatura = _assinatura_snapshot()
+                    alunos = read_alunos()
+                    _recarregar_memoria(alunos)
+                    _agregados_snapshot = agregados.AgregadosTurmas.de_alunos(_turma_e_nota(alunos))
+                    _persistir_agregados(_agregados_snapshot, _assinatura)
+                    _notificar([_evento_recarga()])
+                return 0
+            lote = _pendentes
+            _pendentes = []
+            # congela o journal atual; novas inserções seguem num arquivo novo
+            _journal.close()
+            if os.path.exists(JOURNAL_OLD_FILE):
+                # sobra de compactação interrompida: já está contida em 'lote'
+                with open(JOURNAL_OLD_FILE, "a", encoding="utf-8") as antigo, \
+                        open(JOURNAL_FILE, "r", encoding="utf-8") as atual:
+                    antigo.write(atual.read())
+                os.remove(JOURNAL_FILE)
+            else:
+                os.replace(JOURNAL_FILE, JOURNAL_OLD_FILE)
+            _journal = open(JOURNAL_FILE, "a", encoding="utf-8")
+
+        try:
+            alunos = read_alunos()
+            base_seq = _maior_seq(alunos)
+            novos = [r for r in lote if r["seq"] > base_seq]
+            alunos.extend(novos)
+            write_alunos_atomic(alunos)
+            if externo:
+                _agregados_snapshot = agregados.AgregadosTurmas.de_alunos(_turma_e_nota(alunos))
+            else:
+                for registro in novos:
+                    _agregados_snapshot.adicionar(str(registro.get("turma", "")), _nota(registro))
+            os.remove(JOURNAL_OLD_FILE)
+            _assinatura = _assinatura_snapshot()
+            _persistir_agregados(_agregados_snapshot, _assinatura)
+            if externo:
+                with journal_lock:
+                    _recarregar_memoria(alunos + _pendentes)
+                    _notificar([_evento_recarga()])
+        except Exception as e:
+            # devolve o lote; o journal congelado continua no disco para a próxima tentativa
+            with journal_lock:
+                _pendentes = lote + _pendentes
+            log_servidor.erro(f"[ERRO COMPACTAÇÃO] {e}", exc=True)
+            return 0
+        return len(novos)
+
+
+# ---------------------------------------------------------
+# Consultas sobre a memória (sem leitura de disco)
+# ---------------------------------------------------------
+def _publico(aluno: dict) -> dict:
+    return {"nome": aluno.get("nome", ""), "turma": aluno.get("turma", ""), "nota": _nota(aluno)}
+
+
+def total_alunos() -> int:
+    if _remoto is not None:
+        return _remoto.consultar("total_alunos")
+    with memoria_lock:
+        return len(_alunos)
+
+
+def listar_turma(turma: str) -> list:
+    """Alunos da turma, em ordem alfabética."""
+    if _remoto is not None:
+        return _remoto.consultar("listar_turma", turma)
+    with memoria_lock:
+        alunos = [_publico(a) for a in _por_turma.get(turma, [])]
+    return sorted(alunos, key=lambda a: str(a["nome"]).lower())
+
+
+def buscar_prefixo(prefixo: str, limite: int = 100) -> list:
+    """Alunos cujo nome começa com o prefixo (sem diferenciar maiúsculas nem acentos), até 'limite'."""
+    if _remoto is not None:
+        return _remoto.consultar("buscar_prefixo", prefixo, limite)
+    chave = normalizar(prefixo)
+    with memoria_lock:
+        i = bisect.bisect_left(_indice_nomes, (chave, -1))
+        encontrados = []
+        while i < len(_indice_nomes) and len(encontrados) < limite:
+            nome, pos = _indice_nomes[i]
+            if not nome.startswith(chave):
+                break
+            encontrados.append(_publico(_alunos[pos]))
+            i += 1
+    return encontrados
+
+
+def top_notas(n: int, turma: str = None) -> list:
+    """Os n alunos de maior nota (geral ou de uma turma)."""
+    if _remoto is not None:
+        return _remoto.consultar("top_notas", n, turma)
+    with memoria_lock:
+        # fatia do índice por nota: O(log n + k), sem percorrer a turma
+        return [_publico(_alunos[i]) for i in _indice_notas.de(turma or None).top(n)]
+
+
+def resumo_turmas(turma: str = None) -> dict:
+    """quantidade / média / desvio padrão / mínimo / máximo / histograma das notas, por turma."""
+    if _remoto is not None:
+        return _remoto.consultar("resumo_turmas", turma)
+    with memoria_lock:
+        turmas = [turma] if turma else sorted(_agregados.turmas)
+        resultado = {}
+        for t in turmas:
+            r = _agregados.resumo(t)
+            if r is not None:
+                resultado[t] = r
+    return resultado
+
+
+# ---------------------------------------------------------
+# Feed de alterações (SUBSCRIBE)
+# ---------------------------------------------------------
+def _evento_insercao(registro: dict) -> dict:
+    return {"tipo": "inserido", "seq": registro["seq"], "aluno": _publico(registro)}
+
+
+def _evento_recarga() -> dict:
+    return {"tipo": "recarregado", "seq": _ultimo_seq}
+
+
+def _notificar(eventos):
+    """Entrega eventos aos assinantes (chamar com journal_lock; callbacks não podem bloquear)."""
+    for callback in list(_assinantes):
+        try:
+            callback(eventos)
+        except Exception as e:
+            log_servidor.erro(f"[ERRO ASSINANTE] {e}", exc=True)
+
+
+def assinar(ao_receber, desde_seq: int = None):
+    """
+    Registra ao_receber(eventos) para cada lote gravado daqui em diante.
+    Retorna (seq atual, eventos perdidos): com desde_seq, os registros com seq
+    maior que ele (ou um "recarregado", se o servidor não conhece esse seq).
+    ao_receber(None) avisa que o armazenamento foi encerrado.
+    """
+    if _remoto is not None:
+        return _remoto.assinar(ao_receber, desde_seq)
+    with journal_lock:
+        atual = _ultimo_seq
+        if desde_seq is None:
+            perdidos = []
+        elif desde_seq > atual:
+            perdidos = [_evento_recarga()]
+        else:
+            with memoria_lock:
+                perdidos = [_evento_insercao(a) for a in _alunos
+                            if isinstance(a.get("seq"), int) and a["seq"] > desde_seq]
+        _assinantes.append(ao_receber)
+    return atual, perdidos
+
+
+def cancelar_assinatura(ao_receber) -> None:
+    if _remoto is not None:
+        _remoto.cancelar_assinatura(ao_receber)
+        return
+    with journal_lock:
+        if ao_receber in _assinantes:
+            _assinantes.remove(ao_receber)
+
+
+def _loop_compactacao():
+    while not _parar.is_set():
+        _acordar.wait(INTERVALO_COMPACTACAO)
+        _acordar.clear()
+        if _parar.is_set():
+            break
+        compactar()
+
+
+def encerrar():
+    """Esvazia a fila de escrita, para a compactação, compacta o que restou e fecha o journal."""
+    global _journal, _banco
+    if _thread_escrita is not None and _thread_escrita.is_alive():
+        _fila.put(None)
+        _thread_escrita.join()
+    _parar.set()
+    _acordar.set()
+    if _thread_compactacao is not None:
+        _thread_compactacao.join(timeout=INTERVALO_COMPACTACAO + 1)
+    if _banco is not None:
+        with journal_lock:
+            _banco.close()
+            _banco = None
+            _notificar(None)
+            _assinantes.clear()
+        return
+    if _journal is None:
+        return
+    compactar()
+    with journal_lock:
+        _journal.close()
+        _journal = None
+        _notificar(None)
+        _assinantes.clear()
@@ -3,6 +3,8 @@
 // Agora aceita IP do servidor via argumento:
 //   cliente.exe <IP_DO_SERVIDOR> <Nome> <Turma> <Nota>
 // Se o IP não for informado, usa SERVER_IP_PADRAO
+// Compilando com -DPROTOCOLO_BINARIO o registro vai no protocolo binário
+// (protocolo_binario.h) e a resposta é um código de status por registro.
 
 #include <stdio.h>
 #include <stdlib.h>
@@ -13,6 +15,10 @@
 
 #pragma comment(lib, "Ws2_32.lib")
 
+#ifdef PROTOCOLO_BINARIO
+#include "protocolo_binario.h"
+#endif
+
 #define SERVER_IP_PADRAO "127.0.0.1"
 #define SERVER_PORT 5050
 #define CONNECT_TIMEOUT_MS 3000
@@ -59,6 +65,77 @@ int connect_with_timeout(SOCKET s, const struct sockaddr *addr, int addrlen, int
     return 0;
 }
 
+#ifdef PROTOCOLO_BINARIO
+// Recebe exatamente n bytes (ou falha)
+int recv_tudo(SOCKET s, unsigned char *buf, int n) {
+    int lidos = 0;
+    while (lidos < n) {
+        int r = recv(s, (char*)buf + lidos, n - lidos, 0);
+        if (r <= 0)
+            return -1;
+        lidos += r;
+    }
+    return 0;
+}
+
+// Envia saudação + LOTE com um registro + QUIT e monta a mensagem da resposta
+int enviar_binario(SOCKET s, const char *nome, const char *turma, const char *nota_txt,
+                   char *resposta, size_t tam_resposta) {
+    char *fim;
+    double nota = strtod(nota_txt, &fim);
+    if (fim == nota_txt || *fim != '\0') {
+        snprintf(resposta, tam_resposta, "ERR: nota inválida");
+        return -1;
+    }
+
+    unsigned char quadro[1100];
+    const char *nomes[1] = {nome};
+    const char *turmas[1] = {turma};
+    double notas[1] = {nota};
+    size_t pos = pb_codificar_saudacao(quadro);
+    size_t tam_lote = pb_codificar_lote(quadro + pos, sizeof(quadro) - pos - PB_TAMANHO_CABECALHO,
+                                        1, nomes, turmas, notas, 1);
+    if (tam_lote == 0) {
+        snprintf(resposta, tam_resposta, "ERR: dados grandes demais");
+        return -1;
+    }
+    pos += tam_lote;
+    pos += pb_codificar_quit(quadro + pos, 2);
+    send(s, (const char*)quadro, (int)pos, 0);
+
+    unsigned char saudacao[PB_TAMANHO_SAUDACAO];
+    unsigned char cabecalho[PB_TAMANHO_CABECALHO];
+    unsigned char payload[64];
+    int tipo;
+    uint32_t id, tamanho, quantidade;
+    if (recv_tudo(s, saudacao, PB_TAMANHO_SAUDACAO) != 0 ||
+        recv_tudo(s, cabecalho, PB_TAMANHO_CABECALHO) != 0) {
+        snprintf(resposta, tam_resposta, "Nenhuma resposta do servidor.");
+        return -1;
+    }
+    pb_ler_cabecalho(cabecalho, &tipo, &id, &tamanho);
+    if (tamanho == 0 || tamanho > sizeof(payload) || recv_tudo(s, payload, (int)tamanho) != 0) {
+        snprintf(resposta, tam_resposta, "Resposta inválida do servidor.");
+        return -1;
+    }
+    if (tipo == PB_ERRO) {
+        snprintf(resposta, tam_resposta, "ERR: %s", pb_mensagem_status(payload[0]));
+        return -1;
+    }
+    size_t usados = pb_ler_varint(payload, tamanho, &quantidade);
+    if (tipo != PB_RESULTADO || usados == 0 || quantidade != 1 || usados >= tamanho) {
+        snprintf(resposta, tam_resposta, "Resposta inválida do servidor.");
+        return -1;
+    }
+    int status = payload[usados];
+    if (status == PB_STATUS_OK)
+        snprintf(resposta, tam_resposta, "OK");
+    else
+        snprintf(resposta, tam_resposta, "ERR: %s", pb_mensagem_status(status));
+    return status == PB_STATUS_OK ? 0 : -1;
+}
+#endif
+
 int main(int argc, char *argv[]) {
     if (argc < 4) {
         MessageBoxA(NULL,
@@ -126,6 +203,15 @@ int main(int argc, char *argv[]) {
     setsockopt(s, SOL_SOCKET, SO_RCVTIMEO, (char*)&timeout, sizeof(timeout));
     setsockopt(s, SOL_SOCKET, SO_SNDTIMEO, (char*)&timeout, sizeof(timeout));
 
+#ifdef PROTOCOLO_BINARIO
+    char resposta[128];
+    enviar_binario(s, nome, turma, nota, resposta, sizeof(resposta));
+    MessageBoxA(NULL, resposta, "Resposta do Servidor", MB_OK);
+    closesocket(s);
+    WSACleanup();
+    return 0;
+#endif
+
     char dados[512];
     snprintf(dados, sizeof(dados), "%s;%s;%s", nome, turma, nota);
 
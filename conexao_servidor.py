@@ -0,0 +1,596 @@
+# conexao_servidor.py
+"""
+Comunicação da interface com o servidor TCP (servidor.py).
+- ping(): comando PING respondido com PONG pelo servidor, sem tocar no
+  armazenamento e sem poluir o log dele com conexões de teste.
+- Estado de saúde compartilhado (main.py, alunos.py) com cache de TTL_SAUDE
+  segundos; servidor_ativo() nunca bloqueia: devolve o último estado conhecido
+  e, se estiver vencido, atualiza em background.
+- iniciar_monitor() mantém o estado atualizado numa thread daemon.
+- enviar(): envio de registros sem bloquear a interface. Uma fila alimenta
+  threads de envio que reaproveitam conexões persistentes (protocolo v2, pool),
+  mandam vários registros por ida (pipelining), tentam de novo com espera
+  crescente em falhas de rede e avisam cada registro com ao_concluir(ok, resposta).
+  Funciona em qualquer sistema (não depende do cliente.exe).
+  Cada registro leva um id_envio (uuid) gerado aqui: se a conexão cair depois
+  de o servidor gravar e antes do "OK" chegar, a nova tentativa não duplica.
+- enviar_duravel(): caixa de saída persistente (data/envios_pendentes.jsonl,
+  append-only). Todo cadastro é gravado nela antes de qualquer envio; uma thread
+  a esvazia em lotes quando o servidor está no ar, com espera exponencial entre
+  falhas, e marca cada registro como confirmado/rejeitado. Sobrevive a quedas
+  da rede, do servidor e da própria interface (reenvia ao abrir de novo); o id
+  do registro na caixa é o id_envio, então o reenvio nunca duplica no servidor.
+  Gravações e reescritas usam as travas entre processos de arquivos.py, então
+  várias instâncias da interface podem compartilhar o arquivo.
+- assinar(): feed de alterações (SUBSCRIBE) numa thread daemon; cada aluno
+  gravado no servidor chega como evento, sem recarregar a lista inteira.
+  Reconecta sozinho e retoma do último seq recebido.
+"""
+
+import datetime
+import json
+import os
+import queue
+import socket
+import threading
+import time
+import uuid
+
+import arquivos
+import protocolo
+
+HOST = "127.0.0.1"
+PORT = 5050
+
+# Validade (s) do último PING e tempo máximo de espera por um PONG
+TTL_SAUDE = 5.0
+TIMEOUT_PING = 0.8
+# Intervalo (s) entre PINGs do monitor em background
+INTERVALO_MONITOR = 3.0
+
+# Envio: conexões mantidas abertas, timeout por operação, tentativas e espera
+# inicial entre elas (dobra a cada falha), registros por ida ao servidor e
+# tempo máximo que uma conexão pode ficar parada no pool
+TAMANHO_POOL = 2
+TIMEOUT_ENVIO = 5.0
+TENTATIVAS_ENVIO = 3
+ESPERA_TENTATIVA = 0.5
+LOTE_ENVIO = 100
+OCIOSA_MAX = 60.0
+
+# Caixa de saída: arquivo, espera entre tentativas (dobra a cada falha, até o
+# máximo) e quantas marcas de confirmação acumular antes de reescrever o arquivo
+CAIXA_SAIDA_FILE = os.path.join("data", "envios_pendentes.jsonl")
+ESPERA_REENVIO = 1.0
+ESPERA_MAX_REENVIO = 60.0
+LIMITE_MARCAS_CAIXA = 1000
+
+_lock = threading.Lock()
+_estado = {"ativo": False, "verificado_em": None, "latencia_ms": None}
+_atualizando = False
+_thread_monitor = None
+
+_fila_envio = queue.Queue()
+_lock_pool = threading.Lock()
+_conexoes_livres = []    # (socket, leitor, devolvida_em)
+_enviadores = []
+
+_lock_caixa = threading.Lock()
+_caixa = {}              # id -> registro ainda não confirmado (ordem de criação)
+_callbacks_caixa = {}    # id -> ao_concluir (só nesta execução)
+_marcas_caixa = 0        # linhas de confirmação/rejeição no arquivo
+_thread_caixa = None
+_acordar_caixa = threading.Event()
+
+
+def ping(host: str = None, port: int = None, timeout: float = TIMEOUT_PING):
+    """
+    Envia PING e espera a resposta. Retorna a latência em segundos ou None se o
+    servidor não respondeu. Servidores antigos respondem com erro de formato,
+    o que também indica servidor no ar.
+    """
+    inicio = time.perf_counter()
+    try:
+        with socket.create_connection((host or HOST, port or PORT), timeout=timeout) as s:
+            s.sendall(b"PING")
+            if not s.recv(64):
+                return None
+    except OSError:
+        return None
+    return time.perf_counter() - inicio
+
+
+def _registrar(latencia):
+    with _lock:
+        voltou = latencia is not None and not _estado["ativo"]
+        _estado["ativo"] = latencia is not None
+        _estado["verificado_em"] = time.monotonic()
+        _estado["latencia_ms"] = round(latencia * 1000, 2) if latencia is not None else None
+        ativo = _estado["ativo"]
+    if voltou:
+        # servidor voltou: a caixa de saída não espera o fim da espera exponencial
+        _acordar_caixa.set()
+    return ativo
+
+
+def _vencido() -> bool:
+    verificado = _estado["verificado_em"]
+    return verificado is None or time.monotonic() - verificado >= TTL_SAUDE
+
+
+def verificar(forcar: bool = False) -> bool:
+    """Estado do servidor; faz um PING (bloqueante) se o cache venceu ou se forcar=True."""
+    with _lock:
+        if not forcar and not _vencido():
+            return _estado["ativo"]
+    return _registrar(ping())
+
+
+def _atualizar_em_background():
+    global _atualizando
+    with _lock:
+        if _atualizando:
+            return
+        _atualizando = True
+
+    def atualizar():
+        global _atualizando
+        try:
+            _registrar(ping())
+        finally:
+            with _lock:
+                _atualizando = False
+
+    threading.Thread(target=atualizar, daemon=True).start()
+
+
+def servidor_ativo() -> bool:
+    """Último estado conhecido, sem bloquear; cache vencido é renovado em background."""
+    with _lock:
+        ativo = _estado["ativo"]
+        vencido = _vencido()
+    if vencido:
+        _atualizar_em_background()
+    return ativo
+
+
+def estado() -> dict:
+    """Cópia do estado: ativo, latencia_ms e idade (s) da última verificação."""
+    with _lock:
+        copia = dict(_estado)
+    verificado = copia.pop("verificado_em")
+    copia["idade_s"] = round(time.monotonic() - verificado, 1) if verificado is not None else None
+    return copia
+
+
+def _loop_monitor():
+    while True:
+        _registrar(ping())
+        time.sleep(INTERVALO_MONITOR)
+
+
+def iniciar_monitor():
+    """Mantém o estado de saúde atualizado em background (uma thread por processo)."""
+    global _thread_monitor
+    with _lock:
+        if _thread_monitor is not None:
+            return
+        _thread_monitor = threading.Thread(target=_loop_monitor, daemon=True)
+    _thread_monitor.start()
+
+
+# ---------------------------------------------------------
+# Pool de conexões persistentes (protocolo v2)
+# ---------------------------------------------------------
+def _fechar(conn, leitor):
+    try:
+        leitor.close()
+        conn.close()
+    except OSError:
+        pass
+
+
+def _abrir_conexao():
+    conn = socket.create_connection((HOST, PORT), timeout=TIMEOUT_ENVIO)
+    leitor = conn.makefile("rb")
+    try:
+        conn.sendall(protocolo.formatar_hello())
+        if not leitor.readline().startswith(b"HELLO"):
+            raise ConnectionError("servidor não aceitou o protocolo v2")
+    except OSError:
+        _fechar(conn, leitor)
+        raise
+    return conn, leitor
+
+
+def _pegar_conexao():
+    agora = time.monotonic()
+    velhas = []
+    with _lock_pool:
+        while _conexoes_livres:
+            conn, leitor, devolvida_em = _conexoes_livres.pop()
+            if agora - devolvida_em < OCIOSA_MAX:
+                break
+            velhas.append((conn, leitor))
+        else:
+            conn = None
+    for velha in velhas:
+        _fechar(*velha)
+    return (conn, leitor) if conn is not None else _abrir_conexao()
+
+
+def _devolver_conexao(conn, leitor):
+    with _lock_pool:
+        if len(_conexoes_livres) < TAMANHO_POOL:
+            _conexoes_livres.append((conn, leitor, time.monotonic()))
+            return
+    _fechar(conn, leitor)
+
+
+def _enviar_linhas(linhas: list, respostas: list):
+    """
+    Envia as linhas numa conexão do pool e acrescenta as respostas em 'respostas',
+    na ordem. Em falha de rede a conexão é descartada e a exceção sobe; as
+    respostas já lidas ficam em 'respostas'.
+    """
+    conn, leitor = _pegar_conexao()
+    try:
+        conn.sendall(b"".join(linhas))
+        for _ in linhas:
+            linha = leitor.readline()
+            if not linha:
+                raise ConnectionError("conexão fechada pelo servidor")
+            respostas.append(linha.decode("utf-8", errors="replace").strip())
+    except OSError:
+        _fechar(conn, leitor)
+        raise
+    _devolver_conexao(conn, leitor)
+
+
+# ---------------------------------------------------------
+# Fila de envio
+# ---------------------------------------------------------
+def _concluir(pedido: dict, ok: bool, resposta: str):
+    if pedido["ao_concluir"] is None:
+        return
+    try:
+        pedido["ao_concluir"](ok, resposta)
+    except Exception as e:
+        print(f"[ERRO] Callback de envio falhou: {e}")
+
+
+def _loop_envio():
+    while True:
+        pedidos = [_fila_envio.get()]
+        while len(pedidos) < LOTE_ENVIO:
+            try:
+                pedidos.append(_fila_envio.get_nowait())
+            except queue.Empty:
+                break
+
+        linhas = [p["linha"] for p in pedidos]
+        respostas = []
+        erro = None
+        espera = ESPERA_TENTATIVA
+        for tentativa in range(1, TENTATIVAS_ENVIO + 1):
+            inicio = time.perf_counter()
+            try:
+                # só reenvia o que ainda não foi confirmado
+                _enviar_linhas(linhas[len(respostas):], respostas)
+                erro = None
+                break
+            except OSError as e:
+                erro = e
+                if tentativa < TENTATIVAS_ENVIO:
+                    time.sleep(espera)
+                    espera *= 2
+        _registrar(None if erro else time.perf_counter() - inicio)
+
+        for i, pedido in enumerate(pedidos):
+            if i < len(respostas):
+                _concluir(pedido, respostas[i] == "OK", respostas[i])
+            else:
+                _concluir(pedido, False, f"ERR: servidor indisponível ({erro})")
+
+
+def _iniciar_enviadores():
+    with _lock_pool:
+        if _enviadores:
+            return
+        for _ in range(TAMANHO_POOL):
+            thread = threading.Thread(target=_loop_envio, daemon=True)
+            _enviadores.append(thread)
+            thread.start()
+
+
+def enviar(nome: str, turma: str, nota, ao_concluir=None) -> None:
+    """
+    Enfileira um registro para o servidor e retorna na hora.
+    ao_concluir(ok, resposta) é chamado numa thread de envio quando o servidor
+    confirmar ("OK"), recusar ("ERR: ...") ou esgotar as tentativas; na interface,
+    use app.after() para mexer em widgets.
+    Levanta ValueError se nome/turma tiverem ';' ou quebra de linha.
+    """
+    linha = protocolo.formatar_registro(nome, turma, nota, uuid.uuid4().hex)
+    _iniciar_enviadores()
+    _fila_envio.put({"linha": linha, "ao_concluir": ao_concluir})
+
+
+def enviar_e_esperar(nome: str, turma: str, nota, timeout: float = None):
+    """Versão bloqueante de enviar(): retorna (ok, resposta)."""
+    pronto = threading.Event()
+    caixa = []
+
+    def concluir(ok, resposta):
+        caixa.append((ok, resposta))
+        pronto.set()
+
+    enviar(nome, turma, nota, concluir)
+    if not pronto.wait(timeout):
+        return False, "ERR: tempo esgotado esperando o servidor"
+    return caixa[0]
+
+
+def pendentes_envio() -> int:
+    """Registros ainda na fila de envio."""
+    return _fila_envio.qsize()
+
+
+# ---------------------------------------------------------
+# Caixa de saída persistente
+# ---------------------------------------------------------
+def _gravar_caixa(linhas: list):
+    """
+    Acrescenta linhas JSON ao arquivo da caixa de saída, com fsync, sob a trava de
+    escrita (outras instâncias da interface podem usar o mesmo arquivo). Abre o
+    arquivo a cada gravação: depois de uma reescrita (por esta ou outra instância)
+    um descritor antigo apontaria para o arquivo substituído.
+    """
+    os.makedirs(os.path.dirname(CAIXA_SAIDA_FILE), exist_ok=True)
+    with arquivos.escrita(CAIXA_SAIDA_FILE):
+        descartados = arquivos.truncar_linha_incompleta(CAIXA_SAIDA_FILE)
+        if descartados:
+            print(f"[CAIXA DE SAÍDA] Linha incompleta ({descartados} bytes) removida do final do arquivo.")
+        with open(CAIXA_SAIDA_FILE, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(l, ensure_ascii=False) + "\n" for l in linhas))
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def _ler_caixa() -> tuple:
+    """(pendentes {id: registro}, linhas de marca) do arquivo, com a trava de leitura."""
+    pendentes = {}
+    marcas = 0
+    invalidas = 0
+    if not os.path.exists(CAIXA_SAIDA_FILE):
+        return pendentes, marcas
+    with arquivos.leitura(CAIXA_SAIDA_FILE), open(CAIXA_SAIDA_FILE, "r", encoding="utf-8") as f:
+        for linha in f:
+            if not linha.strip():
+                continue
+            try:
+                item = json.loads(linha)
+            except json.JSONDecodeError:
+                invalidas += 1  # linha incompleta de uma gravação interrompida
+                continue
+            if item.get("tipo") == "registro":
+                registro = {k: v for k, v in item.items() if k != "tipo"}
+                pendentes[registro["id"]] = registro
+            else:
+                pendentes.pop(item.get("id"), None)
+                marcas += 1
+    if invalidas:
+        print(f"[CAIXA DE SAÍDA] {invalidas} linha(s) inválida(s) ignorada(s) em {CAIXA_SAIDA_FILE}.")
+    return pendentes, marcas
+
+
+def _reescrever_caixa(resolvidos=()):
+    """
+    Reescreve o arquivo só com os pendentes (escrita atômica). Relê o arquivo: os
+    pendentes de outras instâncias continuam nele, só saem os registros com marca
+    de confirmação/rejeição e os ids em 'resolvidos' (respondidos agora, cujas
+    marcas não chegam a ser acrescentadas). A leitura e o temporário com fsync
+    ficam fora da trava de escrita, que só cobre a troca de nome; se alguém
+    acrescentou ao arquivo nesse meio tempo, monta de novo.
+    """
+    while True:
+        lido = arquivos.assinatura(CAIXA_SAIDA_FILE)
+        pendentes, _ = _ler_caixa()
+        for id_registro in resolvidos:
+            pendentes.pop(id_registro, None)
+        texto = "".join(json.dumps(dict(registro, tipo="registro"), ensure_ascii=False) + "\n"
+                        for registro in pendentes.values())
+        if arquivos.substituir_se_inalterado(CAIXA_SAIDA_FILE, texto, lido):
+            return
+
+
+def _carregar_caixa():
+    """Lê a caixa de saída: registros sem confirmação/rejeição continuam pendentes."""
+    global _marcas_caixa
+    pendentes, marcas = _ler_caixa()
+    _caixa.update(pendentes)
+    _marcas_caixa += marcas
+
+
+def _linha_caixa(registro: dict) -> bytes:
+    return protocolo.formatar_registro(registro["nome"], registro["turma"], registro["nota"], registro["id"])
+
+
+def _concluir_caixa(lote: list, respostas: list):
+    """
+    Marca no arquivo os registros respondidos (OK = confirmado, ERR = rejeitado).
+    _lock_caixa só cobre a caixa em memória: a gravação no arquivo acontece
+    depois, sem bloquear enviar_duravel() (a interface) durante o fsync.
+    """
+    global _marcas_caixa
+    marcas = []
+    concluidos = []
+    with _lock_caixa:
+        for registro, resposta in zip(lote, respostas):
+            if _caixa.pop(registro["id"], None) is None:
+                continue
+            if resposta == "OK":
+                marcas.append({"tipo": "confirmado", "id": registro["id"]})
+            else:
+                marcas.append({"tipo": "rejeitado", "id": registro["id"], "motivo": resposta})
+            concluidos.append((_callbacks_caixa.pop(registro["id"], None), resposta))
+        _marcas_caixa += len(marcas)
+        reescrever = bool(marcas) and (not _caixa or _marcas_caixa >= LIMITE_MARCAS_CAIXA)
+        if reescrever:
+            _marcas_caixa = 0
+    # um registro gravado por enviar_duravel() enquanto isso já está no arquivo
+    # (é gravado antes de entrar na caixa) ou entra depois da troca (trava de escrita)
+    if reescrever:
+        _reescrever_caixa([m["id"] for m in marcas])
+    elif marcas:
+        _gravar_caixa(marcas)
+    for callback, resposta in concluidos:
+        _concluir({"ao_concluir": callback}, resposta == "OK", resposta)
+
+
+def _loop_caixa_saida():
+    espera = None
+    while True:
+        _acordar_caixa.wait(espera)
+        _acordar_caixa.clear()
+        with _lock_caixa:
+            lote = list(_caixa.values())[:LOTE_ENVIO]
+        if not lote:
+            espera = None  # dorme até o próximo enviar_duravel()
+            continue
+
+        respostas = []
+        inicio = time.perf_counter()
+        try:
+            _enviar_linhas([_linha_caixa(r) for r in lote], respostas)
+            falhou = False
+        except OSError:
+            falhou = True
+        _concluir_caixa(lote, respostas)
+        _registrar(None if falhou else time.perf_counter() - inicio)
+
+        if falhou:
+            espera = min(espera * 2, ESPERA_MAX_REENVIO) if espera else ESPERA_REENVIO
+        else:
+            espera = 0  # ainda pode haver pendentes: segue sem esperar
+
+
+def iniciar_caixa_saida():
+    """Carrega a caixa de saída e inicia o reenvio em background (idempotente)."""
+    global _thread_caixa
+    with _lock_caixa:
+        if _thread_caixa is not None:
+            return
+        _carregar_caixa()
+        _thread_caixa = threading.Thread(target=_loop_caixa_saida, daemon=True)
+        _thread_caixa.start()
+    if _caixa:
+        print(f"[CAIXA DE SAÍDA] {len(_caixa)} registro(s) pendente(s) serão reenviados ao servidor.")
+        _acordar_caixa.set()
+
+
+def enviar_duravel(nome: str, turma: str, nota, ao_concluir=None) -> str:
+    """
+    Grava o registro na caixa de saída (durável) e retorna o id na hora; o envio
+    acontece em background, agora ou quando o servidor voltar.
+    ao_concluir(ok, resposta) é chamado quando o servidor confirmar ou recusar
+    (falhas de rede não chamam: o registro continua pendente).
+    Levanta ValueError se nome/turma tiverem ';' ou quebra de linha.
+    """
+    protocolo.formatar_registro(nome, turma, nota)  # valida antes de gravar
+    iniciar_caixa_saida()
+    registro = {"id": uuid.uuid4().hex, "nome": nome, "turma": turma, "nota": nota,
+                "criado_em": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+    with _lock_caixa:
+        _gravar_caixa([dict(registro, tipo="registro")])
+        _caixa[registro["id"]] = registro
+        if ao_concluir is not None:
+            _callbacks_caixa[registro["id"]] = ao_concluir
+    _acordar_caixa.set()
+    return registro["id"]
+
+
+def pendentes_caixa_saida() -> int:
+    """Registros gravados na caixa de saída e ainda não confirmados pelo servidor."""
+    with _lock_caixa:
+        return len(_caixa)
+
+
+# ---------------------------------------------------------
+# Feed de alterações (SUBSCRIBE)
+# ---------------------------------------------------------
+class Assinatura:
+    """
+    Conexão SUBSCRIBE mantida numa thread daemon. ao_evento(evento) recebe
+    {"tipo": "inserido", "seq", "aluno"} ou {"tipo": "recarregado", "seq"}
+    (recarregue tudo) numa thread de fundo: na interface, use after().
+    Quedas reconectam com espera exponencial (ESPERA_REENVIO..ESPERA_MAX_REENVIO),
+    retomando do último seq, sem perder nem repetir eventos.
+    """
+
+    def __init__(self, ao_evento, desde_seq: int = None):
+        self.ao_evento = ao_evento
+        self.ultimo_seq = desde_seq
+        self._parar = threading.Event()
+        self._conn = None
+        self._aceita = False
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def cancelar(self):
+        self._parar.set()
+        conn = self._conn
+        if conn is not None:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _loop(self):
+        espera = ESPERA_REENVIO
+        while not self._parar.is_set():
+            self._aceita = False
+            try:
+                self._ler_eventos()
+            except (OSError, ValueError):
+                pass  # queda, servidor fora do ar ou "ERR: assinante atrasado"
+            if self._aceita:
+                espera = ESPERA_REENVIO
+            if self._parar.wait(espera):
+                break
+            espera = min(espera * 2, ESPERA_MAX_REENVIO)
+
+    def _ler_eventos(self):
+        """Uma conexão SUBSCRIBE até cair (self._aceita = o servidor respondeu ao SUBSCRIBE)."""
+        conn = socket.create_connection((HOST, PORT), timeout=TIMEOUT_ENVIO)
+        conn.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        leitor = conn.makefile("rb")
+        self._conn = conn
+        try:
+            comando = "SUBSCRIBE" if self.ultimo_seq is None else f"SUBSCRIBE {self.ultimo_seq}"
+            conn.sendall(protocolo.formatar_hello() + f"{comando}\n".encode("utf-8"))
+            if not leitor.readline().startswith(b"HELLO"):
+                raise ConnectionError("servidor não aceitou o protocolo v2")
+            conn.settimeout(None)  # eventos podem demorar; SO_KEEPALIVE detecta quedas
+            for linha in leitor:
+                evento = protocolo.ler_evento(linha.decode("utf-8", errors="replace").strip())
+                self._aceita = True
+                if evento["tipo"] == "assinado":
+                    if self.ultimo_seq is None:
+                        self.ultimo_seq = evento["seq"]
+                    continue
+                self.ultimo_seq = evento["seq"]
+                try:
+                    self.ao_evento(evento)
+                except Exception as e:
+                    print(f"[ERRO] Callback do feed falhou: {e}")
+        finally:
+            self._conn = None
+            _fechar(conn, leitor)
+
+
+def assinar(ao_evento, desde_seq: int = None) -> Assinatura:
+    """
+    Começa a receber os alunos gravados no servidor (a partir de agora, ou de
+    desde_seq). Devolve a Assinatura; chame cancelar() ao fechar a tela.
+    """
+    return Assinatura(ao_evento, desde_seq)
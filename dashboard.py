@@ -3,12 +3,25 @@
 
 import customtkinter as ctk
 
+import conexao_servidor
 from alunos import adicionar_aluno, buscar_aluno, ordenar_alunos_por_nota, gerar_relatorio
 from turmas import adicionar_turma
 from aulas import abrir_aulas
 from atividades import abrir_atividades
 from assistente_ia import abrir_assistente
 
+# Intervalo (ms) entre atualizações do aviso de envios pendentes no rodapé
+INTERVALO_STATUS_ENVIO = 2000
+
+
+def _atualizar_status_envio(app, rotulo):
+    """Rodapé: cadastros da caixa de saída ainda não confirmados pelo servidor (sem janela)."""
+    if not rotulo.winfo_exists():
+        return  # painel fechado
+    pendentes = conexao_servidor.pendentes_caixa_saida()
+    rotulo.configure(text=f"{pendentes} cadastro(s) pendente(s) de envio" if pendentes else "")
+    app.after(INTERVALO_STATUS_ENVIO, lambda: _atualizar_status_envio(app, rotulo))
+
 
 def abrir_dashboard(app, usuario):
     """
@@ -87,6 +100,10 @@ def abrir_dashboard(app, usuario):
     footer = ctk.CTkFrame(app, height=60)
     footer.pack(fill="x", side="bottom")
 
+    status_envio = ctk.CTkLabel(footer, text="", font=ctk.CTkFont(size=12))
+    status_envio.pack(side="left", padx=20)
+    _atualizar_status_envio(app, status_envio)
+
     ctk.CTkButton(
         footer,
         text="Sair",
@@ -0,0 +1,234 @@
+# escritor_remoto.py
+"""
+Armazenamento compartilhado entre processos (servidor.py --workers N).
+- O processo principal é o único escritor: mantém o journal, o group commit,
+  a compactação e o conjunto em memória (central.py).
+- Cada worker fala com ele por um pipe (multiprocessing.Pipe): pedidos de
+  gravação e consultas levam um id e as respostas voltam fora de ordem.
+- O "OK" do worker continua saindo só depois que o lote está durável no escritor.
+- As respostas ao worker saem por uma thread de envio própria (fila): as
+  callbacks rodam na thread escritora do central (com o journal travado) e só
+  enfileiram; um worker lento, com o pipe cheio, não para o group commit.
+
+- Feed de alterações (SUBSCRIBE): o worker assina no escritor e recebe os
+  eventos pelo mesmo pipe, marcados com o id da assinatura.
+
+Mensagens:
+    worker -> escritor: ("gravar", id, registros) | ("consultar", id, nome, argumentos)
+                        ("assinar", id, desde_seq) | ("cancelar", id)
+    escritor -> worker: (id, resultado)     resultado = lista/valor ou a exceção
+                        ("evento", id, eventos)   eventos da assinatura id (None = fim)
+"""
+
+import queue
+import threading
+
+import central
+import log_servidor
+
+# Consultas do central que os workers podem pedir ao escritor
+CONSULTAS = ("total_alunos", "listar_turma", "buscar_prefixo", "top_notas",
+             "resumo_turmas", "estatisticas_lotes")
+
+
+def atender(conexao, nome: str = "worker"):
+    """Processo escritor: atende os pedidos de um worker até o pipe fechar."""
+    fila_envio = queue.Queue()  # mensagens para o worker; None encerra o envio
+    assinaturas = {}  # id -> callback registrado no central
+
+    def loop_envio():
+        while True:
+            mensagem = fila_envio.get()
+            if mensagem is None:
+                break
+            try:
+                conexao.send(mensagem)
+            except (OSError, ValueError):
+                pass  # worker já saiu; o registro continua gravado
+
+    envio = threading.Thread(target=loop_envio, name=f"envio-{nome}", daemon=True)
+    envio.start()
+
+    def enviar(mensagem):
+        # chamada também da thread escritora do central: nunca bloqueia
+        fila_envio.put(mensagem)
+
+    def responder(pedido_id, resultado):
+        enviar((pedido_id, resultado))
+
+    while True:
+        try:
+            tipo, pedido_id, *argumentos = conexao.recv()
+        except (EOFError, OSError):
+            break
+        if tipo == "gravar":
+            central.enfileirar_lote(
+                argumentos[0],
+                lambda gravados, erro, i=pedido_id: responder(i, erro if erro is not None else gravados))
+        elif tipo == "consultar":
+            consulta, args = argumentos
+            try:
+                if consulta not in CONSULTAS:
+                    raise ValueError(f"consulta desconhecida: {consulta}")
+                resultado = getattr(central, consulta)(*args)
+            except Exception as e:
+                resultado = e
+            responder(pedido_id, resultado)
+        elif tipo == "assinar":
+            def repassar(eventos, i=pedido_id):
+                enviar(("evento", i, eventos))
+            try:
+                resultado = central.assinar(repassar, argumentos[0])
+                assinaturas[pedido_id] = repassar
+            except Exception as e:
+                resultado = e
+            responder(pedido_id, resultado)
+        elif tipo == "cancelar":
+            callback = assinaturas.pop(pedido_id, None)
+            if callback is not None:
+                central.cancelar_assinatura(callback)
+        else:
+            log_servidor.aviso(f"[ESCRITOR] Pedido desconhecido de {nome}: {tipo}", chave="escritor_pedido")
+    for callback in assinaturas.values():
+        central.cancelar_assinatura(callback)
+    # respostas de lotes ainda no group commit ficam na fila: o worker já saiu
+    fila_envio.put(None)
+    envio.join()
+    conexao.close()
+
+
+class EscritorRemoto:
+    """
+    Lado do worker: substitui a fila local do central (central.usar_remoto).
+    enfileirar_lote() não bloqueia; consultar() espera a resposta do escritor.
+    """
+
+    def __init__(self, conexao):
+        self._conexao = conexao
+        # envio e tabela de pendentes têm locks separados: a thread de respostas
+        # nunca espera por um envio travado no pipe
+        self._lock_envio = threading.Lock()
+        self._lock_pendentes = threading.Lock()
+        self._pendentes = {}     # id -> callback(resultado)
+        self._assinaturas = {}   # id -> {"callback", "ativa", "recebidos"}
+        self._proximo = 0
+        self._fechado = False
+        threading.Thread(target=self._loop_respostas, daemon=True).start()
+
+    def _enviar(self, callback, tipo: str, *argumentos, assinatura: dict = None) -> int:
+        with self._lock_pendentes:
+            if self._fechado:
+                raise ConnectionError("processo escritor indisponível")
+            self._proximo += 1
+            pedido_id = self._proximo
+            self._pendentes[pedido_id] = callback
+            if assinatura is not None:
+                self._assinaturas[pedido_id] = assinatura
+        try:
+            with self._lock_envio:
+                self._conexao.send((tipo, pedido_id) + argumentos)
+        except (OSError, ValueError) as e:
+            with self._lock_pendentes:
+                self._pendentes.pop(pedido_id, None)
+                self._assinaturas.pop(pedido_id, None)
+            raise ConnectionError("processo escritor indisponível") from e
+        return pedido_id
+
+    def enfileirar_lote(self, registros: list, ao_concluir) -> None:
+        def concluir(resultado):
+            if isinstance(resultado, Exception):
+                ao_concluir(registros, resultado)
+            else:
+                ao_concluir(resultado, None)
+
+        try:
+            self._enviar(concluir, "gravar", list(registros))
+        except ConnectionError as e:
+            ao_concluir(registros, e)
+
+    def consultar(self, consulta: str, *args):
+        pronto = threading.Event()
+        caixa = []
+
+        def receber(resultado):
+            caixa.append(resultado)
+            pronto.set()
+
+        self._enviar(receber, "consultar", consulta, args)
+        pronto.wait()
+        if isinstance(caixa[0], Exception):
+            raise caixa[0]
+        return caixa[0]
+
+    def assinar(self, ao_receber, desde_seq: int = None):
+        """Como central.assinar(): os eventos chegam do escritor pelo pipe."""
+        # eventos que chegam antes da resposta ficam guardados até ela
+        assinatura = {"callback": ao_receber, "ativa": False, "recebidos": []}
+        pronto = threading.Event()
+        caixa = []
+
+        def receber(resultado):
+            if not isinstance(resultado, Exception):
+                # thread de respostas: entrega os guardados antes de liberar quem assinou
+                assinatura["ativa"] = True
+                for eventos in assinatura["recebidos"]:
+                    ao_receber(eventos)
+                assinatura["recebidos"] = []
+            caixa.append(resultado)
+            pronto.set()
+
+        pedido_id = self._enviar(receber, "assinar", desde_seq, assinatura=assinatura)
+        pronto.wait()
+        if isinstance(caixa[0], Exception):
+            with self._lock_pendentes:
+                self._assinaturas.pop(pedido_id, None)
+            raise caixa[0]
+        return caixa[0]
+
+    def cancelar_assinatura(self, ao_receber) -> None:
+        with self._lock_pendentes:
+            ids = [i for i, a in self._assinaturas.items() if a["callback"] is ao_receber]
+            for i in ids:
+                del self._assinaturas[i]
+        for i in ids:
+            try:
+                with self._lock_envio:
+                    self._conexao.send(("cancelar", i))
+            except (OSError, ValueError):
+                pass
+
+    def _entregar_eventos(self, assinatura_id: int, eventos):
+        with self._lock_pendentes:
+            assinatura = self._assinaturas.get(assinatura_id)
+        if assinatura is None:
+            return
+        if assinatura["ativa"]:
+            assinatura["callback"](eventos)
+        else:
+            assinatura["recebidos"].append(eventos)
+
+    def _loop_respostas(self):
+        while True:
+            try:
+                mensagem = self._conexao.recv()
+            except (EOFError, OSError):
+                break
+            if len(mensagem) == 3:
+                self._entregar_eventos(mensagem[1], mensagem[2])
+                continue
+            pedido_id, resultado = mensagem
+            with self._lock_pendentes:
+                callback = self._pendentes.pop(pedido_id, None)
+            if callback is not None:
+                callback(resultado)
+        # escritor encerrado: falha o que ainda esperava resposta e encerra as assinaturas
+        with self._lock_pendentes:
+            self._fechado = True
+            pendentes, self._pendentes = self._pendentes, {}
+            assinaturas, self._assinaturas = self._assinaturas, {}
+        erro = ConnectionError("processo escritor encerrado")
+        for callback in pendentes.values():
+            callback(erro)
+        for assinatura in assinaturas.values():
+            if assinatura["ativa"]:
+                assinatura["callback"](None)
@@ -0,0 +1,174 @@
+# indice_aulas.py
+"""
+Índice invertido do conteúdo das aulas, para o filtro de texto de Gerenciar Aulas.
+- Tokens: palavras do conteúdo sem acentos e em minúsculas (indice_nomes.normalizar),
+  calculadas uma vez por aula.
+- Por turma: termo -> {aula: frequência}, vocabulário ordenado (para prefixos) e
+  quantidade de aulas. adicionar()/remover() mexem só nos termos daquela aula, então
+  salvar, editar e excluir não remontam o índice.
+- buscar("frações decimais"): todas as palavras precisam aparecer na aula; a última
+  vale também como prefixo (busca ao vivo enquanto se digita). Resultado ordenado
+  por relevância (tf-idf: palavras raras e repetidas na aula pesam mais).
+- trechos(): divide um texto em partes destacadas/não destacadas para exibir os
+  termos encontrados.
+
+As aulas são identificadas pelo próprio objeto do registro (o dict carregado).
+"""
+
+import bisect
+import math
+import re
+
+from indice_nomes import normalizar
+
+_PALAVRA = re.compile(r"\w+")
+
+
+def tokens(texto: str) -> list:
+    """Palavras normalizadas do texto, na ordem em que aparecem."""
+    return _PALAVRA.findall(normalizar(texto))
+
+
+def trechos(texto: str, termos) -> list:
+    """[(parte, destacada)] cobrindo o texto inteiro; destaca as palavras cuja forma normalizada está em termos."""
+    partes = []
+    inicio = 0
+    for m in _PALAVRA.finditer(texto):
+        if normalizar(m.group()) in termos:
+            partes.append((texto[inicio:m.start()], False))
+            partes.append((m.group(), True))
+            inicio = m.end()
+    partes.append((texto[inicio:], False))
+    return [p for p in partes if p[0]]
+
+
+class _IndiceTurma:
+    __slots__ = ("postings", "vocabulario", "aulas")
+
+    def __init__(self):
+        self.postings = {}      # termo -> {doc: frequência}
+        self.vocabulario = []   # termos, ordenados
+        self.aulas = 0
+
+    def com_prefixo(self, prefixo: str) -> list:
+        i = bisect.bisect_left(self.vocabulario, prefixo)
+        termos = []
+        while i < len(self.vocabulario) and self.vocabulario[i].startswith(prefixo):
+            termos.append(self.vocabulario[i])
+            i += 1
+        return termos
+
+
+class IndiceAulas:
+    __slots__ = ("_turmas", "_docs", "_doc_de", "_termos", "_proximo")
+
+    def __init__(self):
+        self._turmas = {}    # turma -> _IndiceTurma
+        self._docs = {}      # doc -> aula (dict do registro)
+        self._doc_de = {}    # id(aula) -> doc (o índice guarda a aula, então o id não é reutilizado)
+        self._termos = {}    # doc -> (turma, {termo: frequência})
+        self._proximo = 0    # docs crescem na ordem de cadastro (desempate do ranking)
+
+    @classmethod
+    def de_aulas(cls, aulas) -> "IndiceAulas":
+        indice = cls()
+        for aula in aulas:
+            if isinstance(aula, dict):
+                indice.adicionar(aula)
+        return indice
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def adicionar(self, aula: dict) -> None:
+        doc = self._proximo
+        self._proximo += 1
+        turma = str(aula.get("turma", ""))
+        frequencias = {}
+        for termo in tokens(aula.get("conteudo", "")):
+            frequencias[termo] = frequencias.get(termo, 0) + 1
+        self._docs[doc] = aula
+        self._doc_de[id(aula)] = doc
+        self._termos[doc] = (turma, frequencias)
+
+        indice = self._turmas.get(turma)
+        if indice is None:
+            indice = self._turmas[turma] = _IndiceTurma()
+        indice.aulas += 1
+        for termo, n in frequencias.items():
+            lista = indice.postings.get(termo)
+            if lista is None:
+                lista = indice.postings[termo] = {}
+                bisect.insort(indice.vocabulario, termo)
+            lista[doc] = n
+
+    def remover(self, aula: dict) -> None:
+        """Tira a aula do índice (ValueError se ela não estiver nele)."""
+        doc = self._doc_de.pop(id(aula), None)
+        if doc is None:
+            raise ValueError("aula não está no índice")
+        del self._docs[doc]
+        turma, frequencias = self._termos.pop(doc)
+        indice = self._turmas[turma]
+        indice.aulas -= 1
+        for termo in frequencias:
+            lista = indice.postings[termo]
+            del lista[doc]
+            if not lista:
+                del indice.postings[termo]
+                del indice.vocabulario[bisect.bisect_left(indice.vocabulario, termo)]
+        if not indice.aulas:
+            del self._turmas[turma]
+
+    def alterar(self, antiga: dict, nova: dict) -> None:
+        self.remover(antiga)
+        self.adicionar(nova)
+
+    def buscar(self, consulta: str, turma: str = None) -> list:
+        """
+        [(aula, pontuação, termos encontrados)] das aulas (da turma, se informada)
+        que contêm todas as palavras da consulta, da mais para a menos relevante.
+        """
+        palavras = list(dict.fromkeys(tokens(consulta)))
+        if not palavras:
+            return []
+        if turma is None:
+            indices = list(self._turmas.values())
+        else:
+            indices = [self._turmas[turma]] if turma in self._turmas else []
+
+        resultados = []
+        for indice in indices:
+            # cada palavra vira um grupo de termos do vocabulário (a última, por prefixo)
+            grupos = []
+            for k, palavra in enumerate(palavras):
+                if k == len(palavras) - 1:
+                    termos = indice.com_prefixo(palavra)
+                else:
+                    termos = [palavra] if palavra in indice.postings else []
+                if not termos:
+                    break
+                grupos.append(termos)
+            else:
+                conjuntos = []
+                for termos in grupos:
+                    docs = set()
+                    for termo in termos:
+                        docs.update(indice.postings[termo])
+                    conjuntos.append(docs)
+                conjuntos.sort(key=len)
+                candidatos = conjuntos[0].intersection(*conjuntos[1:])
+                for doc in candidatos:
+                    pontos = 0.0
+                    encontrados = set()
+                    for termos in grupos:
+                        for termo in termos:
+                            lista = indice.postings[termo]
+                            frequencia = lista.get(doc)
+                            if frequencia:
+                                pontos += (1 + math.log(frequencia)) * math.log(1 + indice.aulas / len(lista))
+                                encontrados.add(termo)
+                    resultados.append((pontos, doc, encontrados))
+
+        resultados.sort(key=lambda r: (-r[0], r[1]))
+        return [(self._docs[doc], pontos, encontrados) for pontos, doc, encontrados in resultados]
@@ -0,0 +1,120 @@
+# indice_nomes.py
+"""
+Índice de nomes para a busca ao vivo de alunos.
+- Chave normalizada (sem acentos, sem diferenciar maiúsculas) calculada uma
+  única vez por aluno: "José" e "jose" são a mesma chave.
+- Gramas de 1, 2 e 3 letras: cada sequência da chave aponta para as posições
+  dos alunos que a contêm (array('I') em ordem de cadastro).
+- Termo de até 3 letras: a lista do próprio grama já é o resultado ("na" acha
+  "Ana"). Termo maior: só os alunos da menor lista entre os trigramas do termo
+  são verificados. Nenhum tamanho de termo percorre todos os nomes.
+
+BuscaIncremental guarda o último termo e o último resultado: quando o termo
+novo só acrescenta letras ao anterior, o resultado anterior é refinado em vez
+de consultar o índice de novo.
+"""
+
+import unicodedata
+from array import array
+
+TAMANHO_GRAMA = 3
+
+
+def normalizar(texto: str) -> str:
+    """Texto sem acentos e em minúsculas (casefold), para comparar nomes."""
+    decomposto = unicodedata.normalize("NFKD", str(texto))
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).casefold()
+
+
+def _gramas(chave: str, tamanho: int = TAMANHO_GRAMA) -> set:
+    return {chave[i:i + tamanho] for i in range(len(chave) - tamanho + 1)}
+
+
+class IndiceNomes:
+    __slots__ = ("chaves", "_gramas")
+
+    def __init__(self):
+        self.chaves = []        # posição -> chave normalizada
+        self._gramas = {}       # grama de 1 a 3 letras -> array('I') de posições
+
+    @classmethod
+    def de_nomes(cls, nomes) -> "IndiceNomes":
+        """Monta a partir dos nomes na ordem das posições."""
+        indice = cls()
+        for nome in nomes:
+            indice.acrescentar(nome)
+        return indice
+
+    def acrescentar(self, nome: str) -> None:
+        """Indexa o próximo aluno (posição = quantidade atual)."""
+        chave = normalizar(nome)
+        posicao = len(self.chaves)
+        self.chaves.append(chave)
+        for tamanho in range(1, TAMANHO_GRAMA + 1):
+            for grama in _gramas(chave, tamanho):
+                lista = self._gramas.get(grama)
+                if lista is None:
+                    lista = self._gramas[grama] = array("I")
+                lista.append(posicao)
+
+    def copia(self) -> "IndiceNomes":
+        outro = IndiceNomes()
+        outro.chaves = list(self.chaves)
+        outro._gramas = {g: array("I", lista) for g, lista in self._gramas.items()}
+        return outro
+
+    def __len__(self) -> int:
+        return len(self.chaves)
+
+    def contendo(self, termo: str) -> list:
+        """Posições (em ordem de cadastro) dos nomes que contêm o termo."""
+        chave = normalizar(termo)
+        chaves = self.chaves
+        if not chave:
+            return list(range(len(chaves)))
+        if len(chave) <= TAMANHO_GRAMA:
+            return list(self._gramas.get(chave, ()))
+        listas = []
+        for grama in _gramas(chave):
+            lista = self._gramas.get(grama)
+            if lista is None:
+                return []
+            listas.append(lista)
+        menor = min(listas, key=len)
+        return [i for i in menor if chave in chaves[i]]
+
+
+class BuscaIncremental:
+    """
+    Busca ao vivo sobre um IndiceNomes: nomes que contêm o termo, em qualquer
+    parte. Até 3 letras, a lista do grama; depois, quando o termo novo contém o
+    anterior (tecla que só acrescenta letras), o resultado anterior é refinado.
+    """
+    __slots__ = ("indice", "_termo", "_resultado")
+
+    def __init__(self, indice: IndiceNomes):
+        self.indice = indice
+        self._termo = None
+        self._resultado = None
+
+    def reiniciar(self) -> None:
+        """Esquece o último resultado (ex.: alunos novos entraram no índice)."""
+        self._termo = self._resultado = None
+
+    def buscar(self, termo: str):
+        """Posições dos alunos encontrados, em ordem de cadastro; None = termo vazio (todos)."""
+        chave = normalizar(termo).strip()
+        if not chave:
+            self.reiniciar()
+            return None
+        anterior = self._termo
+        if len(chave) > TAMANHO_GRAMA and anterior is not None and self._resultado is not None \
+                and anterior in chave:
+            # contém o termo novo => contém o anterior: basta filtrar (até 3 letras,
+            # a lista do grama é o resultado pronto e menor que a anterior)
+            chaves = self.indice.chaves
+            resultado = [i for i in self._resultado if chave in chaves[i]]
+        else:
+            resultado = self.indice.contendo(chave)
+        self._termo, self._resultado = chave, resultado
+        return resultado
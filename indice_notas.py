@@ -0,0 +1,129 @@
+# indice_notas.py
+"""
+Índice ordenado por nota (maior -> menor), geral e por turma.
+
+Guarda posições de alunos (índices numa tabela/lista que só cresce) em dois
+arrays paralelos mantidos ordenados com bisect:
+- _chaves: array('d') com a nota negada (ordem crescente = nota decrescente)
+- _posicoes: array('I') com a posição do aluno; empates ficam na ordem de cadastro
+
+Montagem inicial com uma única ordenação (de_notas / de_alunos).
+Consultas em O(log n + k): pagina()/top() (k maiores a partir de um ponto),
+ultimos() (k menores), posicao() (colocação de um aluno no ranking) e
+faixa() (alunos com nota entre mínimo e máximo). Inserir faz uma busca binária
+e um deslocamento contíguo do array (memmove), sem reordenar nada; alunos só
+são acrescentados à tabela, então o índice não tem remoção.
+"""
+
+import bisect
+from array import array
+
+
+class IndiceNotas:
+    __slots__ = ("_chaves", "_posicoes")
+
+    def __init__(self):
+        self._chaves = array("d")
+        self._posicoes = array("I")
+
+    @classmethod
+    def de_notas(cls, pares) -> "IndiceNotas":
+        """Monta de uma vez a partir de pares (nota, posição): uma ordenação, O(n log n)."""
+        ordenados = sorted((-nota, posicao) for nota, posicao in pares)
+        indice = cls()
+        indice._chaves = array("d", [chave for chave, _ in ordenados])
+        indice._posicoes = array("I", [posicao for _, posicao in ordenados])
+        return indice
+
+    def __len__(self) -> int:
+        return len(self._posicoes)
+
+    def copia(self) -> "IndiceNotas":
+        outro = IndiceNotas()
+        outro._chaves = array("d", self._chaves)
+        outro._posicoes = array("I", self._posicoes)
+        return outro
+
+    def _local(self, nota: float, posicao: int) -> int:
+        """Onde (nota, posicao) está ou entraria: dentro do bloco da nota, por posição."""
+        inicio = bisect.bisect_left(self._chaves, -nota)
+        fim = bisect.bisect_right(self._chaves, -nota, inicio)
+        return bisect.bisect_left(self._posicoes, posicao, inicio, fim)
+
+    def adicionar(self, nota: float, posicao: int) -> None:
+        i = self._local(nota, posicao)
+        self._chaves.insert(i, -nota)
+        self._posicoes.insert(i, posicao)
+
+    def pagina(self, inicio: int, quantidade: int) -> list:
+        """Posições dos alunos da colocação inicio+1 até inicio+quantidade."""
+        return self._posicoes[inicio:inicio + quantidade].tolist()
+
+    def top(self, k: int) -> list:
+        """Os k de maior nota (do maior para o menor)."""
+        return self.pagina(0, k)
+
+    def ultimos(self, k: int) -> list:
+        """Os k de menor nota (do menor para o maior)."""
+        if k <= 0:
+            return []
+        return self._posicoes[-k:].tolist()[::-1]
+
+    def posicao(self, nota: float, posicao: int):
+        """Colocação (1 = maior nota) do aluno, ou None se ele não estiver no índice."""
+        i = self._local(nota, posicao)
+        if i < len(self._posicoes) and self._posicoes[i] == posicao:
+            return i + 1
+        return None
+
+    def limites_faixa(self, minimo: float, maximo: float) -> tuple:
+        """(inicio, fim) no ranking dos alunos com minimo <= nota <= maximo; para paginar com pagina()."""
+        inicio = bisect.bisect_left(self._chaves, -maximo)
+        fim = bisect.bisect_right(self._chaves, -minimo, inicio)
+        return inicio, fim
+
+    def faixa(self, minimo: float, maximo: float) -> list:
+        """Posições dos alunos com minimo <= nota <= maximo (da maior para a menor nota)."""
+        inicio, fim = self.limites_faixa(minimo, maximo)
+        return self._posicoes[inicio:fim].tolist()
+
+
+class IndiceNotasTurmas:
+    """Um IndiceNotas geral e um por turma, atualizados juntos."""
+    __slots__ = ("geral", "turmas")
+
+    def __init__(self):
+        self.geral = IndiceNotas()
+        self.turmas = {}
+
+    @classmethod
+    def de_alunos(cls, trios) -> "IndiceNotasTurmas":
+        """Monta de uma vez a partir de trios (turma, nota, posição)."""
+        geral, por_turma = [], {}
+        for turma, nota, posicao in trios:
+            geral.append((nota, posicao))
+            por_turma.setdefault(turma, []).append((nota, posicao))
+        indices = cls()
+        indices.geral = IndiceNotas.de_notas(geral)
+        indices.turmas = {t: IndiceNotas.de_notas(pares) for t, pares in por_turma.items()}
+        return indices
+
+    def copia(self) -> "IndiceNotasTurmas":
+        outro = IndiceNotasTurmas()
+        outro.geral = self.geral.copia()
+        outro.turmas = {t: i.copia() for t, i in self.turmas.items()}
+        return outro
+
+    def adicionar(self, turma, nota: float, posicao: int) -> None:
+        self.geral.adicionar(nota, posicao)
+        indice = self.turmas.get(turma)
+        if indice is None:
+            indice = self.turmas[turma] = IndiceNotas()
+        indice.adicionar(nota, posicao)
+
+    def de(self, turma=None) -> IndiceNotas:
+        """Índice da turma (vazio se ela não existir) ou o geral, sem turma."""
+        if turma is None:
+            return self.geral
+        indice = self.turmas.get(turma)
+        return indice if indice is not None else IndiceNotas()
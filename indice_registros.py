@@ -0,0 +1,80 @@
+# indice_registros.py
+"""
+Identificadores estáveis dos registros (alunos, turmas, aulas e atividades).
+- Cada registro criado recebe "id" (uuid4 em hexadecimal, como os ids da caixa
+  de saída): único entre processos, sem depender de contador compartilhado.
+- Registros antigos, gravados antes dos ids, recebem um na primeira carga, que
+  já o grava no arquivo sob a trava de escrita (repositorio.carregar(),
+  central.iniciar(); no SQLite, banco.conectar()): o id sorteado é o mesmo em
+  todas as recargas e em todos os processos.
+- IndiceRegistros: id -> posição na lista do store (dict). Achar, trocar ou
+  remover um registro pelo id não compara conteúdo, então aulas iguais (mesma
+  turma e mesmo texto) continuam sendo registros diferentes. Remover deixa uma
+  lápide (posição removida, lista ordenada) em vez de renumerar os registros
+  seguintes; as lápides são incorporadas de tempos em tempos.
+"""
+
+import bisect
+import uuid
+
+CAMPO_ID = "id"
+STORES_COM_ID = ("alunos", "turmas", "aulas", "atividades")
+
+
+def novo_id() -> str:
+    return uuid.uuid4().hex
+
+
+def garantir_ids(registros) -> int:
+    """Dá um id aos registros (dicts) que ainda não têm; devolve quantos receberam."""
+    novos = 0
+    for registro in registros:
+        if isinstance(registro, dict) and not registro.get(CAMPO_ID):
+            registro[CAMPO_ID] = novo_id()
+            novos += 1
+    return novos
+
+
+class IndiceRegistros:
+    __slots__ = ("_posicoes", "_removidas")
+
+    def __init__(self):
+        self._posicoes = {}   # id -> posição na lista (contando as lápides)
+        self._removidas = []  # lápides: posições já removidas, ordenadas
+
+    @classmethod
+    def de_lista(cls, registros) -> "IndiceRegistros":
+        indice = cls()
+        for i, registro in enumerate(registros):
+            if isinstance(registro, dict) and registro.get(CAMPO_ID):
+                indice._posicoes[registro[CAMPO_ID]] = i
+        return indice
+
+    def __len__(self) -> int:
+        return len(self._posicoes)
+
+    def posicao(self, id_registro):
+        """Posição do registro na lista, ou None se o id não existir."""
+        posicao = self._posicoes.get(id_registro)
+        if posicao is None or not self._removidas:
+            return posicao
+        return posicao - bisect.bisect_left(self._removidas, posicao)
+
+    def acrescentar(self, id_registro, posicao: int) -> None:
+        """Registro novo no fim da lista (posição atual, já sem as lápides)."""
+        self._posicoes[id_registro] = posicao + len(self._removidas)
+
+    def remover(self, id_registro) -> None:
+        """
+        Atualiza o índice depois de o registro ser apagado da lista: tira o id e
+        guarda a posição dele como lápide (os registros seguintes não são renumerados).
+        """
+        bisect.insort(self._removidas, self._posicoes.pop(id_registro))
+        if len(self._removidas) > max(64, len(self._posicoes) // 8):
+            self._compactar()
+
+    def _compactar(self) -> None:
+        """Incorpora as lápides nas posições (O(n), a cada n/8 remoções)."""
+        removidas = self._removidas
+        self._posicoes = {i: p - bisect.bisect_left(removidas, p) for i, p in self._posicoes.items()}
+        self._removidas = []
@@ -0,0 +1,177 @@
+# log_servidor.py
+"""
+Log do servidor sem bloquear as threads de atendimento.
+- As mensagens vão para uma fila; uma thread de fundo (QueueListener) formata e
+  escreve no console e, opcionalmente, num arquivo JSON-lines com rotação.
+- Níveis: DEBUG / INFO / WARNING / ERROR.
+- Mensagens por conexão (NOVO CLIENTE, RECEBIDO, SALVO, RESPOSTA, DESCONECTADO)
+  usam conexao(); com LOG_CONEXOES desligado elas caem para DEBUG e somem no nível INFO.
+- aviso(..., chave=...) limita avisos repetidos (ex.: timeouts em rajada) a um por
+  intervalo, informando quantos foram suprimidos.
+- Fila cheia descarta a mensagem em vez de travar quem está registrando.
+"""
+
+import datetime
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+
+NIVEIS = ("DEBUG", "INFO", "WARNING", "ERROR")
+TAMANHO_FILA = 10000
+ARQUIVO_MAX_BYTES = 5 * 1024 * 1024
+ARQUIVO_BACKUPS = 5
+INTERVALO_AVISOS = 10.0
+
+# Mensagens por conexão no nível INFO (False: só aparecem com --log-nivel DEBUG)
+LOG_CONEXOES = True
+# Identifica o processo nas mensagens quando há vários (--workers), ex.: "W1"
+PROCESSO = None
+
+logger = logging.getLogger("academico")
+logger.propagate = False
+
+_listener = None
+_descartadas = 0
+_lock_avisos = threading.Lock()
+_avisos = {}    # chave -> [último envio, suprimidos desde então]
+_configuracao = {"nivel": "INFO", "arquivo": None, "conexoes": True}
+
+
+class _FilaSemBloqueio(logging.handlers.QueueHandler):
+    """QueueHandler que descarta (e conta) mensagens quando a fila está cheia."""
+
+    def prepare(self, record):
+        # a formatação fica toda na thread do listener, não em quem registrou
+        return record
+
+    def enqueue(self, record):
+        global _descartadas
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _descartadas += 1
+
+
+class _FormatoConsole(logging.Formatter):
+    def format(self, record):
+        texto = f"[{datetime.datetime.fromtimestamp(record.created).strftime('%Y-%m-%d %H:%M:%S')}] "
+        if PROCESSO:
+            texto += f"[{PROCESSO}] "
+        texto += record.getMessage()
+        if record.exc_info:
+            texto += "\n" + self.formatException(record.exc_info)
+        return texto
+
+
+class _FormatoJson(logging.Formatter):
+    """Uma linha JSON por mensagem: ts, nivel, msg e os campos extras."""
+
+    def format(self, record):
+        dados = {
+            "ts": datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "msg": record.getMessage(),
+        }
+        if PROCESSO:
+            dados["processo"] = PROCESSO
+        dados.update(getattr(record, "campos", None) or {})
+        if record.exc_info:
+            dados["exc"] = self.formatException(record.exc_info)
+        return json.dumps(dados, ensure_ascii=False)
+
+
+def configurar(nivel: str = "INFO", arquivo: str = None, conexoes: bool = None, processo: str = None):
+    """
+    (Re)configura o log: nível mínimo, arquivo JSON-lines com rotação (opcional),
+    se as mensagens por conexão aparecem no nível INFO e o nome do processo.
+    """
+    global _listener, LOG_CONEXOES, PROCESSO
+    if conexoes is not None:
+        LOG_CONEXOES = conexoes
+    if processo is not None:
+        PROCESSO = processo
+    _configuracao.update(nivel=nivel, arquivo=arquivo, conexoes=LOG_CONEXOES)
+    encerrar()
+
+    saidas = []
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(_FormatoConsole())
+    saidas.append(console)
+    if arquivo:
+        rotativo = logging.handlers.RotatingFileHandler(
+            arquivo, maxBytes=ARQUIVO_MAX_BYTES, backupCount=ARQUIVO_BACKUPS, encoding="utf-8")
+        rotativo.setFormatter(_FormatoJson())
+        saidas.append(rotativo)
+
+    fila = queue.Queue(TAMANHO_FILA)
+    for h in list(logger.handlers):
+        logger.removeHandler(h)
+    logger.addHandler(_FilaSemBloqueio(fila))
+    logger.setLevel(getattr(logging, nivel.upper(), logging.INFO))
+
+    _listener = logging.handlers.QueueListener(fila, *saidas, respect_handler_level=False)
+    _listener.start()
+
+
+def configuracao() -> dict:
+    """Nível, arquivo e conexões em uso (para repassar a outros processos)."""
+    return dict(_configuracao)
+
+
+def encerrar():
+    """Esvazia a fila e para a thread de escrita do log."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _emitir(nivel: int, msg: str, campos: dict, exc: bool = False):
+    if not logger.handlers:
+        configurar()
+    if logger.isEnabledFor(nivel):
+        logger.log(nivel, msg, exc_info=exc, extra={"campos": campos})
+
+
+def debug(msg: str, **campos):
+    _emitir(logging.DEBUG, msg, campos)
+
+
+def info(msg: str, **campos):
+    _emitir(logging.INFO, msg, campos)
+
+
+def conexao(msg: str, **campos):
+    """Mensagens por conexão/registro: INFO ou DEBUG conforme LOG_CONEXOES."""
+    _emitir(logging.INFO if LOG_CONEXOES else logging.DEBUG, msg, campos)
+
+
+def aviso(msg: str, chave: str = None, **campos):
+    """WARNING; com 'chave', no máximo um a cada INTERVALO_AVISOS por chave."""
+    if chave is not None:
+        agora = time.monotonic()
+        with _lock_avisos:
+            estado = _avisos.get(chave)
+            if estado is not None and agora - estado[0] < INTERVALO_AVISOS:
+                estado[1] += 1
+                return
+            suprimidos = estado[1] if estado else 0
+            _avisos[chave] = [agora, 0]
+        if suprimidos:
+            msg = f"{msg} (+{suprimidos} semelhante(s) suprimido(s) nos últimos {INTERVALO_AVISOS:.0f}s)"
+            campos["suprimidos"] = suprimidos
+    _emitir(logging.WARNING, msg, campos)
+
+
+def erro(msg: str, exc: bool = False, **campos):
+    """ERROR; exc=True anexa o traceback da exceção em tratamento."""
+    _emitir(logging.ERROR, msg, campos, exc)
+
+
+def descartadas() -> int:
+    """Quantidade de mensagens descartadas por fila cheia."""
+    return _descartadas
@@ -2,8 +2,10 @@
 """
 Arquivo principal do sistema acadêmico.
 - Inicializa o tema CustomTkinter
-- Verifica se o servidor está ativo
+- Verifica se o servidor está ativo (PING, ver conexao_servidor.py)
 - Se não estiver ativo, tenta iniciar automaticamente em background
+- Mantém o estado do servidor atualizado em background para as telas
+- Reenvia os cadastros pendentes da caixa de saída (data/envios_pendentes.jsonl)
 - Abre a tela de login
 - Compatível com executável PyInstaller
 """
@@ -11,7 +13,7 @@ Arquivo principal do sistema acadêmico.
 import customtkinter as ctk
 from login import criar_tela_login
 from interface import iniciar_tema
-import socket
+import conexao_servidor
 import subprocess
 import threading
 import time
@@ -22,19 +24,16 @@ import sys
 # -------------------------------------------------------------
 # CONFIGURAÇÕES
 # -------------------------------------------------------------
-PORT = 5050
+PORT = conexao_servidor.PORT
 SERVIDOR_SCRIPT = "servidor.py"
 
 
 # -------------------------------------------------------------
 # Função: detectar se o servidor está ativo
 # -------------------------------------------------------------
-def servidor_respondendo(host="127.0.0.1", port=PORT, timeout=1.0):
-    try:
-        with socket.create_connection((host, port), timeout=timeout):
-            return True
-    except:
-        return False
+def servidor_respondendo():
+    """PING imediato; também atualiza o estado compartilhado usado pelas telas."""
+    return conexao_servidor.verificar(forcar=True)
 
 
 # -------------------------------------------------------------
@@ -97,6 +96,11 @@ def main():
     else:
         print("[INFO] Servidor encontrado. Entrando em modo CLIENTE.")
 
+    # Telas consultam o estado em cache; o PING roda em background
+    conexao_servidor.iniciar_monitor()
+    # Reenvia o que ficou na caixa de saída em execuções anteriores
+    conexao_servidor.iniciar_caixa_saida()
+
     # ---------------------------------------------------------
     # INICIAR INTERFACE PRINCIPAL
     # ---------------------------------------------------------
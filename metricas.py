@@ -0,0 +1,141 @@
+# metricas.py
+"""
+Contadores e histogramas de latência do servidor.
+- Histogramas com faixas exponenciais (crescimento de ~10%), de 1 µs a ~1 h:
+  memória fixa por etapa e percentis p50/p95/p99 com erro relativo pequeno.
+- Thread-safe; usados pelas engines de servidor.py e pela thread escritora do central.
+- instantaneo() devolve tudo como dicionário (comando STATS) e salvar() grava o
+  JSON de forma atômica (data/metrics.json).
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+import arquivos
+
+# Etapas medidas no caminho de gravação
+ETAPAS = (
+    "aceite_recv",     # accept -> primeiro recv com dados
+    "parse",           # interpretação/validação das linhas recebidas
+    "espera_escrita",  # registro na fila até a thread escritora pegá-lo (antigo file_lock)
+    "escrita_fsync",   # write + flush + fsync do lote no journal
+    "envio",           # sendall/drain da resposta
+)
+
+_BASE = 1.1
+_MIN_US = 1.0
+_NUM_FAIXAS = int(math.log(3600e6) / math.log(_BASE)) + 2
+
+_lock = threading.Lock()
+_inicio = time.time()
+_contadores = {}
+_medidores = {}
+_histogramas = {}
+
+
+def _faixa(us: float) -> int:
+    if us <= _MIN_US:
+        return 0
+    return min(int(math.log(us) / math.log(_BASE)) + 1, _NUM_FAIXAS - 1)
+
+
+def _limite_superior_us(faixa: int) -> float:
+    return _BASE ** faixa
+
+
+def registrar(etapa: str, segundos: float):
+    """Registra uma amostra de latência (em segundos) para a etapa."""
+    us = segundos * 1e6
+    with _lock:
+        h = _histogramas.get(etapa)
+        if h is None:
+            h = _histogramas[etapa] = {"faixas": [0] * _NUM_FAIXAS, "n": 0, "soma": 0.0, "max": 0.0}
+        h["faixas"][_faixa(us)] += 1
+        h["n"] += 1
+        h["soma"] += us
+        if us > h["max"]:
+            h["max"] = us
+
+
+def incrementar(nome: str, n: int = 1):
+    with _lock:
+        _contadores[nome] = _contadores.get(nome, 0) + n
+
+
+def definir(nome: str, valor):
+    """Medidor de valor instantâneo (ex.: conexões ativas)."""
+    with _lock:
+        _medidores[nome] = valor
+
+
+@contextmanager
+def cronometro(etapa: str):
+    """with cronometro("parse"): ... registra a duração do bloco na etapa."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar(etapa, time.perf_counter() - t0)
+
+
+def _percentil(faixas: list, n: int, p: float) -> float:
+    alvo = max(1, math.ceil(n * p))
+    acumulado = 0
+    for i, qtd in enumerate(faixas):
+        acumulado += qtd
+        if acumulado >= alvo:
+            return _limite_superior_us(i)
+    return _limite_superior_us(len(faixas) - 1)
+
+
+def _resumo_histograma(h: dict) -> dict:
+    n = h["n"]
+    if not n:
+        return {"n": 0}
+    ms = lambda us: round(us / 1000, 3)
+    return {
+        "n": n,
+        "media_ms": ms(h["soma"] / n),
+        "p50_ms": ms(min(_percentil(h["faixas"], n, 0.50), h["max"])),
+        "p95_ms": ms(min(_percentil(h["faixas"], n, 0.95), h["max"])),
+        "p99_ms": ms(min(_percentil(h["faixas"], n, 0.99), h["max"])),
+        "max_ms": ms(h["max"]),
+    }
+
+
+def instantaneo() -> dict:
+    """Cópia de contadores, medidores e percentis por etapa."""
+    with _lock:
+        contadores = dict(_contadores)
+        medidores = dict(_medidores)
+        latencias = {etapa: _resumo_histograma(h) for etapa, h in _histogramas.items()}
+    for etapa in ETAPAS:
+        latencias.setdefault(etapa, {"n": 0})
+    return {
+        "gerado_em": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "uptime_s": round(time.time() - _inicio, 1),
+        "contadores": contadores,
+        "medidores": medidores,
+        "latencias": latencias,
+    }
+
+
+def salvar(caminho: str, extras: dict = None):
+    """Grava o instantâneo (mais 'extras') em JSON, de forma atômica e com a trava de escrita."""
+    dados = instantaneo()
+    if extras:
+        dados.update(extras)
+    # regravado a cada intervalo: sem fsync, como data/agregados.json
+    arquivos.gravar_json(caminho, dados, indent=4, duravel=False)
+
+
+def zerar():
+    """Reinicia todas as métricas (útil entre rodadas de benchmark)."""
+    global _inicio
+    with _lock:
+        _contadores.clear()
+        _medidores.clear()
+        _histogramas.clear()
+        _inicio = time.time()
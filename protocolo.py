@@ -0,0 +1,161 @@
+# protocolo.py
+"""
+Formato das mensagens trocadas com o servidor TCP (servidor.py).
+
+Versão 1 (legado, cliente.c):
+    uma conexão por registro -> "nome;turma;nota" (sem quebra de linha) -> "OK" / "ERR: ..."
+
+Versão 2 (quadros por linha, conexão persistente):
+    cada mensagem termina em "\\n"; o cliente pode enviar vários registros sem
+    esperar (pipelining) e recebe uma resposta por linha, na mesma ordem.
+      C: HELLO 2            S: HELLO 2          (opcional; negocia a versão)
+      C: nome;turma;nota    S: OK  |  ERR: motivo
+      C: nome;turma;nota;id S: OK            (id_envio opcional, gerado pelo cliente)
+      C: QUIT               S: BYE              (ou apenas fechar a conexão)
+
+    Envio em massa (validado por inteiro e gravado numa única escrita):
+      C: BULK 3             S: BULK 2 1         (aceitos, rejeitados)
+      C: Ana;3A;8           S: 1 OK
+      C: Bia;3A;x           S: 2 ERR: nota inválida
+      C: Caio;3A;9          S: 3 OK
+
+    Consultas (resposta numa linha: "OK <json>" ou "ERR: motivo"):
+      LIST <turma> | FIND <prefixo> | TOP <n> [turma] | AGG [turma]
+      STATS                                     (métricas do servidor)
+
+    Feed de alterações (a conexão passa a só receber eventos, até QUIT):
+      C: SUBSCRIBE [seq]    S: SUBSCRIBED <seq atual>
+                            S: EVT <seq> {"nome": ..., "turma": ..., "nota": ...}
+                            S: RELOAD <seq>     (dados alterados por fora: recarregue tudo)
+      Com seq, chegam primeiro os alunos gravados depois dele (retomada após
+      reconexão), depois cada aluno novo assim que o seu lote fica durável.
+      "ERR: assinante atrasado..." = o cliente não acompanhou; reconecte com o último seq.
+
+Envio idempotente (v1, v2 e BULK): com o 4º campo, um registro cujo id já foi
+gravado não é gravado de novo e recebe o mesmo "OK" da primeira vez; o cliente
+pode reenviar à vontade depois de uma falha de rede.
+
+Checagem de saúde (nos dois formatos; não grava nada nem aparece no log):
+      C: PING               S: PONG
+
+O servidor reconhece a versão 2 quando a primeira mensagem contém "\\n" ou
+começa com "HELLO "; qualquer outra coisa segue o caminho legado.
+Conexões que começam com os bytes mágicos de protocolo_binario.py usam o
+protocolo binário (lotes com tamanho prefixado e status numérico).
+"""
+
+import json
+
+PROTOCOLO_VERSAO = 2
+# Linha maior que isso sem "\n" derruba a conexão (proteção de memória)
+TAMANHO_MAX_LINHA = 64 * 1024
+# Tamanho máximo do id_envio (ex.: uuid4().hex tem 32)
+TAMANHO_MAX_ID_ENVIO = 64
+
+_HELLO = b"HELLO "
+_DIGITOS_MAX_VERSAO = 4  # "HELLO 9999": mais dígitos que isso não é handshake
+
+
+def detectar_modo(inicio: bytes):
+    """
+    Decide o protocolo pelos primeiros bytes recebidos.
+    Retorna True (quadros por linha), False (legado) ou None (precisa de mais bytes).
+    Sem "\n", só "HELLO <dígitos>" ainda pode ser um handshake: um ';' ou outro
+    caractere que não seja dígito depois de "HELLO " já é uma mensagem legada
+    (ex.: "HELLO Kitty;3A;8", de um cliente que não fecha a linha).
+    """
+    if b"\n" in inicio:
+        return True
+    if inicio.startswith(_HELLO):
+        versao = inicio[len(_HELLO):].rstrip(b"\r")
+        if len(versao) <= _DIGITOS_MAX_VERSAO and (not versao or versao.isdigit()):
+            return None  # handshake ainda incompleto
+        return False
+    if _HELLO.startswith(inicio):
+        return None
+    return False
+
+
+def extrair_linhas(buffer: bytes):
+    """
+    Separa as linhas completas do buffer.
+    Retorna (lista_de_linhas_decodificadas, resto_do_buffer).
+    Levanta ValueError se o resto passar de TAMANHO_MAX_LINHA.
+    """
+    if b"\n" not in buffer:
+        if len(buffer) > TAMANHO_MAX_LINHA:
+            raise ValueError("linha excede o tamanho máximo")
+        return [], buffer
+    *completas, resto = buffer.split(b"\n")
+    if len(resto) > TAMANHO_MAX_LINHA:
+        raise ValueError("linha excede o tamanho máximo")
+    linhas = [l.decode("utf-8", errors="replace").strip("\r") for l in completas]
+    return linhas, resto
+
+
+def validar_id_envio(id_envio: str) -> bool:
+    return 0 < len(id_envio) <= TAMANHO_MAX_ID_ENVIO and id_envio.isprintable() and ";" not in id_envio
+
+
+def formatar_registro(nome: str, turma: str, nota, id_envio: str = None) -> bytes:
+    """
+    Monta a linha 'nome;turma;nota\\n' (ou 'nome;turma;nota;id_envio\\n').
+    ';' e quebras de linha não são permitidos nos campos.
+    """
+    for campo in (nome, turma):
+        if ";" in campo or "\n" in campo or "\r" in campo:
+            raise ValueError("Campos não podem conter ';' ou quebra de linha")
+    if id_envio is None:
+        return f"{nome};{turma};{nota}\n".encode("utf-8")
+    if not validar_id_envio(id_envio):
+        raise ValueError(f"id_envio inválido (até {TAMANHO_MAX_ID_ENVIO} caracteres, sem ';')")
+    return f"{nome};{turma};{nota};{id_envio}\n".encode("utf-8")
+
+
+def formatar_hello(versao: int = PROTOCOLO_VERSAO) -> bytes:
+    return f"HELLO {versao}\n".encode("utf-8")
+
+
+def formatar_bulk(registros) -> bytes:
+    """Monta um comando BULK a partir de (nome, turma, nota)."""
+    corpo = b"".join(formatar_registro(nome, turma, nota) for nome, turma, nota in registros)
+    return f"BULK {len(registros)}\n".encode("utf-8") + corpo
+
+
+def ler_resposta_consulta(linha: str) -> dict:
+    """Converte a resposta 'OK <json>' de LIST/FIND/TOP/AGG em dicionário."""
+    if not linha.startswith("OK "):
+        raise ValueError(linha)
+    return json.loads(linha[3:])
+
+
+def ler_evento(linha: str):
+    """
+    Converte uma linha do SUBSCRIBE em evento:
+    {"tipo": "inserido", "seq", "aluno"} | {"tipo": "recarregado", "seq"} |
+    {"tipo": "assinado", "seq"}. Levanta ValueError para outras linhas (ex.: ERR).
+    """
+    partes = linha.split(" ", 2)
+    if partes[0] == "EVT" and len(partes) == 3:
+        return {"tipo": "inserido", "seq": int(partes[1]), "aluno": json.loads(partes[2])}
+    if partes[0] == "RELOAD" and len(partes) == 2:
+        return {"tipo": "recarregado", "seq": int(partes[1])}
+    if partes[0] == "SUBSCRIBED" and len(partes) == 2:
+        return {"tipo": "assinado", "seq": int(partes[1])}
+    raise ValueError(linha)
+
+
+def ler_resposta_bulk(ler_linha):
+    """
+    Lê a resposta de um BULK usando ler_linha() -> str (sem o '\n').
+    Retorna lista com None (aceito) ou a mensagem de erro, na ordem do envio.
+    """
+    cabecalho = ler_linha().split()
+    if len(cabecalho) != 3 or cabecalho[0] != "BULK":
+        raise ValueError(f"Resposta BULK inesperada: {' '.join(cabecalho)}")
+    total = int(cabecalho[1]) + int(cabecalho[2])
+    status = []
+    for _ in range(total):
+        _, resultado = ler_linha().split(" ", 1)
+        status.append(None if resultado == "OK" else resultado)
+    return status
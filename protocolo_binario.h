@@ -0,0 +1,173 @@
+// protocolo_binario.h
+// Codificador do protocolo binário do servidor (ver protocolo_binario.py).
+// Só cabeçalho e sem dependência de sockets: inclua no cliente.c (ou em outro
+// importador de notas) e envie os bytes gerados pela conexão TCP.
+//
+//   Saudação:  MAGICO "\0SAB" + versão (u8)
+//   Quadro:    tipo (u8) | id (u32) | tamanho do payload (u32), big-endian
+//   LOTE:      varint n + n x [varint len + nome, varint len + turma, nota float64]
+//   LOTE_ID:   como o LOTE, com varint len + id_envio ao fim de cada registro
+//              (envio idempotente: reenvios com o mesmo id não duplicam)
+//   RESULTADO: varint n + n x status (u8)
+
+#ifndef PROTOCOLO_BINARIO_H
+#define PROTOCOLO_BINARIO_H
+
+#include <stddef.h>
+#include <stdint.h>
+#include <string.h>
+
+#define PB_VERSAO 1
+#define PB_TAMANHO_SAUDACAO 5
+#define PB_TAMANHO_CABECALHO 9
+
+#define PB_LOTE      0x01
+#define PB_QUIT      0x02
+#define PB_LOTE_ID   0x03
+#define PB_RESULTADO 0x81
+#define PB_ERRO      0x82
+#define PB_BYE       0x83
+
+#define PB_STATUS_OK                  0
+#define PB_STATUS_FORMATO_INVALIDO    1
+#define PB_STATUS_NOTA_INVALIDA       2
+#define PB_STATUS_FALHA_GRAVACAO      3
+#define PB_STATUS_QUADRO_INVALIDO     4
+#define PB_STATUS_VERSAO_NAO_SUPORTADA 5
+#define PB_STATUS_LOTE_GRANDE         6
+
+static const unsigned char PB_MAGICO[4] = {0x00, 'S', 'A', 'B'};
+
+static inline const char *pb_mensagem_status(int status) {
+    switch (status) {
+        case PB_STATUS_OK: return "OK";
+        case PB_STATUS_FORMATO_INVALIDO: return "formato inválido";
+        case PB_STATUS_NOTA_INVALIDA: return "nota inválida";
+        case PB_STATUS_FALHA_GRAVACAO: return "falha ao salvar no servidor";
+        case PB_STATUS_QUADRO_INVALIDO: return "quadro inválido";
+        case PB_STATUS_VERSAO_NAO_SUPORTADA: return "versão não suportada";
+        case PB_STATUS_LOTE_GRANDE: return "lote grande demais";
+        default: return "status desconhecido";
+    }
+}
+
+static inline void pb_escrever_u32(unsigned char *buf, uint32_t v) {
+    buf[0] = (unsigned char)(v >> 24);
+    buf[1] = (unsigned char)(v >> 16);
+    buf[2] = (unsigned char)(v >> 8);
+    buf[3] = (unsigned char)v;
+}
+
+static inline uint32_t pb_ler_u32(const unsigned char *buf) {
+    return ((uint32_t)buf[0] << 24) | ((uint32_t)buf[1] << 16) | ((uint32_t)buf[2] << 8) | buf[3];
+}
+
+// Escreve o varint (LEB128) em buf (até 5 bytes); retorna quantos bytes usou
+static inline size_t pb_escrever_varint(unsigned char *buf, uint32_t n) {
+    size_t i = 0;
+    while (n >= 0x80) {
+        buf[i++] = (unsigned char)((n & 0x7F) | 0x80);
+        n >>= 7;
+    }
+    buf[i++] = (unsigned char)n;
+    return i;
+}
+
+// Lê um varint; retorna bytes consumidos ou 0 se truncado/inválido
+static inline size_t pb_ler_varint(const unsigned char *buf, size_t tam, uint32_t *valor) {
+    uint32_t v = 0;
+    size_t i;
+    for (i = 0; i < tam && i < 5; i++) {
+        v |= (uint32_t)(buf[i] & 0x7F) << (7 * i);
+        if (!(buf[i] & 0x80)) {
+            *valor = v;
+            return i + 1;
+        }
+    }
+    return 0;
+}
+
+// float64 IEEE 754 em big-endian
+static inline void pb_escrever_nota(unsigned char *buf, double nota) {
+    uint64_t bits;
+    int i;
+    memcpy(&bits, &nota, sizeof(bits));
+    for (i = 7; i >= 0; i--) {
+        buf[i] = (unsigned char)(bits & 0xFF);
+        bits >>= 8;
+    }
+}
+
+// Saudação: MAGICO + versão (PB_TAMANHO_SAUDACAO bytes)
+static inline size_t pb_codificar_saudacao(unsigned char *buf) {
+    memcpy(buf, PB_MAGICO, 4);
+    buf[4] = PB_VERSAO;
+    return PB_TAMANHO_SAUDACAO;
+}
+
+static inline size_t pb_codificar_cabecalho(unsigned char *buf, int tipo, uint32_t id, uint32_t tamanho) {
+    buf[0] = (unsigned char)tipo;
+    pb_escrever_u32(buf + 1, id);
+    pb_escrever_u32(buf + 5, tamanho);
+    return PB_TAMANHO_CABECALHO;
+}
+
+// Quadro QUIT (sem payload)
+static inline size_t pb_codificar_quit(unsigned char *buf, uint32_t id) {
+    return pb_codificar_cabecalho(buf, PB_QUIT, id, 0);
+}
+
+// LOTE (ids == NULL) ou LOTE_ID com n registros. Retorna o tamanho total ou 0 se não couber em 'cap'.
+static inline size_t pb_codificar_registros(unsigned char *buf, size_t cap, uint32_t id, const char *const nomes[],
+                                     const char *const turmas[], const double notas[],
+                                     const char *const ids[], size_t n) {
+    size_t pos = PB_TAMANHO_CABECALHO;
+    size_t i;
+    if (cap < pos + 5)
+        return 0;
+    pos += pb_escrever_varint(buf + pos, (uint32_t)n);
+    for (i = 0; i < n; i++) {
+        size_t len_nome = strlen(nomes[i]);
+        size_t len_turma = strlen(turmas[i]);
+        size_t len_id = (ids != NULL && ids[i] != NULL) ? strlen(ids[i]) : 0;
+        if (pos + 5 + len_nome + 5 + len_turma + 8 + (ids != NULL ? 5 + len_id : 0) > cap)
+            return 0;
+        pos += pb_escrever_varint(buf + pos, (uint32_t)len_nome);
+        memcpy(buf + pos, nomes[i], len_nome);
+        pos += len_nome;
+        pos += pb_escrever_varint(buf + pos, (uint32_t)len_turma);
+        memcpy(buf + pos, turmas[i], len_turma);
+        pos += len_turma;
+        pb_escrever_nota(buf + pos, notas[i]);
+        pos += 8;
+        if (ids != NULL) {
+            pos += pb_escrever_varint(buf + pos, (uint32_t)len_id);
+            memcpy(buf + pos, ids[i], len_id);
+            pos += len_id;
+        }
+    }
+    pb_codificar_cabecalho(buf, ids != NULL ? PB_LOTE_ID : PB_LOTE, id, (uint32_t)(pos - PB_TAMANHO_CABECALHO));
+    return pos;
+}
+
+// Quadro LOTE com n registros. Retorna o tamanho total ou 0 se não couber em 'cap'.
+static inline size_t pb_codificar_lote(unsigned char *buf, size_t cap, uint32_t id, const char *const nomes[],
+                                const char *const turmas[], const double notas[], size_t n) {
+    return pb_codificar_registros(buf, cap, id, nomes, turmas, notas, NULL, n);
+}
+
+// Quadro LOTE_ID: como pb_codificar_lote, com um id_envio por registro (NULL = sem id)
+static inline size_t pb_codificar_lote_com_id(unsigned char *buf, size_t cap, uint32_t id, const char *const nomes[],
+                                       const char *const turmas[], const double notas[],
+                                       const char *const ids[], size_t n) {
+    return pb_codificar_registros(buf, cap, id, nomes, turmas, notas, ids, n);
+}
+
+// Lê o cabeçalho de um quadro recebido (PB_TAMANHO_CABECALHO bytes)
+static inline void pb_ler_cabecalho(const unsigned char *buf, int *tipo, uint32_t *id, uint32_t *tamanho) {
+    *tipo = buf[0];
+    *id = pb_ler_u32(buf + 1);
+    *tamanho = pb_ler_u32(buf + 5);
+}
+
+#endif
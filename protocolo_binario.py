@@ -0,0 +1,254 @@
+# protocolo_binario.py
+"""
+Protocolo binário do servidor TCP (servidor.py), para importadores automáticos de notas.
+Convive com o protocolo de texto (protocolo.py): o servidor o reconhece pelos
+bytes mágicos no início da conexão. Inteiros em big-endian.
+
+Saudação (uma vez por conexão):
+    C: MAGICO (b"\\x00SAB") + versão (u8)      S: MAGICO + versão aceita (u8)
+
+Quadros (nos dois sentidos): cabeçalho fixo de 9 bytes + payload
+    tipo (u8) | id do quadro (u32) | tamanho do payload (u32)
+
+    C -> S  LOTE (0x01)       varint n + n x [varint len + nome UTF-8,
+                                             varint len + turma UTF-8, nota (float64 IEEE)]
+    C -> S  LOTE_ID (0x03)    como o LOTE, com varint len + id_envio UTF-8 ao fim de
+                              cada registro (len 0 = sem id); ver envio idempotente
+                              em protocolo.py
+    C -> S  QUIT (0x02)       sem payload
+    S -> C  RESULTADO (0x81)  mesmo id do LOTE; varint n + n x status (u8), na ordem do envio
+    S -> C  ERRO (0x82)       status (u8) + mensagem UTF-8 (quadro rejeitado inteiro)
+    S -> C  BYE (0x83)        resposta ao QUIT; o servidor fecha a conexão
+
+Um LOTE é gravado numa única escrita, como o BULK do protocolo de texto, e o
+RESULTADO só é enviado depois que o lote está durável. O cliente pode enviar
+vários LOTEs sem esperar (os RESULTADOs voltam na mesma ordem).
+O codificador em C equivalente está em protocolo_binario.h (usado pelo cliente.c).
+"""
+
+import math
+import struct
+
+MAGICO = b"\x00SAB"
+VERSAO_BINARIA = 1
+
+CABECALHO = struct.Struct(">BII")
+_NOTA = struct.Struct(">d")
+# Quadro maior que isso derruba a conexão (proteção de memória)
+TAMANHO_MAX_QUADRO = 4 * 1024 * 1024
+
+# Tipos de quadro
+LOTE = 0x01
+QUIT = 0x02
+LOTE_ID = 0x03
+RESULTADO = 0x81
+ERRO = 0x82
+BYE = 0x83
+
+# Códigos de status (por registro no RESULTADO, ou do quadro inteiro no ERRO)
+STATUS_OK = 0
+STATUS_FORMATO_INVALIDO = 1
+STATUS_NOTA_INVALIDA = 2
+STATUS_FALHA_GRAVACAO = 3
+STATUS_QUADRO_INVALIDO = 4
+STATUS_VERSAO_NAO_SUPORTADA = 5
+STATUS_LOTE_GRANDE = 6
+
+MENSAGENS_STATUS = {
+    STATUS_OK: "OK",
+    STATUS_FORMATO_INVALIDO: "formato inválido",
+    STATUS_NOTA_INVALIDA: "nota inválida",
+    STATUS_FALHA_GRAVACAO: "falha ao salvar no servidor",
+    STATUS_QUADRO_INVALIDO: "quadro inválido",
+    STATUS_VERSAO_NAO_SUPORTADA: "versão não suportada",
+    STATUS_LOTE_GRANDE: "lote grande demais",
+}
+
+
+def detectar(inicio: bytes):
+    """True (binário), False (texto) ou None (precisa de mais bytes)."""
+    if inicio.startswith(MAGICO):
+        return True
+    if MAGICO.startswith(inicio):
+        return None
+    return False
+
+
+# ---------------------------------------------------------
+# Saudação
+# ---------------------------------------------------------
+def codificar_saudacao(versao: int = VERSAO_BINARIA) -> bytes:
+    return MAGICO + bytes([versao])
+
+
+def ler_saudacao(buffer: bytes):
+    """
+    Lê MAGICO + versão do início do buffer.
+    Retorna (versão, resto) ou (None, buffer) se ainda incompleto.
+    """
+    if len(buffer) < len(MAGICO) + 1:
+        return None, buffer
+    if not buffer.startswith(MAGICO):
+        raise ValueError("bytes mágicos inválidos")
+    return buffer[len(MAGICO)], buffer[len(MAGICO) + 1:]
+
+
+# ---------------------------------------------------------
+# Varint (LEB128 sem sinal) e strings
+# ---------------------------------------------------------
+def codificar_varint(n: int) -> bytes:
+    if n < 0:
+        raise ValueError("varint não aceita negativos")
+    saida = bytearray()
+    while n >= 0x80:
+        saida.append((n & 0x7F) | 0x80)
+        n >>= 7
+    saida.append(n)
+    return bytes(saida)
+
+
+def ler_varint(dados, pos: int):
+    """Retorna (valor, nova posição). Levanta ValueError se truncado ou longo demais."""
+    valor = 0
+    deslocamento = 0
+    while True:
+        if pos >= len(dados):
+            raise ValueError("varint truncado")
+        byte = dados[pos]
+        pos += 1
+        valor |= (byte & 0x7F) << deslocamento
+        if not byte & 0x80:
+            return valor, pos
+        deslocamento += 7
+        if deslocamento > 35:
+            raise ValueError("varint longo demais")
+
+
+def _codificar_texto(texto: str) -> bytes:
+    dados = texto.encode("utf-8")
+    return codificar_varint(len(dados)) + dados
+
+
+def _ler_texto(dados, pos: int):
+    tamanho, pos = ler_varint(dados, pos)
+    fim = pos + tamanho
+    if fim > len(dados):
+        raise ValueError("texto truncado")
+    return bytes(dados[pos:fim]).decode("utf-8"), fim
+
+
+# ---------------------------------------------------------
+# Quadros
+# ---------------------------------------------------------
+def codificar_quadro(tipo: int, id_quadro: int, payload: bytes = b"") -> bytes:
+    return CABECALHO.pack(tipo, id_quadro, len(payload)) + payload
+
+
+def extrair_quadros(buffer: bytes):
+    """
+    Separa os quadros completos do buffer.
+    Retorna (lista de (tipo, id, payload), resto_do_buffer).
+    Levanta ValueError se um quadro declarar tamanho acima de TAMANHO_MAX_QUADRO.
+    """
+    quadros = []
+    pos = 0
+    tamanho_cab = CABECALHO.size
+    while len(buffer) - pos >= tamanho_cab:
+        tipo, id_quadro, tamanho = CABECALHO.unpack_from(buffer, pos)
+        if tamanho > TAMANHO_MAX_QUADRO:
+            raise ValueError("quadro excede o tamanho máximo")
+        fim = pos + tamanho_cab + tamanho
+        if fim > len(buffer):
+            break
+        quadros.append((tipo, id_quadro, buffer[pos + tamanho_cab:fim]))
+        pos = fim
+    return quadros, buffer[pos:]
+
+
+def codificar_lote(registros, id_quadro: int = 0) -> bytes:
+    """Quadro LOTE a partir de (nome, turma, nota)."""
+    partes = [codificar_varint(len(registros))]
+    for nome, turma, nota in registros:
+        partes.append(_codificar_texto(nome))
+        partes.append(_codificar_texto(turma))
+        partes.append(_NOTA.pack(float(nota)))
+    return codificar_quadro(LOTE, id_quadro, b"".join(partes))
+
+
+def codificar_lote_com_id(registros, id_quadro: int = 0) -> bytes:
+    """Quadro LOTE_ID a partir de (nome, turma, nota, id_envio); id_envio pode ser None."""
+    partes = [codificar_varint(len(registros))]
+    for nome, turma, nota, id_envio in registros:
+        partes.append(_codificar_texto(nome))
+        partes.append(_codificar_texto(turma))
+        partes.append(_NOTA.pack(float(nota)))
+        partes.append(_codificar_texto(id_envio or ""))
+    return codificar_quadro(LOTE_ID, id_quadro, b"".join(partes))
+
+
+def decodificar_lote(payload: bytes, com_id: bool = False) -> list:
+    """
+    Lista de (nome, turma, nota) do payload de um LOTE, ou de
+    (nome, turma, nota, id_envio ou None) de um LOTE_ID (com_id=True).
+    Levanta ValueError se o payload estiver malformado (quadro rejeitado inteiro).
+    """
+    dados = memoryview(payload)
+    quantidade, pos = ler_varint(dados, 0)
+    registros = []
+    for _ in range(quantidade):
+        try:
+            nome, pos = _ler_texto(dados, pos)
+            turma, pos = _ler_texto(dados, pos)
+        except UnicodeDecodeError:
+            raise ValueError("texto não é UTF-8 válido")
+        if pos + _NOTA.size > len(dados):
+            raise ValueError("nota truncada")
+        nota = _NOTA.unpack_from(dados, pos)[0]
+        pos += _NOTA.size
+        if not com_id:
+            registros.append((nome, turma, nota))
+            continue
+        try:
+            id_envio, pos = _ler_texto(dados, pos)
+        except UnicodeDecodeError:
+            raise ValueError("id_envio não é UTF-8 válido")
+        registros.append((nome, turma, nota, id_envio or None))
+    if pos != len(dados):
+        raise ValueError("bytes sobrando no lote")
+    return registros
+
+
+def validar_nota(nota: float) -> bool:
+    return math.isfinite(nota)
+
+
+def codificar_resultado(id_quadro: int, status: list) -> bytes:
+    return codificar_quadro(RESULTADO, id_quadro, codificar_varint(len(status)) + bytes(status))
+
+
+def decodificar_resultado(payload: bytes) -> list:
+    quantidade, pos = ler_varint(payload, 0)
+    status = list(payload[pos:pos + quantidade])
+    if len(status) != quantidade:
+        raise ValueError("resultado truncado")
+    return status
+
+
+def codificar_erro(id_quadro: int, status: int, mensagem: str = None) -> bytes:
+    texto = mensagem if mensagem is not None else MENSAGENS_STATUS.get(status, "")
+    return codificar_quadro(ERRO, id_quadro, bytes([status]) + texto.encode("utf-8"))
+
+
+def decodificar_erro(payload: bytes):
+    """Retorna (status, mensagem)."""
+    if not payload:
+        raise ValueError("erro sem status")
+    return payload[0], payload[1:].decode("utf-8", errors="replace")
+
+
+def codificar_quit(id_quadro: int = 0) -> bytes:
+    return codificar_quadro(QUIT, id_quadro)
+
+
+def codificar_bye(id_quadro: int = 0) -> bytes:
+    return codificar_quadro(BYE, id_quadro)
@@ -0,0 +1,429 @@
+# repositorio.py
+"""
+Acesso aos arquivos JSON da interface (data/*.json) com cache em memória.
+- Um "store" por arquivo: alunos, turmas, aulas, atividades e usuarios.
+- carregar(): devolve a lista já interpretada e só relê o arquivo quando a
+  assinatura dele (mtime, tamanho, inode) muda. Reabrir uma janela ou refiltrar
+  uma lista não custa leitura nenhuma; uma alteração feita por fora (servidor,
+  outra instância da interface) é percebida na próxima chamada.
+- salvar(): grava o arquivo e já deixa o cache com a lista nova (a próxima
+  leitura não relê o que acabou de ser escrito).
+
+- inserir(): acrescenta um registro (no SQLite é um único INSERT).
+- Concorrência entre processos (arquivos.py): leituras com trava compartilhada,
+  gravações atômicas (temporário + rename) e inserir()/substituir_registro()
+  lendo e gravando sob a trava exclusiva do arquivo, então várias instâncias
+  da interface e o servidor numa mesma pasta não perdem registros uns dos outros.
+- tabela_alunos(): os alunos em colunas tipadas (tabela_alunos.TabelaAlunos),
+  montadas uma vez por carga; é o que as telas de alunos usam.
+- agregados_alunos(): estatísticas por turma e gerais (agregados.py), lidas de
+  data/agregados.json quando ele corresponde à versão atual dos alunos e
+  atualizadas a cada inserir().
+- listar_alunos(): alunos de uma turma e/ou ordenados por nota; no SQLite a
+  consulta lê só as linhas pedidas, pelo índice (turma, nota).
+- indice_aulas(): índice invertido do conteúdo das aulas (indice_aulas.py),
+  montado uma vez por carga e atualizado por inserir() e substituir_registro().
+- ids estáveis (indice_registros.py): alunos, turmas, aulas e atividades
+  recebem um "id" ao serem criados (os antigos, na primeira carga, que já o
+  grava no arquivo), com um índice id -> posição por store. registro_por_id() e substituir_registro()
+  (edição e exclusão) acham o registro pelo id, sem comparar conteúdo, e
+  mantêm os índices derivados sem remontá-los.
+
+Backend: arquivos JSON por padrão; SQLite (data/sistema.db, ver banco.py)
+quando o banco existe ou SISTEMA_ARMAZENAMENTO=sqlite. No SQLite o cache é
+validado pela versão do store gravada no próprio banco.
+
+A lista devolvida é compartilhada entre as telas: não altere em lugar. Para
+modificar, copie (list(...)), altere a cópia e chame salvar().
+"""
+
+import contextlib
+import os
+import threading
+
+import agregados
+import arquivos
+import banco
+from interface import garantir_pasta_data
+from indice_aulas import IndiceAulas
+from indice_registros import CAMPO_ID, STORES_COM_ID, IndiceRegistros, garantir_ids, novo_id
+from tabela_alunos import TabelaAlunos, nota_float
+
+PASTA = garantir_pasta_data()
+
+ARQUIVOS = {
+    "alunos": "alunos.json",
+    "turmas": "turmas.json",
+    "aulas": "aulas.json",
+    "atividades": "atividades.json",
+    "usuarios": "usuarios.json",
+}
+
+ARMAZENAMENTO = banco.armazenamento_padrao()
+
+_lock = threading.Lock()
+_cache = {}   # store -> (assinatura do arquivo ou versão no banco, lista)
+_tabela = None  # (assinatura ou versão, TabelaAlunos) dos alunos
+_agregados = None  # (assinatura ou versão, agregados.AgregadosTurmas) dos alunos
+_indice_aulas = None  # (assinatura ou versão, IndiceAulas)
+_ids = {}     # store -> (assinatura ou versão, IndiceRegistros)
+_conexao = None
+
+
+def _banco():
+    """Conexão SQLite da interface (aberta na primeira vez; usar com _lock)."""
+    global _conexao
+    if _conexao is None:
+        _conexao = banco.conectar(os.path.join(PASTA, "sistema.db"))
+    return _conexao
+
+
+def caminho(store: str) -> str:
+    return os.path.join(PASTA, ARQUIVOS[store])
+
+
+def _assinatura(arquivo: str):
+    try:
+        st = os.stat(arquivo)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _ler(arquivo: str) -> list:
+    """Lê a lista do JSON (trava de leitura); arquivo inexistente ou inválido vira lista vazia."""
+    try:
+        return arquivos.ler_json(arquivo, [])
+    except (ValueError, OSError):
+        return []
+
+
+def _trava_escrita(store: str):
+    """Trava exclusiva do arquivo do store (no SQLite a transação do banco já isola)."""
+    if ARMAZENAMENTO == "sqlite":
+        return contextlib.nullcontext()
+    return arquivos.escrita(caminho(store))
+
+
+def _versao_store(store: str):
+    """Assinatura do arquivo (JSON) ou versão da tabela (SQLite)."""
+    if ARMAZENAMENTO == "sqlite":
+        with _lock:
+            return banco.versao(_banco(), store)
+    return _assinatura(caminho(store))
+
+
+def _ler_store(store: str) -> list:
+    if ARMAZENAMENTO == "sqlite":
+        with _lock:
+            return banco.ler(_banco(), store)
+    return _ler(caminho(store))
+
+
+def _carregar_banco(store: str) -> list:
+    with _lock:
+        conn = _banco()
+        versao = banco.versao(conn, store)
+        em_cache = _cache.get(store)
+        if em_cache is not None and em_cache[0] == versao:
+            return em_cache[1]
+        dados = banco.ler(conn, store)  # ids já preenchidos por banco.conectar()
+        _cache[store] = (versao, dados)
+        return dados
+
+
+def _migrar_ids(arquivo: str) -> tuple:
+    """
+    Arquivo com registros de antes dos ids: grava os ids sorteados uma única vez,
+    sob a trava de escrita, para que sejam os mesmos nas próximas recargas e nas
+    outras instâncias. Devolve (dados, assinatura) do arquivo migrado.
+    """
+    with arquivos.escrita(arquivo):
+        dados = _ler(arquivo)  # relido sob a trava: outra instância pode ter migrado antes
+        if isinstance(dados, list) and garantir_ids(dados):
+            arquivos.gravar_json(arquivo, dados, indent=4)
+        return dados, _assinatura(arquivo)
+
+
+def carregar(store: str) -> list:
+    """Lista do store (compartilhada; não altere). Relê o arquivo só se ele mudou."""
+    if ARMAZENAMENTO == "sqlite":
+        return _carregar_banco(store)
+    arquivo = caminho(store)
+    assinatura = _assinatura(arquivo)
+    with _lock:
+        em_cache = _cache.get(store)
+        if em_cache is not None and em_cache[0] == assinatura:
+            return em_cache[1]
+    dados = _ler(arquivo)
+    if store in STORES_COM_ID and isinstance(dados, list) and garantir_ids(dados):
+        dados, assinatura = _migrar_ids(arquivo)
+    with _lock:
+        _cache[store] = (assinatura, dados)
+    return dados
+
+
+def salvar(store: str, lista: list) -> None:
+    """
+    Sobrescreve o arquivo do store e atualiza o cache com a lista gravada.
+    No SQLite, stores com id são gravados pelo id (banco.sincronizar): só saem
+    os ids que estavam na lista lida em carregar() e não estão mais nesta, então
+    registros inseridos por outro processo nesse meio tempo continuam na tabela
+    (e o cache é descartado, para relê-los).
+    """
+    if store in STORES_COM_ID:
+        garantir_ids(lista)
+    if ARMAZENAMENTO == "sqlite":
+        with _lock:
+            conn = _banco()
+            antes = banco.versao(conn, store)
+            em_cache = _cache.get(store)
+            if store in STORES_COM_ID:
+                lidos = em_cache[1] if em_cache is not None else ()
+                mantidos = {r[CAMPO_ID] for r in lista}
+                removidos = [r[CAMPO_ID] for r in lidos if r.get(CAMPO_ID) and r[CAMPO_ID] not in mantidos]
+                banco.sincronizar(conn, store, lista, removidos)
+            else:
+                banco.substituir(conn, store, lista)
+            if store not in STORES_COM_ID or (em_cache is not None and em_cache[0] == antes):
+                _cache[store] = (banco.versao(conn, store), list(lista))
+            else:
+                _cache.pop(store, None)  # a tabela pode ter linhas que a lista não tem: relê
+        return
+    arquivo = caminho(store)
+    with arquivos.escrita(arquivo):
+        arquivos.gravar_json(arquivo, lista, indent=4)
+        assinatura = _assinatura(arquivo)
+    with _lock:
+        _cache[store] = (assinatura, list(lista))
+
+
+def inserir(store: str, registro: dict) -> dict:
+    """
+    Acrescenta um registro ao store (SQLite: um INSERT; JSON: regrava o arquivo).
+    Alunos, turmas, aulas e atividades recebem um "id" estável se ainda não o
+    têm. Devolve o registro gravado.
+    """
+    global _tabela, _agregados, _indice_aulas
+    if store in STORES_COM_ID and not registro.get(CAMPO_ID):
+        registro = {CAMPO_ID: novo_id(), **registro}
+    if ARMAZENAMENTO == "sqlite":
+        with _lock:
+            conn = _banco()
+            antes = banco.versao(conn, store)
+            banco.inserir(conn, store, [registro])
+            depois = banco.versao(conn, store)
+            em_cache = _cache.get(store)
+            if em_cache is not None and em_cache[0] == antes:
+                # ninguém mais mexeu no store: o cache continua válido com o registro novo
+                _cache[store] = (depois, em_cache[1] + [registro])
+    else:
+        # lê-acrescenta-grava sob a trava: outra instância não perde nem sobrescreve o registro
+        with arquivos.escrita(caminho(store)):
+            antes = _assinatura(caminho(store))
+            salvar(store, carregar(store) + [registro])
+            depois = _assinatura(caminho(store))
+    with _lock:
+        ids = _ids.get(store)
+        em_cache = _cache.get(store)
+        if ids is not None and ids[0] == antes and em_cache is not None and em_cache[0] == depois:
+            ids[1].acrescentar(registro[CAMPO_ID], len(em_cache[1]) - 1)
+            _ids[store] = (depois, ids[1])
+    if store == "alunos":
+        with _lock:
+            if _tabela is not None and _tabela[0] == antes:
+                _tabela[1].acrescentar(registro)
+                _tabela = (depois, _tabela[1])
+            atualizar = _agregados is not None and _agregados[0] == antes
+            if atualizar:
+                _agregados[1].adicionar(str(registro.get("turma", "")), nota_float(registro.get("nota", 0)))
+                _agregados = (depois, _agregados[1])
+        if atualizar:
+            _salvar_agregados(_agregados[1], depois)
+    elif store == "aulas":
+        with _lock:
+            if _indice_aulas is not None and _indice_aulas[0] == antes:
+                _indice_aulas[1].adicionar(registro)
+                _indice_aulas = (depois, _indice_aulas[1])
+    return registro
+
+
+def _lista_e_ids(store: str) -> tuple:
+    """(versão, lista em cache, IndiceRegistros) coerentes entre si."""
+    lista = carregar(store)
+    with _lock:
+        versao = _cache[store][0]
+        ids = _ids.get(store)
+        if ids is not None and ids[0] == versao:
+            return versao, lista, ids[1]
+    indice = IndiceRegistros.de_lista(lista)
+    with _lock:
+        _ids[store] = (versao, indice)
+    return versao, lista, indice
+
+
+def registro_por_id(store: str, id_registro):
+    """O registro atual com esse id (dict compartilhado; não altere), ou None."""
+    _, lista, indice = _lista_e_ids(store)
+    posicao = indice.posicao(id_registro)
+    return lista[posicao] if posicao is not None else None
+
+
+def substituir_registro(store: str, id_registro, novo: dict = None) -> None:
+    """
+    Troca o registro com esse id por 'novo' (que fica com o mesmo id) ou o
+    remove quando novo é None. O registro é achado pelo índice de ids, sem
+    comparar conteúdo; no SQLite a gravação é um único UPDATE/DELETE pelo id.
+    O índice das aulas é atualizado só para esse registro. ValueError se o id
+    não existir nos dados atuais (ex.: excluído por outra instância).
+    """
+    global _indice_aulas
+    with _trava_escrita(store):
+        antes, lista, indice = _lista_e_ids(store)
+        posicao = indice.posicao(id_registro)
+        if posicao is None:
+            raise ValueError(f"registro {id_registro!r} não encontrado nos dados atuais")
+        antigo = lista[posicao]
+        lista = list(lista)
+        if novo is None:
+            del lista[posicao]
+        else:
+            novo = dict(novo, **{CAMPO_ID: id_registro})
+            lista[posicao] = novo
+
+        if ARMAZENAMENTO == "sqlite":
+            with _lock:
+                conn = _banco()
+                if novo is None:
+                    encontrado = banco.remover(conn, store, id_registro)
+                else:
+                    encontrado = banco.atualizar(conn, store, id_registro, novo)
+                if not encontrado:
+                    _cache.pop(store, None)
+                    raise ValueError(f"registro {id_registro!r} não encontrado nos dados atuais")
+                depois = banco.versao(conn, store)
+                if _cache.get(store, (None,))[0] == antes:
+                    _cache[store] = (depois, lista)
+                else:
+                    _cache.pop(store, None)
+        else:
+            salvar(store, lista)
+            depois = _versao_store(store)
+
+        with _lock:
+            ids = _ids.get(store)
+            if ids is not None and ids[0] == antes:
+                if novo is None:
+                    ids[1].remover(id_registro)
+                _ids[store] = (depois, ids[1])
+            if store == "aulas" and _indice_aulas is not None and _indice_aulas[0] == antes:
+                _indice_aulas[1].remover(antigo)
+                if novo is not None:
+                    _indice_aulas[1].adicionar(novo)
+                _indice_aulas = (depois, _indice_aulas[1])
+
+
+def _arquivo_agregados() -> str:
+    return os.path.join(PASTA, os.path.basename(agregados.ARQUIVO))
+
+
+def _salvar_agregados(estatisticas, versao) -> None:
+    try:
+        agregados.salvar(estatisticas, versao, _arquivo_agregados())
+    except OSError:
+        pass  # é só um cache: na próxima abertura é recalculado
+
+
+def agregados_alunos() -> agregados.AgregadosTurmas:
+    """
+    Estatísticas das notas (geral e por turma). Vêm de data/agregados.json se ele
+    descreve a versão atual dos alunos (sem ler aluno nenhum); senão são
+    recalculadas da tabela e gravadas. Compartilhadas: não altere.
+    """
+    global _agregados
+    versao = _versao_store("alunos")
+    with _lock:
+        if _agregados is not None and _agregados[0] == versao:
+            return _agregados[1]
+    estatisticas = agregados.carregar(versao, _arquivo_agregados())
+    if estatisticas is None:
+        estatisticas = agregados.AgregadosTurmas.de_alunos(tabela_alunos().turmas_e_notas())
+        _salvar_agregados(estatisticas, versao)
+    with _lock:
+        _agregados = (versao, estatisticas)
+    return estatisticas
+
+
+def tabela_alunos() -> TabelaAlunos:
+    """
+    Alunos em colunas tipadas (nota em array('d'), turma como código), montadas
+    uma vez por carga. Compartilhada entre as telas: use copia() para alterar.
+    """
+    global _tabela
+    versao = _versao_store("alunos")
+    with _lock:
+        if _tabela is not None and _tabela[0] == versao:
+            return _tabela[1]
+        em_cache = _cache.get("alunos")
+    if em_cache is not None and em_cache[0] == versao:
+        registros = em_cache[1]
+    else:
+        registros = _ler_store("alunos")  # só a tabela fica em memória, não os dicts
+    tabela = TabelaAlunos.de_registros(registros)
+    with _lock:
+        _tabela = (versao, tabela)
+    return tabela
+
+
+def indice_aulas() -> IndiceAulas:
+    """
+    Índice de busca no conteúdo das aulas, sobre os mesmos dicts de carregar("aulas").
+    Remontado só quando o store muda por fora da interface.
+    """
+    global _indice_aulas
+    versao = _versao_store("aulas")
+    with _lock:
+        if _indice_aulas is not None and _indice_aulas[0] == versao:
+            return _indice_aulas[1]
+    indice = IndiceAulas.de_aulas(carregar("aulas"))
+    with _lock:
+        _indice_aulas = (versao, indice)
+    return indice
+
+
+def _nota(aluno: dict) -> float:
+    return nota_float(aluno.get("nota", 0))
+
+
+def listar_alunos(turma: str = None, ordenar_por_nota: bool = False, limite: int = None) -> list:
+    """
+    Alunos (de uma turma, se informada), opcionalmente do maior para o menor nota.
+    No SQLite só as linhas pedidas saem do banco; no JSON filtra a lista em cache.
+    """
+    if ARMAZENAMENTO == "sqlite":
+        onde, parametros = ("turma = ?", (turma,)) if turma else ("", ())
+        ordem = "nota DESC, id" if ordenar_por_nota else "id"
+        with _lock:
+            return banco.ler(_banco(), "alunos", onde, parametros, ordem, limite)
+    alunos = carregar("alunos")
+    if turma:
+        alunos = [a for a in alunos if a.get("turma") == turma]
+    if ordenar_por_nota:
+        alunos = sorted(alunos, key=_nota, reverse=True)
+    return list(alunos[:limite] if limite is not None else alunos)
+
+
+def invalidar(store: str = None) -> None:
+    """Descarta o cache de um store (ou de todos); a próxima leitura vai ao disco."""
+    global _tabela, _agregados, _indice_aulas
+    with _lock:
+        if store in (None, "alunos"):
+            _tabela = _agregados = None
+        if store in (None, "aulas"):
+            _indice_aulas = None
+        if store is None:
+            _cache.clear()
+            _ids.clear()
+        else:
+            _cache.pop(store, None)
+            _ids.pop(store, None)
@@ -1,198 +1,1259 @@
 # servidor.py
 """
-Servidor TCP para LAN - Suporte a múltiplos clientes simultâneos.
-Requisitos atendidos:
-- Bind em 0.0.0.0 para aceitar conexões da rede local (LAN).
-- Threads por conexão para atender clientes simultâneos.
-- Lock para escrita concorrente em data/alunos.json.
-- Logs detalhados (timestamp, IP:porta, ação).
-- Escrita atômica em arquivo (temp -> replace).
-- Resposta ao cliente ("OK" ou mensagem de erro).
+Servidor TCP para LAN: recebe os cadastros de alunos dos clientes e responde
+consultas sobre eles.
+
+Atendimento
+- Bind em 0.0.0.0; uma thread por conexão ou um único event loop
+  (--engine asyncio). Com --workers N, vários processos aceitam na mesma porta
+  (SO_REUSEPORT no Linux, socket compartilhado nos demais) e só o principal
+  grava (escritor_remoto.py).
+
+Protocolos
+- Texto (protocolo.py): formato legado de um registro por conexão e v2
+  (HELLO 2) com conexão persistente, pipelining e uma resposta por registro.
+  Comandos: BULK (turma inteira numa escrita, status por registro),
+  LIST/FIND/TOP/AGG (consultas à memória do central), PING, STATS e
+  SUBSCRIBE [seq] (EVT <seq> <json> por aluno gravado, retomável pelo seq).
+- Binário (protocolo_binario.py), reconhecido pelos bytes mágicos: lotes com
+  tamanho prefixado e status numérico por registro.
+- id_envio opcional (4º campo / quadro LOTE_ID): o reenvio recebe o mesmo
+  "OK" sem gravar de novo.
+
+Gravação (central.py)
+- Journal + snapshot, ou SQLite (--armazenamento sqlite, banco.py), com group
+  commit: o "OK" só sai depois que o lote do cliente está durável.
+
+Operação
+- Logs sem bloquear o atendimento (log_servidor.py: níveis, JSON-lines com
+  rotação) e métricas por etapa (metricas.py: STATS e data/metrics.json).
 """
 
 import socket
-import json
+import argparse
 import os
+import asyncio
+import json
+import queue
+import select
+import multiprocessing
+import multiprocessing.connection
+import time
 import threading
-import traceback
 import datetime
 import signal
 import sys
 from typing import Dict, Any
 
+import banco
+import central
+import escritor_remoto
+import log_servidor
+import metricas
+import protocolo
+import protocolo_binario
+
 HOST = "0.0.0.0"
 PORT = 5050
-DATA_FOLDER = "data"
-DATA_FILE = os.path.join(DATA_FOLDER, "alunos.json")
-TEMP_FILE = os.path.join(DATA_FOLDER, "alunos.tmp.json")
-
-# Lock para proteger leitura/escrita concorrente do arquivo JSON
-file_lock = threading.Lock()
+DATA_FOLDER = central.DATA_FOLDER
+DATA_FILE = central.DATA_FILE
 
 # Conjunto (thread-safe via lock_clients) para rastrear clientes conectados
 active_clients = set()
 lock_clients = threading.Lock()
+# Conexões em modo SUBSCRIBE (também protegido por lock_clients)
+assinantes_ativos = 0
 
 # Helper de timestamp
 def ts():
     return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
 def ensure_data_folder():
-    if not os.path.exists(DATA_FOLDER):
-        os.makedirs(DATA_FOLDER)
+    central.ensure_data_folder()
 
-def read_alunos() -> list:
-    """Lê lista de alunos do JSON; retorna lista vazia se inexistente ou inválido."""
-    ensure_data_folder()
-    if not os.path.exists(DATA_FILE):
-        return []
-    try:
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        # Em caso de arquivo inválido, tenta recuperar como lista vazia
-        print(f"[{ts()}] [WARN] Arquivo JSON inválido - recuperando lista vazia.")
-        return []
-
-def write_alunos_atomic(alunos: list) -> None:
-    """Grava o JSON de forma atômica: escreve em temp e substitui."""
-    ensure_data_folder()
-    with open(TEMP_FILE, "w", encoding="utf-8") as f:
-        json.dump(alunos, f, indent=4, ensure_ascii=False)
-        f.flush()
-        os.fsync(f.fileno())
-    # substitui atomically
-    os.replace(TEMP_FILE, DATA_FILE)
-
-def salvar_no_central(dados: Dict[str, Any]):
-    """Salva o registro recebido em JSON, com lock para concorrência."""
+# Engines disponíveis: thread por conexão (padrão) ou event loop asyncio
+ENGINES = ("threads", "asyncio")
+BACKLOG = 1024
+# Tempo máximo (s) esperando os dados de um cliente antes de desconectá-lo
+TIMEOUT_LEITURA = 10.0
+# Conexões persistentes (protocolo v2) podem ficar ociosas por mais tempo
+TIMEOUT_OCIOSO = 120.0
+# Máximo de registros num único comando BULK
+BULK_MAX = 10000
+# Consultas sobre a memória do servidor e limite de alunos por resposta
+COMANDOS_CONSULTA = ("LIST", "FIND", "TOP", "AGG")
+LIMITE_CONSULTA = 1000
+# SUBSCRIBE: lotes de eventos na fila de um assinante antes de desconectá-lo
+# por atraso (ele reconecta com o último seq), eventos por envio e intervalo (s)
+# para perceber QUIT/EOF do cliente
+FILA_ASSINANTE_MAX = 1000
+EVENTOS_POR_ENVIO = 1000
+INTERVALO_ASSINANTE = 1.0
+
+# Dump periódico das métricas (0 = desligado)
+METRICS_FILE = os.path.join(DATA_FOLDER, "metrics.json")
+INTERVALO_METRICAS = 0.0
+
+# Intervalo (s) entre relatórios dos tamanhos de lote do group commit
+INTERVALO_RELATORIO_LOTES = 30.0
+
+# Log em JSON-lines com rotação (--log-arquivo sem valor usa este caminho)
+LOG_FILE = os.path.join(DATA_FOLDER, "servidor.log.jsonl")
+
+# Modo --workers: espera (s) pela saída de cada worker no encerramento e antes
+# de reiniciar um worker que caiu
+TIMEOUT_ENCERRAMENTO_WORKER = 10.0
+ESPERA_REINICIO_WORKER = 1.0
+# Índice deste processo quando ele é um worker (None no processo principal)
+WORKER = None
+
+def salvar_no_central(dados: Dict[str, Any]) -> bool:
+    """
+    Envia o registro ao group commit (uma linha no journal ou um INSERT no SQLite);
+    retorna True quando o lote está durável.
+    """
     try:
-        with file_lock:
-            alunos = read_alunos()
-            alunos.append(dados)
-            write_alunos_atomic(alunos)
-        print(f"[{ts()}] [SALVO] Registro armazenado em {DATA_FILE}")
+        central.anexar(dados)
+        log_servidor.conexao(f"[SALVO] Registro armazenado em {central.destino()}")
+        return True
     except Exception as e:
-        print(f"[{ts()}] [ERRO AO SALVAR] {e}")
-        traceback.print_exc()
+        log_servidor.erro(f"[ERRO AO SALVAR] {e}", exc=True)
+        return False
+
+def relatorio_lotes() -> str:
+    st = central.estatisticas_lotes()
+    faixas = ", ".join(f"{k}: {v}" for k, v in sorted(st["distribuicao"].items(),
+                                                      key=lambda kv: int(kv[0].split("-")[-1])))
+    return (f"[LOTES] {st['registros']} registro(s) em {st['lotes']} lote(s) — "
+            f"média {st['media']}, maior {st['maior']}, fsyncs {st['fsyncs']}, "
+            f"reenvios ignorados {st['duplicados']} "
+            f"(política: {central.POLITICA_FSYNC}) | tamanhos: {faixas or '-'}")
+
+def _loop_relatorio_lotes():
+    ultimo = None
+    while True:
+        time.sleep(INTERVALO_RELATORIO_LOTES)
+        atual = central.estatisticas_lotes()["lotes"]
+        if atual != ultimo:
+            log(relatorio_lotes())
+            ultimo = atual
 
 def log(msg: str):
-    print(f"[{ts()}] {msg}")
+    log_servidor.info(msg)
+
+def interpretar_registro(texto: str, addr, client_id: str):
+    """
+    Valida uma mensagem 'nome;turma;nota' (compatível com o cliente C original)
+    ou 'nome;turma;nota;id_envio' (envio idempotente).
+    Retorna (registro, None) ou (None, mensagem_de_erro) para responder ao cliente.
+    """
+    partes = texto.split(";")
+    id_envio = partes.pop().strip() if len(partes) == 4 else None
+    if len(partes) != 3 or (id_envio is not None and not protocolo.validar_id_envio(id_envio)):
+        log_servidor.aviso(f"[FORMATO INVÁLIDO] {client_id} enviou formato inesperado.",
+                           chave="formato_invalido", cliente=client_id)
+        metricas.incrementar("registros_rejeitados")
+        return None, "ERR: formato inválido. Use nome;turma;nota[;id_envio]"
+
+    nome, turma, nota_txt = partes
+    try:
+        nota = float(nota_txt)
+        if not protocolo_binario.validar_nota(nota):
+            raise ValueError(nota_txt)  # nan/inf: mesma regra do protocolo binário
+    except:
+        log_servidor.aviso(f"[DADO INVÁLIDO] Nota inválida de {client_id}: {nota_txt}",
+                           chave="nota_invalida", cliente=client_id)
+        metricas.incrementar("registros_rejeitados")
+        return None, "ERR: nota inválida"
+
+    return _montar_registro(nome, turma, nota, addr, id_envio), None
+
+def _montar_registro(nome: str, turma: str, nota: float, addr, id_envio: str = None) -> dict:
+    registro = {"nome": nome.strip(), "turma": turma.strip(), "nota": round(nota, 2),
+                "origem_ip": addr[0], "origem_port": addr[1], "recebido_em": ts()}
+    if id_envio:
+        registro["id_envio"] = id_envio
+    return registro
 
-def tratar_cliente(conn: socket.socket, addr):
-    client_id = f"{addr[0]}:{addr[1]}"
+def _nova_sessao(addr) -> dict:
+    return {"addr": addr, "client_id": f"{addr[0]}:{addr[1]}", "versao": 1, "fechar": False,
+            "bulk": None, "anunciada": False, "assinar": None}
+
+def _iniciar_bulk(texto: str, sessao: dict):
+    """'BULK <n>': as próximas n linhas formam um único envio."""
+    try:
+        quantidade = int(texto.split(" ", 1)[1])
+    except (IndexError, ValueError):
+        return "ERR: use BULK <quantidade>"
+    if quantidade < 1 or quantidade > BULK_MAX:
+        return f"ERR: BULK aceita de 1 a {BULK_MAX} registros"
+    sessao["bulk"] = {"esperados": quantidade, "linhas": []}
+    return None
+
+def _fechar_bulk(sessao: dict) -> dict:
+    """Valida todas as linhas do BULK; só as aceitas vão para a gravação (numa única escrita)."""
+    linhas = sessao["bulk"]["linhas"]
+    sessao["bulk"] = None
+    aceitos, status = [], []
+    for texto in linhas:
+        registro, erro = interpretar_registro(texto.strip(), sessao["addr"], sessao["client_id"])
+        status.append(erro)
+        if registro:
+            aceitos.append(registro)
+    log_servidor.conexao(f"[BULK] {sessao['client_id']}: {len(linhas)} registro(s), "
+                         f"{len(aceitos)} válido(s), {len(linhas) - len(aceitos)} rejeitado(s)",
+                         cliente=sessao["client_id"], aceitos=len(aceitos))
+    return {"registros": aceitos, "bulk": status}
+
+def interpretar_linha(linha: str, sessao: dict):
+    """
+    Interpreta uma linha do protocolo v2 (ver protocolo.py).
+    Retorna um item com registros a gravar (dict), a resposta pronta (str), uma
+    consulta (callable que devolve a resposta; só roda depois que as gravações
+    anteriores da mesma conexão terminarem, ver _resolver_pipeline) ou None
+    (linha vazia ou linha consumida por um BULK ainda incompleto).
+    """
+    if sessao["bulk"] is not None:
+        sessao["bulk"]["linhas"].append(linha)
+        if len(sessao["bulk"]["linhas"]) < sessao["bulk"]["esperados"]:
+            return None
+        return _fechar_bulk(sessao)
+
+    texto = linha.strip()
+    if not texto:
+        return None
+    comando = texto.split(" ", 1)[0].upper()
+
+    if comando == "PING":
+        # checagem de saúde: não toca no armazenamento nem anuncia a conexão no log
+        metricas.incrementar("pings")
+        return "PONG"
+    _anunciar_conexao(sessao)
+
+    if comando == "HELLO":
+        try:
+            versao = min(int(texto.split(" ", 1)[1]), protocolo.PROTOCOLO_VERSAO)
+        except (IndexError, ValueError):
+            return "ERR: use HELLO <versão>"
+        if versao < 2:
+            return "ERR: versão não suportada"
+        sessao["versao"] = versao
+        return f"HELLO {versao}"
+    if comando == "QUIT":
+        sessao["fechar"] = True
+        return "BYE"
+    if comando == "BULK":
+        return _iniciar_bulk(texto, sessao)
+    if comando == "SUBSCRIBE":
+        argumento = texto[len(comando):].strip()
+        try:
+            desde = int(argumento) if argumento else None
+        except ValueError:
+            return "ERR: use SUBSCRIBE [seq]"
+        # a sessão vira feed de eventos depois das respostas pendentes
+        sessao["assinar"] = {"desde": desde}
+        return None
+    if comando == "STATS":
+        return lambda: "OK " + json.dumps(estatisticas_servidor(), ensure_ascii=False)
+    if comando in COMANDOS_CONSULTA:
+        argumento = texto[len(comando):].strip()
+        return lambda: responder_consulta(comando, argumento)
+
+    log_servidor.debug(f"[RECEBIDO] De {sessao['client_id']}: {texto}", cliente=sessao["client_id"])
+    registro, erro = interpretar_registro(texto, sessao["addr"], sessao["client_id"])
+    return erro if erro else {"registros": [registro], "bulk": None}
+
+def responder_consulta(comando: str, argumento: str) -> str:
+    """
+    Consultas sobre o conjunto em memória (central.py); resposta 'OK <json>' numa linha.
+      LIST <turma>        alunos da turma (ordem alfabética)
+      FIND <prefixo>      alunos cujo nome começa com o prefixo (sem acentos/maiúsculas)
+      TOP <n> [turma]     n maiores notas (geral ou da turma)
+      AGG [turma]         quantidade/média/desvio/mínimo/máximo/histograma por turma
+    """
+    if comando == "LIST":
+        if not argumento:
+            return "ERR: use LIST <turma>"
+        dados = {"turma": argumento, "alunos": central.listar_turma(argumento)}
+    elif comando == "FIND":
+        if not argumento:
+            return "ERR: use FIND <prefixo>"
+        dados = {"alunos": central.buscar_prefixo(argumento, LIMITE_CONSULTA)}
+    elif comando == "TOP":
+        partes = argumento.split(" ", 1)
+        try:
+            n = int(partes[0])
+        except ValueError:
+            return "ERR: use TOP <n> [turma]"
+        turma = partes[1].strip() if len(partes) > 1 else None
+        dados = {"alunos": central.top_notas(max(0, min(n, LIMITE_CONSULTA)), turma)}
+    else:
+        dados = {"turmas": central.resumo_turmas(argumento or None)}
+    return "OK " + json.dumps(dados, ensure_ascii=False)
+
+def _interpretar_linhas(linhas: list, sessao: dict) -> list:
+    itens = []
+    with metricas.cronometro("parse"):
+        for linha in linhas:
+            item = interpretar_linha(linha, sessao)
+            if item is not None:
+                itens.append(item)
+            if sessao["fechar"] or sessao["assinar"] is not None:
+                break
+    return itens
+
+def _resolver_pipeline(itens: list, anexar_grupos) -> tuple:
+    """
+    Grava e responde um bloco do pipeline na ordem em que chegou: antes de cada
+    consulta, os registros enviados antes dela na mesma conexão são gravados
+    (anexar_grupos espera o group commit), então LIST/FIND/TOP/AGG/STATS
+    enxergam essas gravações. Sem consultas no meio, o bloco inteiro continua
+    indo num único anexar_grupos.
+    Devolve (itens com as consultas trocadas pela resposta, resultados das gravações).
+    """
+    respondidos, resultados, pendentes = [], [], []
+    for item in itens:
+        if callable(item):
+            if pendentes:
+                resultados.extend(anexar_grupos(pendentes))
+                pendentes = []
+            item = item()
+        elif isinstance(item, dict):
+            pendentes.append(item["registros"])
+        respondidos.append(item)
+    if pendentes:
+        resultados.extend(anexar_grupos(pendentes))
+    return respondidos, resultados
+
+async def _resolver_pipeline_async(itens: list, loop) -> tuple:
+    """
+    Versão asyncio de _resolver_pipeline (gravações pelos futuros de _enfileirar_async).
+    As consultas rodam no executor, como o assinar() do SUBSCRIBE: num worker elas
+    esperam a resposta do processo escritor e não podem parar o loop.
+    """
+    respondidos, resultados, pendentes = [], [], []
+    for item in itens:
+        if callable(item):
+            if pendentes:
+                resultados.extend(await asyncio.gather(*pendentes))
+                pendentes = []
+            item = await loop.run_in_executor(None, item)
+        elif isinstance(item, dict):
+            pendentes.append(_enfileirar_async(loop, item["registros"]))
+        respondidos.append(item)
+    if pendentes:
+        resultados.extend(await asyncio.gather(*pendentes))
+    return respondidos, resultados
+
+def _resposta_bulk(status: list, resultado) -> str:
+    """
+    Cabeçalho 'BULK <aceitos> <rejeitados>' seguido de uma linha por registro,
+    na ordem do envio: '<n> OK' ou '<n> ERR: motivo'.
+    """
+    falha_gravacao = isinstance(resultado, Exception)
+    linhas = []
+    aceitos = 0
+    for i, erro in enumerate(status, start=1):
+        if erro is None and falha_gravacao:
+            erro = "ERR: falha ao salvar no servidor"
+        if erro is None:
+            aceitos += 1
+            linhas.append(f"{i} OK")
+        else:
+            linhas.append(f"{i} {erro}")
+    return "\n".join([f"BULK {aceitos} {len(status) - aceitos}"] + linhas)
+
+def _montar_respostas(itens: list, resultados: list, client_id: str) -> list:
+    """Troca cada item de gravação pelo resultado ("OK" / "ERR: ..." / bloco BULK)."""
+    respostas = []
+    gravados = 0
+    resultados = iter(resultados)
+    for item in itens:
+        if isinstance(item, str):
+            respostas.append(item)
+            continue
+        resultado = next(resultados)
+        if isinstance(resultado, Exception):
+            log_servidor.erro(f"[ERRO AO SALVAR] {resultado}", cliente=client_id)
+        else:
+            gravados += sum(1 for r in resultado if not r.get("duplicado"))
+        if item["bulk"] is not None:
+            respostas.append(_resposta_bulk(item["bulk"], resultado))
+        elif isinstance(resultado, Exception):
+            respostas.append("ERR: falha ao salvar no servidor")
+        else:
+            respostas.append("OK")
+    if gravados:
+        log_servidor.conexao(f"[SALVO] {gravados} registro(s) de {client_id} em {central.destino()}",
+                             cliente=client_id, registros=gravados)
+    return respostas
+
+def _detectar_modo(inicio: bytes):
+    """'binario', 'linhas' (v2) ou 'legado' pelos primeiros bytes; None se faltam bytes."""
+    binario = protocolo_binario.detectar(inicio)
+    if binario is None:
+        return None
+    if binario:
+        return "binario"
+    linhas = protocolo.detectar_modo(inicio)
+    if linhas is None:
+        return None
+    return "linhas" if linhas else "legado"
+
+def _saudacao_binaria(buffer: bytes):
+    """
+    Lê a saudação do protocolo binário.
+    Retorna (resposta, resto, aceita) ou None se ainda faltam bytes.
+    """
+    versao, resto = protocolo_binario.ler_saudacao(buffer)
+    if versao is None:
+        return None
+    if versao < 1:
+        erro = protocolo_binario.codificar_erro(0, protocolo_binario.STATUS_VERSAO_NAO_SUPORTADA)
+        return erro, resto, False
+    return protocolo_binario.codificar_saudacao(min(versao, protocolo_binario.VERSAO_BINARIA)), resto, True
+
+def _interpretar_quadros(quadros: list, sessao: dict) -> list:
+    """
+    Quadros do protocolo binário -> itens: resposta pronta (bytes: ERRO/BYE) ou
+    {"registros", "status", "id"} com os registros a gravar numa única escrita.
+    """
+    pb = protocolo_binario
+    itens = []
+    with metricas.cronometro("parse"):
+        for tipo, id_quadro, payload in quadros:
+            if tipo == pb.QUIT:
+                sessao["fechar"] = True
+                itens.append(pb.codificar_bye(id_quadro))
+                break
+            if tipo not in (pb.LOTE, pb.LOTE_ID):
+                itens.append(pb.codificar_erro(id_quadro, pb.STATUS_QUADRO_INVALIDO,
+                                               f"tipo de quadro desconhecido: {tipo}"))
+                continue
+            try:
+                lote = pb.decodificar_lote(payload, com_id=tipo == pb.LOTE_ID)
+            except ValueError as e:
+                log_servidor.aviso(f"[QUADRO INVÁLIDO] {sessao['client_id']}: {e}",
+                                   chave="quadro_invalido", cliente=sessao["client_id"])
+                itens.append(pb.codificar_erro(id_quadro, pb.STATUS_QUADRO_INVALIDO, str(e)))
+                continue
+            if not lote or len(lote) > BULK_MAX:
+                itens.append(pb.codificar_erro(id_quadro, pb.STATUS_LOTE_GRANDE,
+                                               f"lote aceita de 1 a {BULK_MAX} registros"))
+                continue
+            aceitos, status = [], []
+            for nome, turma, nota, *id_envio in lote:
+                id_envio = id_envio[0] if id_envio else None
+                if id_envio is not None and not protocolo.validar_id_envio(id_envio):
+                    metricas.incrementar("registros_rejeitados")
+                    status.append(pb.STATUS_FORMATO_INVALIDO)
+                    continue
+                if not pb.validar_nota(nota):
+                    metricas.incrementar("registros_rejeitados")
+                    status.append(pb.STATUS_NOTA_INVALIDA)
+                    continue
+                aceitos.append(_montar_registro(nome, turma, nota, sessao["addr"], id_envio))
+                status.append(pb.STATUS_OK)
+            if len(aceitos) < len(lote):
+                log_servidor.aviso(f"[DADO INVÁLIDO] {len(lote) - len(aceitos)} registro(s) inválido(s) de "
+                                   f"{sessao['client_id']}", chave="nota_invalida", cliente=sessao["client_id"])
+            itens.append({"registros": aceitos, "status": status, "id": id_quadro})
+    return itens
+
+def _respostas_binarias(itens: list, resultados: list, client_id: str) -> bytes:
+    """Troca cada LOTE pelo quadro RESULTADO (status por registro, na ordem do envio)."""
+    pb = protocolo_binario
+    partes = []
+    gravados = 0
+    resultados = iter(resultados)
+    for item in itens:
+        if isinstance(item, bytes):
+            partes.append(item)
+            continue
+        resultado = next(resultados)
+        status = item["status"]
+        if isinstance(resultado, Exception):
+            log_servidor.erro(f"[ERRO AO SALVAR] {resultado}", cliente=client_id)
+            status = [pb.STATUS_FALHA_GRAVACAO if s == pb.STATUS_OK else s for s in status]
+        else:
+            gravados += sum(1 for r in resultado if not r.get("duplicado"))
+        partes.append(pb.codificar_resultado(item["id"], status))
+    if gravados:
+        log_servidor.conexao(f"[SALVO] {gravados} registro(s) de {client_id} em {central.destino()}",
+                             cliente=client_id, registros=gravados)
+    return b"".join(partes)
+
+def _registrar_conexao(client_id: str):
     with lock_clients:
         active_clients.add(client_id)
-    log(f"[NOVO CLIENTE] {client_id} — Conexões ativas: {len(active_clients)}")
+        total = len(active_clients)
+    metricas.incrementar("conexoes")
+    metricas.definir("conexoes_ativas", total)
+
+def _anunciar_conexao(sessao: dict):
+    """
+    Loga [NOVO CLIENTE] na primeira mensagem que não é PING; conexões de
+    checagem de saúde (PING ou sem dados) não aparecem no log.
+    """
+    if sessao["anunciada"]:
+        return
+    sessao["anunciada"] = True
+    with lock_clients:
+        total = len(active_clients)
+    log_servidor.conexao(f"[NOVO CLIENTE] {sessao['client_id']} — Conexões ativas: {total}",
+                         cliente=sessao["client_id"], ativas=total)
+
+def _remover_conexao(sessao: dict):
+    client_id = sessao["client_id"]
+    with lock_clients:
+        active_clients.discard(client_id)
+        total = len(active_clients)
+    metricas.definir("conexoes_ativas", total)
+    if sessao["anunciada"]:
+        log_servidor.conexao(f"[DESCONECTADO] {client_id} — Conexões ativas: {total}",
+                             cliente=client_id, ativas=total)
+
+def _alterar_assinantes(delta: int):
+    global assinantes_ativos
+    with lock_clients:
+        assinantes_ativos += delta
+        total = assinantes_ativos
+    metricas.definir("assinantes_ativos", total)
+
+def _formatar_eventos(eventos: list) -> bytes:
+    """Eventos do central -> linhas 'EVT <seq> <json do aluno>' / 'RELOAD <seq>'."""
+    linhas = []
+    for evento in eventos:
+        if evento["tipo"] == "inserido":
+            linhas.append(f"EVT {evento['seq']} {json.dumps(evento['aluno'], ensure_ascii=False)}")
+        else:
+            linhas.append(f"RELOAD {evento['seq']}")
+    return ("\n".join(linhas) + "\n").encode("utf-8") if linhas else b""
+
+def _inicio_assinatura(sessao: dict, atual: int, perdidos: list) -> list:
+    """Loga a assinatura e monta o cabeçalho + eventos perdidos, em blocos de EVENTOS_POR_ENVIO."""
+    metricas.incrementar("assinaturas")
+    _alterar_assinantes(1)
+    log_servidor.conexao(f"[SUBSCRIBE] {sessao['client_id']} a partir do seq {sessao['assinar']['desde']} "
+                         f"(atual {atual}, {len(perdidos)} evento(s) perdido(s))", cliente=sessao["client_id"])
+    blocos = [f"SUBSCRIBED {atual}\n".encode("utf-8")]
+    for i in range(0, len(perdidos), EVENTOS_POR_ENVIO):
+        blocos.append(_formatar_eventos(perdidos[i:i + EVENTOS_POR_ENVIO]))
+    return blocos
+
+def _saida_assinante(data: bytes):
+    """Entrada do cliente durante o SUBSCRIBE: só QUIT (ou EOF) importa. Retorna a resposta final ou None."""
+    if not data:
+        return b""
+    if b"QUIT" in data.upper():
+        return b"BYE\n"
+    return None
+
+def _sessao_assinatura(conn: socket.socket, sessao: dict):
+    """SUBSCRIBE: a conexão só recebe eventos do feed até QUIT, EOF, atraso ou encerramento."""
+    fila = queue.Queue(maxsize=FILA_ASSINANTE_MAX)
+    atrasado = threading.Event()
 
+    def receber(eventos):
+        # thread escritora: nunca bloqueia
+        try:
+            fila.put_nowait(eventos)
+        except queue.Full:
+            atrasado.set()
+
+    try:
+        atual, perdidos = central.assinar(receber, sessao["assinar"]["desde"])
+    except Exception as e:
+        conn.sendall(f"ERR: {e}\n".encode("utf-8"))
+        return
     try:
-        # Recebe dados (limite razoável)
+        for bloco in _inicio_assinatura(sessao, atual, perdidos):
+            conn.sendall(bloco)
+        fim = False
+        while not fim:
+            try:
+                lote = [fila.get(timeout=INTERVALO_ASSINANTE)]
+            except queue.Empty:
+                lote = []
+            while lote and len(lote) < EVENTOS_POR_ENVIO:
+                try:
+                    lote.append(fila.get_nowait())
+                except queue.Empty:
+                    break
+            if None in lote:
+                # armazenamento encerrado: entrega o que veio antes e fecha
+                lote, fim = lote[:lote.index(None)], True
+            if atrasado.is_set():
+                conn.sendall(b"ERR: assinante atrasado; reconecte com SUBSCRIBE <seq>\n")
+                return
+            eventos = [e for bloco in lote for e in bloco]
+            if eventos:
+                conn.sendall(_formatar_eventos(eventos))
+            if select.select([conn], [], [], 0)[0]:
+                resposta = _saida_assinante(conn.recv(4096))
+                if resposta is not None:
+                    conn.sendall(resposta)
+                    return
+    finally:
+        central.cancelar_assinatura(receber)
+        _alterar_assinantes(-1)
+
+def estatisticas_servidor() -> dict:
+    """Métricas (metricas.py) + group commit + tamanho da memória: resposta do STATS."""
+    dados = metricas.instantaneo()
+    dados["lotes"] = central.estatisticas_lotes()
+    dados["alunos_em_memoria"] = central.total_alunos()
+    dados["logs_descartados"] = log_servidor.descartadas()
+    if WORKER is not None:
+        # contadores e latências acima são deste worker; lotes e memória são do escritor
+        dados["worker"] = WORKER
+        dados["pid"] = os.getpid()
+    return dados
+
+def _loop_dump_metricas():
+    while True:
+        time.sleep(INTERVALO_METRICAS)
+        try:
+            metricas.salvar(METRICS_FILE, {"lotes": central.estatisticas_lotes(),
+                                           "alunos_em_memoria": central.total_alunos()})
+        except Exception as e:
+            log_servidor.aviso(f"[ERRO MÉTRICAS] {e}", chave="metricas")
+
+def _sessao_linhas(conn: socket.socket, sessao: dict, buffer: bytes):
+    """Conexão persistente (protocolo v2): processa linhas em pipeline até QUIT ou EOF."""
+    sessao["versao"] = protocolo.PROTOCOLO_VERSAO
+    conn.settimeout(TIMEOUT_OCIOSO)
+    while True:
+        try:
+            linhas, buffer = protocolo.extrair_linhas(buffer)
+        except ValueError as e:
+            conn.sendall(f"ERR: {e}\n".encode("utf-8"))
+            return
+        if linhas:
+            itens = _interpretar_linhas(linhas, sessao)
+            # registros do bloco entram juntos no group commit (separados só por consultas)
+            itens, resultados = _resolver_pipeline(itens, central.anexar_grupos)
+            respostas = _montar_respostas(itens, resultados, sessao["client_id"])
+            if respostas:
+                with metricas.cronometro("envio"):
+                    conn.sendall(("\n".join(respostas) + "\n").encode("utf-8"))
+            if sessao["assinar"] is not None:
+                _sessao_assinatura(conn, sessao)
+                return
+            if sessao["fechar"]:
+                return
+        data = conn.recv(65536)
+        if not data:
+            return
+        buffer += data
+
+def _sessao_binaria(conn: socket.socket, sessao: dict, buffer: bytes):
+    """Conexão no protocolo binário: quadros LOTE (em pipeline) até QUIT ou EOF."""
+    conn.settimeout(TIMEOUT_OCIOSO)
+    saudacao = _saudacao_binaria(buffer)
+    while saudacao is None:
+        data = conn.recv(4096)
+        if not data:
+            return
+        buffer += data
+        saudacao = _saudacao_binaria(buffer)
+    resposta, buffer, aceita = saudacao
+    conn.sendall(resposta)
+    if not aceita:
+        return
+    while True:
+        try:
+            quadros, buffer = protocolo_binario.extrair_quadros(buffer)
+        except ValueError as e:
+            conn.sendall(protocolo_binario.codificar_erro(0, protocolo_binario.STATUS_QUADRO_INVALIDO, str(e)))
+            return
+        if quadros:
+            itens = _interpretar_quadros(quadros, sessao)
+            resultados = central.anexar_grupos([i["registros"] for i in itens if isinstance(i, dict)])
+            with metricas.cronometro("envio"):
+                conn.sendall(_respostas_binarias(itens, resultados, sessao["client_id"]))
+            if sessao["fechar"]:
+                return
+        data = conn.recv(65536)
+        if not data:
+            return
+        buffer += data
+
+def tratar_cliente(conn: socket.socket, addr, aceito_em: float = None):
+    aceito_em = aceito_em or time.perf_counter()
+    sessao = _nova_sessao(addr)
+    client_id = sessao["client_id"]
+    _registrar_conexao(client_id)
+
+    try:
+        # Recebe dados (limite razoável); clientes lentos não prendem a thread para sempre
+        conn.settimeout(TIMEOUT_LEITURA)
         data = conn.recv(4096)
         if not data:
-            log(f"[IGNORADO] Conexão sem dados de {client_id}")
+            log_servidor.debug(f"[IGNORADO] Conexão sem dados de {client_id}", cliente=client_id)
+            return
+        metricas.registrar("aceite_recv", time.perf_counter() - aceito_em)
+
+        # Binário, v2 (linhas) ou legado (uma mensagem por conexão)?
+        modo = _detectar_modo(data)
+        while modo is None:
+            mais = conn.recv(4096)
+            if not mais:
+                modo = "legado"
+                break
+            data += mais
+            modo = _detectar_modo(data)
+        if modo == "binario":
+            _anunciar_conexao(sessao)
+            _sessao_binaria(conn, sessao, data)
+            return
+        if modo == "linhas":
+            _sessao_linhas(conn, sessao, data)
             return
 
         texto = data.decode("utf-8", errors="replace").strip()
-        log(f"[RECEBIDO] De {client_id}: {texto}")
+        if texto.upper() == "PING":
+            metricas.incrementar("pings")
+            conn.sendall(b"PONG")
+            return
+        _anunciar_conexao(sessao)
+        log_servidor.conexao(f"[RECEBIDO] De {client_id}: {texto}", cliente=client_id)
 
-        # Esperamos formato: nome;turma;nota  (compatível com cliente C original)
-        partes = texto.split(";")
-        if len(partes) != 3:
-            log(f"[FORMATO INVÁLIDO] {client_id} enviou formato inesperado.")
+        with metricas.cronometro("parse"):
+            registro, erro = interpretar_registro(texto, addr, client_id)
+        if erro:
             try:
-                conn.sendall("ERR: formato inválido. Use nome;turma;nota".encode("utf-8"))
+                conn.sendall(erro.encode("utf-8"))
             except:
                 pass
             return
 
-        nome, turma, nota_txt = partes
-        try:
-            nota = float(nota_txt)
-        except:
-            log(f"[DADO INVÁLIDO] Nota inválida de {client_id}: {nota_txt}")
+        # Salva via group commit; só confirma depois que o lote está durável
+        if not salvar_no_central(registro):
             try:
-                conn.sendall("ERR: nota inválida".encode("utf-8"))
-
+                conn.sendall("ERR: falha ao salvar no servidor".encode("utf-8"))
             except:
                 pass
             return
 
-        registro = {"nome": nome.strip(), "turma": turma.strip(), "nota": round(nota, 2),
-                    "origem_ip": addr[0], "origem_port": addr[1], "recebido_em": ts()}
-
-        # Salva com proteção de concorrência
-        salvar_no_central(registro)
-
         # Envia confirmação
         try:
-            conn.sendall(b"OK")
-            log(f"[RESPOSTA] OK enviado para {client_id}")
+            with metricas.cronometro("envio"):
+                conn.sendall(b"OK")
+            log_servidor.conexao(f"[RESPOSTA] OK enviado para {client_id}", cliente=client_id)
         except Exception as e:
-            log(f"[ERRO] Falha ao enviar resposta para {client_id}: {e}")
+            log_servidor.aviso(f"[ERRO] Falha ao enviar resposta para {client_id}: {e}",
+                               chave="falha_envio", cliente=client_id)
 
+    except socket.timeout:
+        metricas.incrementar("timeouts")
+        log_servidor.aviso(f"[TIMEOUT] {client_id} inativo, conexão encerrada",
+                           chave="timeout", cliente=client_id)
     except Exception as e:
-        log(f"[ERRO NO TRATAMENTO] Cliente {client_id}: {e}")
-        traceback.print_exc()
+        metricas.incrementar("erros_conexao")
+        log_servidor.erro(f"[ERRO NO TRATAMENTO] Cliente {client_id}: {e}", exc=True, cliente=client_id)
     finally:
         try:
             conn.close()
         except:
             pass
-        with lock_clients:
-            if client_id in active_clients:
-                active_clients.remove(client_id)
-        log(f"[DESCONECTADO] {client_id} — Conexões ativas: {len(active_clients)}")
+        _remover_conexao(sessao)
+
+# -------------------------------------------------------------
+# Engine asyncio: um único event loop atende todas as conexões.
+# A gravação vai para a thread escritora do central (group commit) e o
+# loop apenas aguarda o retorno, sem bloquear outras conexões.
+# -------------------------------------------------------------
+def _enfileirar_async(loop, registros: list):
+    """
+    Enfileira os registros no central (uma única escrita) e devolve um futuro do
+    loop com a lista gravada ou a exceção.
+    """
+    futuro = loop.create_future()
+    if not registros:
+        futuro.set_result([])
+        return futuro
+
+    def concluir(gravados, erro):
+        # chamado na thread escritora; devolve o resultado ao event loop
+        loop.call_soon_threadsafe(_resolver_futuro, futuro, erro if erro is not None else gravados)
+
+    central.enfileirar_lote(registros, concluir)
+    return futuro
+
+def _resolver_futuro(futuro, resultado):
+    if not futuro.done():
+        futuro.set_result(resultado)
+
+async def salvar_no_central_async(dados: Dict[str, Any]) -> bool:
+    """Versão não bloqueante de salvar_no_central para o event loop."""
+    resultado = await _enfileirar_async(asyncio.get_running_loop(), [dados])
+    if isinstance(resultado, Exception):
+        log_servidor.erro(f"[ERRO AO SALVAR] {resultado}")
+        return False
+    log_servidor.conexao(f"[SALVO] Registro armazenado em {central.destino()}")
+    return True
+
+async def _sessao_linhas_async(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                               sessao: dict, buffer: bytes):
+    """Versão asyncio de _sessao_linhas."""
+    sessao["versao"] = protocolo.PROTOCOLO_VERSAO
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            linhas, buffer = protocolo.extrair_linhas(buffer)
+        except ValueError as e:
+            writer.write(f"ERR: {e}\n".encode("utf-8"))
+            await writer.drain()
+            return
+        if linhas:
+            itens = _interpretar_linhas(linhas, sessao)
+            itens, resultados = await _resolver_pipeline_async(itens, loop)
+            respostas = _montar_respostas(itens, resultados, sessao["client_id"])
+            if respostas:
+                t0 = time.perf_counter()
+                writer.write(("\n".join(respostas) + "\n").encode("utf-8"))
+                await writer.drain()
+                metricas.registrar("envio", time.perf_counter() - t0)
+            if sessao["assinar"] is not None:
+                await _sessao_assinatura_async(reader, writer, sessao)
+                return
+            if sessao["fechar"]:
+                return
+        data = await asyncio.wait_for(reader.read(65536), TIMEOUT_OCIOSO)
+        if not data:
+            return
+        buffer += data
+
+async def _sessao_assinatura_async(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                                   sessao: dict):
+    """Versão asyncio de _sessao_assinatura."""
+    loop = asyncio.get_running_loop()
+    fila = asyncio.Queue()
+    estado = {"atrasado": False}
+
+    def entregar(eventos):
+        if fila.qsize() >= FILA_ASSINANTE_MAX:
+            estado["atrasado"] = True
+        fila.put_nowait(eventos)
+
+    def receber(eventos):
+        # thread escritora: repassa ao event loop sem bloquear
+        try:
+            loop.call_soon_threadsafe(entregar, eventos)
+        except RuntimeError:
+            pass  # loop já encerrado
+
+    try:
+        # assinar() pode esperar pelo journal_lock (ou pelo escritor remoto)
+        atual, perdidos = await loop.run_in_executor(None, central.assinar, receber, sessao["assinar"]["desde"])
+    except Exception as e:
+        writer.write(f"ERR: {e}\n".encode("utf-8"))
+        await writer.drain()
+        return
+    leitura = proximo = None
+    try:
+        for bloco in _inicio_assinatura(sessao, atual, perdidos):
+            writer.write(bloco)
+            await writer.drain()
+        leitura = asyncio.ensure_future(reader.read(4096))
+        proximo = asyncio.ensure_future(fila.get())
+        while True:
+            feitos, _ = await asyncio.wait({leitura, proximo}, return_when=asyncio.FIRST_COMPLETED)
+            if proximo in feitos:
+                lote = [proximo.result()]
+                while not fila.empty() and len(lote) < EVENTOS_POR_ENVIO:
+                    lote.append(fila.get_nowait())
+                fim = None in lote
+                if fim:
+                    lote = lote[:lote.index(None)]
+                if estado["atrasado"]:
+                    writer.write(b"ERR: assinante atrasado; reconecte com SUBSCRIBE <seq>\n")
+                    await writer.drain()
+                    return
+                dados = _formatar_eventos([e for bloco in lote for e in bloco])
+                if dados:
+                    writer.write(dados)
+                    await writer.drain()
+                if fim:
+                    return
+                proximo = asyncio.ensure_future(fila.get())
+            if leitura in feitos:
+                resposta = _saida_assinante(leitura.result())
+                if resposta is not None:
+                    writer.write(resposta)
+                    await writer.drain()
+                    return
+                leitura = asyncio.ensure_future(reader.read(4096))
+    finally:
+        for tarefa in (leitura, proximo):
+            if tarefa is not None and not tarefa.done():
+                tarefa.cancel()
+        central.cancelar_assinatura(receber)
+        _alterar_assinantes(-1)
+
+async def _sessao_binaria_async(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                                sessao: dict, buffer: bytes):
+    """Versão asyncio de _sessao_binaria."""
+    loop = asyncio.get_running_loop()
+    saudacao = _saudacao_binaria(buffer)
+    while saudacao is None:
+        data = await asyncio.wait_for(reader.read(4096), TIMEOUT_OCIOSO)
+        if not data:
+            return
+        buffer += data
+        saudacao = _saudacao_binaria(buffer)
+    resposta, buffer, aceita = saudacao
+    writer.write(resposta)
+    await writer.drain()
+    if not aceita:
+        return
+    while True:
+        try:
+            quadros, buffer = protocolo_binario.extrair_quadros(buffer)
+        except ValueError as e:
+            writer.write(protocolo_binario.codificar_erro(0, protocolo_binario.STATUS_QUADRO_INVALIDO, str(e)))
+            await writer.drain()
+            return
+        if quadros:
+            itens = _interpretar_quadros(quadros, sessao)
+            futuros = [_enfileirar_async(loop, i["registros"]) for i in itens if isinstance(i, dict)]
+            resultados = await asyncio.gather(*futuros)
+            t0 = time.perf_counter()
+            writer.write(_respostas_binarias(itens, resultados, sessao["client_id"]))
+            await writer.drain()
+            metricas.registrar("envio", time.perf_counter() - t0)
+            if sessao["fechar"]:
+                return
+        data = await asyncio.wait_for(reader.read(65536), TIMEOUT_OCIOSO)
+        if not data:
+            return
+        buffer += data
+
+async def tratar_cliente_async(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    aceito_em = time.perf_counter()
+    addr = writer.get_extra_info("peername")[:2]
+    sessao = _nova_sessao(addr)
+    client_id = sessao["client_id"]
+    _registrar_conexao(client_id)
+
+    async def responder(resposta: bytes):
+        t0 = time.perf_counter()
+        writer.write(resposta)
+        await writer.drain()
+        metricas.registrar("envio", time.perf_counter() - t0)
+
+    try:
+        data = await asyncio.wait_for(reader.read(4096), TIMEOUT_LEITURA)
+        if not data:
+            log_servidor.debug(f"[IGNORADO] Conexão sem dados de {client_id}", cliente=client_id)
+            return
+        metricas.registrar("aceite_recv", time.perf_counter() - aceito_em)
+
+        modo = _detectar_modo(data)
+        while modo is None:
+            mais = await asyncio.wait_for(reader.read(4096), TIMEOUT_LEITURA)
+            if not mais:
+                modo = "legado"
+                break
+            data += mais
+            modo = _detectar_modo(data)
+        if modo == "binario":
+            _anunciar_conexao(sessao)
+            await _sessao_binaria_async(reader, writer, sessao, data)
+            return
+        if modo == "linhas":
+            await _sessao_linhas_async(reader, writer, sessao, data)
+            return
+
+        texto = data.decode("utf-8", errors="replace").strip()
+        if texto.upper() == "PING":
+            metricas.incrementar("pings")
+            await responder(b"PONG")
+            return
+        _anunciar_conexao(sessao)
+        log_servidor.conexao(f"[RECEBIDO] De {client_id}: {texto}", cliente=client_id)
+
+        with metricas.cronometro("parse"):
+            registro, erro = interpretar_registro(texto, addr, client_id)
+        if erro:
+            await responder(erro.encode("utf-8"))
+            return
+
+        if not await salvar_no_central_async(registro):
+            await responder("ERR: falha ao salvar no servidor".encode("utf-8"))
+            return
+
+        try:
+            await responder(b"OK")
+            log_servidor.conexao(f"[RESPOSTA] OK enviado para {client_id}", cliente=client_id)
+        except Exception as e:
+            log_servidor.aviso(f"[ERRO] Falha ao enviar resposta para {client_id}: {e}",
+                               chave="falha_envio", cliente=client_id)
+
+    except asyncio.TimeoutError:
+        metricas.incrementar("timeouts")
+        log_servidor.aviso(f"[TIMEOUT] {client_id} inativo, conexão encerrada",
+                           chave="timeout", cliente=client_id)
+    except asyncio.CancelledError:
+        # servidor encerrando: fecha a conexão sem resposta
+        pass
+    except Exception as e:
+        metricas.incrementar("erros_conexao")
+        log_servidor.erro(f"[ERRO NO TRATAMENTO] Cliente {client_id}: {e}", exc=True, cliente=client_id)
+    finally:
+        try:
+            writer.close()
+        except:
+            pass
+        _remover_conexao(sessao)
 
-def iniciar_servidor():
-    """Inicia o servidor e aceita conexões em loop; cria threads para cada cliente."""
+async def _servir_asyncio(servidor: socket.socket):
+    global _encerrando
+    loop = asyncio.get_running_loop()
+    parar = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            # encerra pelo próprio loop, sem levantar SystemExit dentro das tarefas
+            loop.add_signal_handler(sig, parar.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: continua valendo _signal_handler / KeyboardInterrupt
+
+    srv = await asyncio.start_server(tratar_cliente_async, sock=servidor)
+    async with srv:
+        await parar.wait()
+    _encerrando = True
+    log("[SINAL] Encerrando servidor via sinal.")
+
+def _aceitar_threads(servidor: socket.socket):
+    """Loop de accept da engine 'threads': uma thread por conexão."""
+    while True:
+        try:
+            conn, addr = servidor.accept()
+            # Cada cliente tratado em thread separada
+            threading.Thread(target=tratar_cliente, args=(conn, addr, time.perf_counter()),
+                             daemon=True).start()
+        except KeyboardInterrupt:
+            log("[ENCERRANDO] Recebido Ctrl+C. Encerrando servidor.")
+            break
+        except Exception as e:
+            log_servidor.erro(f"[ERRO ACCEPT] {e}", exc=True)
+
+def _criar_socket(reuseport: bool = False) -> socket.socket:
+    servidor = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    servidor.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuseport:
+        # cada worker abre o seu socket na mesma porta; o kernel distribui as conexões
+        servidor.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    servidor.bind((HOST, PORT))
+    servidor.listen(BACKLOG)  # backlog maior para suportar bursts
+    return servidor
+
+def _servir(servidor: socket.socket, engine: str):
+    """Atende conexões no socket até Ctrl+C / sinal, com a engine escolhida."""
+    if engine == "asyncio":
+        servidor.setblocking(False)
+        try:
+            asyncio.run(_servir_asyncio(servidor))
+        except KeyboardInterrupt:
+            log("[ENCERRANDO] Recebido Ctrl+C. Encerrando servidor.")
+        finally:
+            # o loop devolve SIGTERM ao padrão ao fechar; sinais repetidos não
+            # podem matar o processo antes de o journal ser compactado
+            _instalar_sinais()
+    else:
+        _aceitar_threads(servidor)
+
+def _reuseport_disponivel() -> bool:
+    # fora do Linux o SO_REUSEPORT não balanceia as conexões entre os processos
+    return hasattr(socket, "SO_REUSEPORT") and sys.platform.startswith("linux")
+
+def _processo_worker(indice: int, opcoes: dict, conexao, servidor: socket.socket = None):
+    """
+    Ponto de entrada de cada worker (--workers): accept + protocolo neste processo;
+    gravações e consultas vão para o processo principal pelo pipe 'conexao'.
+    """
+    global HOST, PORT, INTERVALO_METRICAS, METRICS_FILE, WORKER
+    WORKER = indice
+    HOST, PORT = opcoes["host"], opcoes["port"]
+    INTERVALO_METRICAS = opcoes["metricas_intervalo"]
+    METRICS_FILE = os.path.join(DATA_FOLDER, f"metrics.w{indice}.json")
+    config_log = opcoes["log"]
+    if config_log["arquivo"]:
+        # um arquivo por processo: a rotação não é segura entre processos
+        base, ext = os.path.splitext(config_log["arquivo"])
+        config_log = dict(config_log, arquivo=f"{base}.w{indice}{ext}")
+    log_servidor.configurar(**config_log, processo=f"W{indice}")
+    central.usar_remoto(escritor_remoto.EscritorRemoto(conexao))
+    try:
+        if servidor is None:
+            servidor = _criar_socket(reuseport=True)
+        log(f"[WORKER] pid {os.getpid()} atendendo {HOST}:{PORT} (engine: {opcoes['engine']})")
+        if INTERVALO_METRICAS > 0:
+            threading.Thread(target=_loop_dump_metricas, daemon=True).start()
+        _servir(servidor, opcoes["engine"])
+    except Exception as e:
+        log_servidor.erro(f"[ERRO WORKER] {e}", exc=True)
+        sys.exit(1)
+    finally:
+        try:
+            if servidor:
+                servidor.close()
+        except:
+            pass
+        conexao.close()
+        log_servidor.encerrar()
+
+def _iniciar_workers(engine: str, workers: int):
+    """
+    Processo principal do modo --workers: único escritor do journal (central.py),
+    atende cada worker por um pipe e reinicia os que caírem.
+    """
+    # spawn (e não fork): o processo principal já tem threads do central e do log
+    ctx = multiprocessing.get_context("spawn")
+    reuseport = _reuseport_disponivel()
+    compartilhado = None if reuseport else _criar_socket()
+    opcoes = {"host": HOST, "port": PORT, "engine": engine,
+              "metricas_intervalo": INTERVALO_METRICAS, "log": log_servidor.configuracao()}
+    processos = {}
+
+    def iniciar_worker(indice: int):
+        mestre, filho = ctx.Pipe()
+        processo = ctx.Process(target=_processo_worker, args=(indice, opcoes, filho, compartilhado),
+                               name=f"worker-{indice}", daemon=True)
+        processo.start()
+        filho.close()
+        threading.Thread(target=escritor_remoto.atender, args=(mestre, f"W{indice}"),
+                         daemon=True).start()
+        processos[indice] = processo
+
+    try:
+        for indice in range(1, workers + 1):
+            iniciar_worker(indice)
+        log(f"[WORKERS] {workers} processo(s) em {HOST}:{PORT} — "
+            f"{'SO_REUSEPORT' if reuseport else 'socket compartilhado'}; escritor: pid {os.getpid()}")
+        while processos:
+            multiprocessing.connection.wait([p.sentinel for p in processos.values()])
+            for indice, processo in list(processos.items()):
+                if processo.is_alive():
+                    continue
+                del processos[indice]
+                if not _encerrando:
+                    log_servidor.erro(f"[WORKER] W{indice} terminou (código {processo.exitcode}); reiniciando.")
+                    time.sleep(ESPERA_REINICIO_WORKER)
+                    iniciar_worker(indice)
+    finally:
+        for processo in processos.values():
+            if processo.is_alive():
+                processo.terminate()
+        for processo in processos.values():
+            processo.join(TIMEOUT_ENCERRAMENTO_WORKER)
+        if compartilhado:
+            compartilhado.close()
+
+def iniciar_servidor(engine: str = "threads", workers: int = 1):
+    """
+    Inicia o servidor e aceita conexões em loop.
+    engine="threads": cria uma thread para cada cliente (padrão).
+    engine="asyncio": um event loop único atende milhares de conexões.
+    workers > 1: N processos com a engine escolhida; este processo só grava.
+    """
     ensure_data_folder()
+    central.iniciar()
     log("============================================")
     log("  SERVIDOR ACADÊMICO - TCP (MULTI-CLIENTES)")
     log("============================================")
     servidor = None
     try:
-        servidor = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        servidor.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        servidor.bind((HOST, PORT))
-        servidor.listen(50)  # backlog maior para suportar bursts
-        log(f"[ONLINE] Aguardando conexões em {HOST}:{PORT}")
+        if workers <= 1:
+            servidor = _criar_socket()
+        log(f"[ONLINE] Aguardando conexões em {HOST}:{PORT} (engine: {engine}, workers: {max(workers, 1)})")
+        log(f"[INFO] Group commit: janela {central.JANELA_MS} ms, até {central.LOTE_MAX} registros, "
+            f"fsync '{central.POLITICA_FSYNC}', armazenamento '{central.ARMAZENAMENTO}'.")
         log("[INFO] Pressione Ctrl+C para encerrar o servidor.")
+        threading.Thread(target=_loop_relatorio_lotes, daemon=True).start()
+        if INTERVALO_METRICAS > 0:
+            log(f"[INFO] Métricas gravadas em {METRICS_FILE} a cada {INTERVALO_METRICAS}s.")
+            threading.Thread(target=_loop_dump_metricas, daemon=True).start()
 
-        while True:
-            try:
-                conn, addr = servidor.accept()
-                # Cada cliente tratado em thread separada
-                threading.Thread(target=tratar_cliente, args=(conn, addr), daemon=True).start()
-            except KeyboardInterrupt:
-                log("[ENCERRANDO] Recebido Ctrl+C. Encerrando servidor.")
-                break
-            except Exception as e:
-                log(f"[ERRO ACCEPT] {e}")
-                traceback.print_exc()
+        if workers > 1:
+            _iniciar_workers(engine, workers)
+        else:
+            _servir(servidor, engine)
 
     except Exception as e:
-        log("[ERRO FATAL] Não foi possível iniciar o servidor:")
-        log(str(e))
-        traceback.print_exc()
+        log_servidor.erro(f"[ERRO FATAL] Não foi possível iniciar o servidor: {e}", exc=True)
     finally:
         try:
             if servidor:
                 servidor.close()
         except:
             pass
+        central.encerrar()
+        log(relatorio_lotes())
         log("[FINALIZADO] Servidor encerrado.")
+        log_servidor.encerrar()
 
 # Tratamento de sinal para encerrar graciosamente (Windows/Linux)
+_encerrando = False
+
 def _signal_handler(sig, frame):
+    global _encerrando
+    if _encerrando:
+        # sinal repetido: deixa o encerramento em andamento terminar
+        return
+    _encerrando = True
     log("[SINAL] Encerrando servidor via sinal.")
-    try:
-        # apenas encerrar o processo; o finally em iniciar_servidor() cuidará do fechamento
-        sys.exit(0)
-    except SystemExit:
-        os._exit(0)
+    # SystemExit interrompe o accept(); o finally em iniciar_servidor() esvazia o
+    # group commit e compacta o journal antes de sair
+    sys.exit(0)
+
+def _instalar_sinais():
+    signal.signal(signal.SIGINT, _signal_handler)
+    signal.signal(signal.SIGTERM, _signal_handler)
+
+_instalar_sinais()
+
+def main(argv=None):
+    global HOST, PORT, INTERVALO_METRICAS
+    parser = argparse.ArgumentParser(description="Servidor acadêmico TCP (LAN).")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--engine", choices=ENGINES, default="threads",
+                        help="threads: uma thread por conexão | asyncio: event loop único")
+    parser.add_argument("--fsync", choices=central.POLITICAS_FSYNC, default=central.POLITICA_FSYNC,
+                        help="política de fsync do journal (padrão: %(default)s)")
+    parser.add_argument("--fsync-intervalo-ms", type=float, default=central.FSYNC_INTERVALO_MS,
+                        help="intervalo máximo entre fsyncs na política 'intervalo'")
+    parser.add_argument("--janela-ms", type=float, default=central.JANELA_MS,
+                        help="janela de agrupamento do group commit")
+    parser.add_argument("--lote-max", type=int, default=central.LOTE_MAX,
+                        help="máximo de registros por lote do group commit")
+    parser.add_argument("--metricas-intervalo", type=float, default=INTERVALO_METRICAS,
+                        help=f"grava métricas em {METRICS_FILE} a cada N segundos (0 = desligado)")
+    parser.add_argument("--log-nivel", choices=log_servidor.NIVEIS, default="INFO", type=str.upper,
+                        help="nível mínimo das mensagens (padrão: %(default)s)")
+    parser.add_argument("--log-arquivo", nargs="?", const=LOG_FILE, default=None,
+                        help=f"também grava o log em JSON-lines com rotação (padrão: {LOG_FILE})")
+    parser.add_argument("--sem-log-conexoes", action="store_true",
+                        help="mensagens por conexão/registro só no nível DEBUG")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processos atendendo a mesma porta (padrão: %(default)s)")
+    parser.add_argument("--armazenamento", choices=banco.ARMAZENAMENTOS, default=banco.armazenamento_padrao(),
+                        help="journal + data/alunos.json ou data/sistema.db (padrão: %(default)s; "
+                             "sqlite se o banco existir)")
+    args = parser.parse_args(argv)
+
+    if args.log_arquivo:
+        ensure_data_folder()
+    log_servidor.configurar(args.log_nivel, args.log_arquivo, conexoes=not args.sem_log_conexoes)
 
-signal.signal(signal.SIGINT, _signal_handler)
-signal.signal(signal.SIGTERM, _signal_handler)
+    HOST, PORT = args.host, args.port
+    INTERVALO_METRICAS = args.metricas_intervalo
+    central.configurar(janela_ms=args.janela_ms, lote_max=args.lote_max,
+                       fsync=args.fsync, fsync_intervalo_ms=args.fsync_intervalo_ms,
+                       armazenamento=args.armazenamento)
+    iniciar_servidor(args.engine, args.workers)
 
 if __name__ == "__main__":
-    iniciar_servidor()
+    main()
@@ -0,0 +1,134 @@
+# tabela_alunos.py
+"""
+Alunos da interface guardados em colunas, no lugar de uma lista de dicts:
+- nomes: lista de str
+- notas: array('d') com a nota já convertida para float uma única vez
+  (registros antigos podem ter a nota como texto; texto inválido vira 0.0)
+- turmas: array('I') com o código de cada turma; o nome de cada turma distinta
+  é guardado uma só vez (interned) em _turmas
+
+Por aluno ficam ~8 bytes de nota + 4 de turma + a referência do nome, contra
+algumas centenas de bytes de um dict com as mesmas chaves repetidas. Médias,
+máximos e ordenações percorrem o array contíguo sem reconverter texto.
+
+indice_notas(): índice ordenado por nota (geral e por turma, ver indice_notas.py)
+e indice_nomes(): chaves normalizadas e trigramas (ver indice_nomes.py),
+montados na primeira consulta e mantidos a cada acrescentar().
+
+A tabela é montada uma vez por carga em repositorio.tabela_alunos() e
+compartilhada entre as telas: para alterá-la (ex.: feed do servidor), use copia().
+"""
+
+import math
+import sys
+from array import array
+
+from indice_nomes import IndiceNomes
+from indice_notas import IndiceNotasTurmas
+
+
+def nota_float(valor) -> float:
+    """Nota como float (registros da interface podem ter a nota como texto; nan/inf valem 0)."""
+    try:
+        nota = float(valor)
+    except (TypeError, ValueError):
+        return 0.0
+    return nota if math.isfinite(nota) else 0.0
+
+
+class TabelaAlunos:
+    __slots__ = ("nomes", "notas", "codigos", "_turmas", "_codigo_turma", "_indice", "_indice_nomes")
+
+    def __init__(self):
+        self.nomes = []
+        self.notas = array("d")
+        self.codigos = array("I")
+        self._turmas = []          # código -> nome da turma
+        self._codigo_turma = {}    # nome da turma -> código
+        self._indice = None        # IndiceNotasTurmas, montado sob demanda
+        self._indice_nomes = None  # IndiceNomes, montado sob demanda
+
+    @classmethod
+    def de_registros(cls, registros) -> "TabelaAlunos":
+        """Monta a tabela a partir dos dicts lidos do JSON/SQLite (ou recebidos do feed)."""
+        tabela = cls()
+        for registro in registros:
+            if isinstance(registro, dict):
+                tabela.acrescentar(registro)
+        return tabela
+
+    def acrescentar(self, aluno: dict) -> None:
+        self.nomes.append(str(aluno.get("nome", "")))
+        self.notas.append(nota_float(aluno.get("nota", 0)))
+        self.codigos.append(self._codigo(str(aluno.get("turma", ""))))
+        if self._indice is not None:
+            i = len(self.nomes) - 1
+            self._indice.adicionar(self.turma(i), self.notas[i], i)
+        if self._indice_nomes is not None:
+            self._indice_nomes.acrescentar(self.nomes[-1])
+
+    def _codigo(self, turma: str) -> int:
+        codigo = self._codigo_turma.get(turma)
+        if codigo is None:
+            codigo = len(self._turmas)
+            self._turmas.append(sys.intern(turma))
+            self._codigo_turma[self._turmas[codigo]] = codigo
+        return codigo
+
+    def copia(self) -> "TabelaAlunos":
+        outra = TabelaAlunos()
+        outra.copiar_de(self)
+        return outra
+
+    def copiar_de(self, outra: "TabelaAlunos") -> None:
+        """Substitui o conteúdo desta tabela pelo de outra (mantendo o objeto)."""
+        self.nomes = list(outra.nomes)
+        self.notas = array("d", outra.notas)
+        self.codigos = array("I", outra.codigos)
+        self._turmas = list(outra._turmas)
+        self._codigo_turma = dict(outra._codigo_turma)
+        self._indice = outra._indice.copia() if outra._indice is not None else None
+        self._indice_nomes = outra._indice_nomes.copia() if outra._indice_nomes is not None else None
+
+    def __len__(self) -> int:
+        return len(self.nomes)
+
+    def turma(self, i: int) -> str:
+        return self._turmas[self.codigos[i]]
+
+    def codigo_turma(self, turma: str):
+        """Código da turma nesta tabela (None se nenhum aluno dela)."""
+        return self._codigo_turma.get(turma)
+
+    def turmas(self) -> list:
+        """Turmas distintas, na ordem em que apareceram."""
+        return list(self._turmas)
+
+    def turmas_e_notas(self):
+        """Pares (turma, nota) de todos os alunos, para montar agregados."""
+        turmas = self._turmas
+        return ((turmas[c], nota) for c, nota in zip(self.codigos, self.notas))
+
+    def registro(self, i: int) -> dict:
+        return {"nome": self.nomes[i], "turma": self.turma(i), "nota": self.notas[i]}
+
+    # -----------------------------------------------------
+    # Índices e ordens
+    # -----------------------------------------------------
+    def indice_notas(self) -> IndiceNotasTurmas:
+        """Índice por nota (geral e por turma); a primeira chamada o monta com uma ordenação."""
+        if self._indice is None:
+            turmas = self._turmas
+            self._indice = IndiceNotasTurmas.de_alunos(
+                (turmas[c], nota, i) for i, (c, nota) in enumerate(zip(self.codigos, self.notas)))
+        return self._indice
+
+    def ordem_por_nome(self) -> list:
+        nomes = self.nomes
+        return sorted(range(len(nomes)), key=lambda i: nomes[i].lower())
+
+    def indice_nomes(self) -> IndiceNomes:
+        """Índice de busca por nome; a primeira chamada normaliza todos os nomes uma vez."""
+        if self._indice_nomes is None:
+            self._indice_nomes = IndiceNomes.de_nomes(self.nomes)
+        return self._indice_nomes
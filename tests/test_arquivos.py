@@ -0,0 +1,170 @@
+# tests/test_arquivos.py
+"""
+Primitiva de armazenamento (arquivos.py): reentrância das travas na mesma
+thread (escrita dentro de escrita, leitura dentro de escrita; escrita dentro
+de leitura é recusada), exclusão mútua entre processos num leia-modifica-grave
+e escrita atômica (leitores nunca veem JSON pela metade, nenhum temporário
+sobra). Também o corte da linha incompleta no fim de um JSONL.
+    python -m unittest discover tests    (ou: python -m pytest tests)
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import arquivos  # noqa: E402
+
+# cada processo soma 1 ao contador N vezes, cada soma inteira dentro de escrita()
+INCREMENTAR = """
+import sys
+import arquivos
+caminho, vezes = sys.argv[1], int(sys.argv[2])
+for _ in range(vezes):
+    with arquivos.escrita(caminho):
+        arquivos.gravar_json(caminho, arquivos.ler_json(caminho, 0) + 1, duravel=False)
+"""
+
+
+class PastaTemporaria(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp(prefix="teste_arquivos_")
+        self.caminho = os.path.join(self.pasta, "dados.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.pasta, ignore_errors=True)
+
+
+class Reentrancia(PastaTemporaria):
+    def test_escrita_dentro_de_escrita(self):
+        with arquivos.escrita(self.caminho):
+            with arquivos.escrita(self.caminho):
+                arquivos.gravar_json(self.caminho, [1])
+            self.assertEqual(arquivos.ler_json(self.caminho), [1])
+        self.assertEqual(arquivos._mantidas(), {})
+
+    def test_escrita_dentro_de_leitura_e_recusada(self):
+        with arquivos.leitura(self.caminho):
+            with self.assertRaises(RuntimeError):
+                with arquivos.escrita(self.caminho):
+                    pass
+            with arquivos.leitura(self.caminho):  # leitura dentro de leitura vale
+                pass
+        with arquivos.escrita(self.caminho):  # a trava foi solta
+            pass
+
+    def test_outra_thread_espera_a_escrita(self):
+        ordem = []
+        with arquivos.escrita(self.caminho):
+            def ler():
+                with arquivos.leitura(self.caminho):
+                    ordem.append("leitura")
+            leitor = threading.Thread(target=ler)
+            leitor.start()
+            leitor.join(0.3)
+            ordem.append("fim da escrita")
+        leitor.join(5)
+        self.assertEqual(ordem, ["fim da escrita", "leitura"])
+
+
+@unittest.skipIf(arquivos.fcntl is None, "sem fcntl as travas não fazem nada")
+class ExclusaoEntreProcessos(PastaTemporaria):
+    def test_leia_modifica_grave_sem_perder_incrementos(self):
+        processos, vezes = 4, 100
+        filhos = [subprocess.Popen([sys.executable, "-c", INCREMENTAR, self.caminho, str(vezes)], cwd=RAIZ)
+                  for _ in range(processos)]
+        for filho in filhos:
+            self.assertEqual(filho.wait(60), 0)
+        self.assertEqual(arquivos.ler_json(self.caminho), processos * vezes)
+
+
+class EscritaAtomica(PastaTemporaria):
+    def test_leitores_nunca_veem_json_pela_metade(self):
+        parar = threading.Event()
+        erros = []
+
+        def lendo():
+            while not parar.is_set():
+                try:
+                    with open(self.caminho, encoding="utf-8") as f:  # sem trava: só a troca atômica
+                        dados = f.read()
+                    json.loads(dados)
+                except FileNotFoundError:
+                    pass
+                except ValueError as erro:
+                    erros.append(erro)
+
+        leitor = threading.Thread(target=lendo)
+        leitor.start()
+        try:
+            for i in range(200):
+                arquivos.gravar_json(self.caminho, [{"i": i, "texto": "x" * 5000}] * 20, duravel=False)
+        finally:
+            parar.set()
+            leitor.join()
+        self.assertEqual(erros, [])
+        self.assertFalse([n for n in os.listdir(self.pasta) if n.endswith(".tmp")])
+
+    def test_falha_na_gravacao_mantem_o_antigo(self):
+        arquivos.gravar_json(self.caminho, {"versao": 1})
+        with self.assertRaises(TypeError):
+            arquivos.gravar_json(self.caminho, {"versao": object()})
+        self.assertEqual(arquivos.ler_json(self.caminho), {"versao": 1})
+        self.assertFalse([n for n in os.listdir(self.pasta) if n.endswith(".tmp")])
+
+    def test_substituir_so_se_inalterado(self):
+        arquivos.gravar_texto(self.caminho, "a\n")
+        lido = arquivos.assinatura(self.caminho)
+        with open(self.caminho, "a", encoding="utf-8") as f:  # outro processo acrescentou
+            f.write("b\n")
+        self.assertFalse(arquivos.substituir_se_inalterado(self.caminho, "novo\n", lido))
+        lido = arquivos.assinatura(self.caminho)
+        self.assertTrue(arquivos.substituir_se_inalterado(self.caminho, "novo\n", lido))
+        with open(self.caminho, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "novo\n")
+        self.assertFalse([n for n in os.listdir(self.pasta) if n.endswith(".tmp")])
+
+    def test_arquivo_ausente_devolve_padrao(self):
+        self.assertEqual(arquivos.ler_json(self.caminho, []), [])
+        self.assertIsNone(arquivos.ler_json(self.caminho))
+
+
+class LinhaIncompleta(PastaTemporaria):
+    def _gravar(self, dados: bytes):
+        with open(self.caminho, "wb") as f:
+            f.write(dados)
+
+    def _ler(self) -> bytes:
+        with open(self.caminho, "rb") as f:
+            return f.read()
+
+    def test_cauda_cortada(self):
+        self._gravar(b'{"a": 1}\n{"b": 2}\n{"c"')
+        self.assertEqual(arquivos.truncar_linha_incompleta(self.caminho), 4)
+        self.assertEqual(self._ler(), b'{"a": 1}\n{"b": 2}\n')
+
+    def test_cauda_maior_que_o_bloco(self):
+        self._gravar(b"ok\n" + b"x" * 1000)
+        self.assertEqual(arquivos.truncar_linha_incompleta(self.caminho, bloco=64), 1000)
+        self.assertEqual(self._ler(), b"ok\n")
+
+    def test_nada_a_cortar(self):
+        self.assertEqual(arquivos.truncar_linha_incompleta(self.caminho), 0)  # não existe
+        self._gravar(b"")
+        self.assertEqual(arquivos.truncar_linha_incompleta(self.caminho), 0)
+        self._gravar(b"linha\n")
+        self.assertEqual(arquivos.truncar_linha_incompleta(self.caminho), 0)
+        self._gravar(b"sem quebra")
+        self.assertEqual(arquivos.truncar_linha_incompleta(self.caminho), 10)
+        self.assertEqual(self._ler(), b"")
+
+
+if __name__ == "__main__":
+    unittest.main()
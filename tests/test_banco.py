@@ -0,0 +1,59 @@
+# tests/test_banco.py
+"""
+Backend SQLite (banco.py): gravar uma lista editada (sincronizar) atualiza,
+insere e apaga pelo id sem perder as linhas que outro processo inseriu depois
+que a lista foi lida — ao contrário de substituir(), que reescreve a tabela.
+    python -m unittest discover tests    (ou: python -m pytest tests)
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import banco  # noqa: E402
+from indice_registros import CAMPO_ID  # noqa: E402
+
+
+class Sincronizar(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp(prefix="teste_banco_")
+        self.conn = banco.conectar(os.path.join(self.pasta, "sistema.db"))
+        banco.inserir(self.conn, "alunos", [{"nome": n, "turma": "3A", "nota": 5.0} for n in ("Ana", "Bia", "Caio")])
+
+    def tearDown(self):
+        self.conn.close()
+        shutil.rmtree(self.pasta, ignore_errors=True)
+
+    def _nomes(self) -> list:
+        return [a["nome"] for a in banco.ler(self.conn, "alunos")]
+
+    def test_linha_inserida_por_outro_processo_continua(self):
+        lidos = banco.ler(self.conn, "alunos")
+        # o servidor grava um aluno enquanto a interface edita a lista que leu
+        outra = banco.conectar(os.path.join(self.pasta, "sistema.db"))
+        banco.inserir(outra, "alunos", [{"nome": "Do servidor", "turma": "3B", "nota": 9.0, "seq": 1}])
+        outra.close()
+
+        editada = [dict(lidos[0], nota=10.0), lidos[2], {"nome": "Nova", "turma": "3A", "nota": 7.0, CAMPO_ID: "novo"}]
+        removidos = [lidos[1][CAMPO_ID]]
+        antes = banco.versao(self.conn, "alunos")
+        banco.sincronizar(self.conn, "alunos", editada, removidos)
+
+        self.assertEqual(self._nomes(), ["Ana", "Caio", "Do servidor", "Nova"])
+        gravados = {a["nome"]: a for a in banco.ler(self.conn, "alunos")}
+        self.assertEqual(gravados["Ana"]["nota"], 10.0)
+        self.assertEqual(gravados["Ana"][CAMPO_ID], lidos[0][CAMPO_ID])
+        self.assertEqual(gravados["Do servidor"]["seq"], 1)
+        self.assertEqual(banco.versao(self.conn, "alunos"), antes + 1)
+
+    def test_substituir_reescreve_a_tabela(self):
+        banco.substituir(self.conn, "alunos", [{"nome": "Só", "turma": "3A", "nota": 1.0}])
+        self.assertEqual(self._nomes(), ["Só"])
+
+
+if __name__ == "__main__":
+    unittest.main()
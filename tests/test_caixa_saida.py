@@ -0,0 +1,91 @@
+# tests/test_caixa_saida.py
+"""
+Caixa de saída da interface (conexao_servidor.py): a reescrita do arquivo não
+perde um registro acrescentado enquanto o conteúdo novo era montado, e as
+gravações no arquivo acontecem fora de _lock_caixa (enviar_duravel() não
+espera o fsync de uma reescrita).
+    python -m unittest discover tests    (ou: python -m pytest tests)
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import arquivos  # noqa: E402
+import conexao_servidor  # noqa: E402
+
+
+def _registro(id_registro: str) -> dict:
+    return {"id": id_registro, "nome": f"Aluno {id_registro}", "turma": "3A", "nota": 7.0}
+
+
+class CaixaTemporaria(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp(prefix="teste_caixa_")
+        self.caminho = os.path.join(self.pasta, "data", "envios_pendentes.jsonl")
+        for nome, valor in (("CAIXA_SAIDA_FILE", self.caminho), ("_caixa", {}),
+                            ("_callbacks_caixa", {}), ("_marcas_caixa", 0)):
+            atual = mock.patch.object(conexao_servidor, nome, valor)
+            atual.start()
+            self.addCleanup(atual.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.pasta, ignore_errors=True)
+
+    def acrescentar(self, *ids):
+        conexao_servidor._gravar_caixa([dict(_registro(i), tipo="registro") for i in ids])
+        for i in ids:
+            conexao_servidor._caixa[i] = _registro(i)
+
+    def ids_no_arquivo(self) -> list:
+        with open(self.caminho, encoding="utf-8") as f:
+            return [json.loads(linha)["id"] for linha in f]
+
+
+class ReescritaDaCaixa(CaixaTemporaria):
+    def test_registro_acrescentado_durante_a_reescrita_fica(self):
+        self.acrescentar("a", "b")
+        original = arquivos.substituir_se_inalterado
+        tentativas = []
+
+        def com_acrescimo_no_meio(*args, **kwargs):
+            if not tentativas:  # outra instância grava depois da leitura, antes da troca
+                self.acrescentar("c")
+            tentativas.append(1)
+            return original(*args, **kwargs)
+
+        with mock.patch.object(arquivos, "substituir_se_inalterado", com_acrescimo_no_meio):
+            conexao_servidor._reescrever_caixa(["a"])
+        self.assertEqual(len(tentativas), 2)
+        self.assertEqual(self.ids_no_arquivo(), ["b", "c"])
+
+    def test_gravacao_fora_do_lock_da_caixa(self):
+        self.acrescentar("a", "b", "c")
+        travado = []
+
+        def anotar(*_):
+            travado.append(conexao_servidor._lock_caixa.locked())
+
+        with mock.patch.object(conexao_servidor, "_gravar_caixa", side_effect=anotar), \
+                mock.patch.object(conexao_servidor, "_reescrever_caixa", side_effect=anotar):
+            conexao_servidor._concluir_caixa([_registro("a")], ["OK"])                # só marca
+            conexao_servidor._concluir_caixa([_registro("b"), _registro("c")], ["OK", "ERR: x"])  # esvaziou
+        self.assertEqual(travado, [False, False])
+        self.assertEqual(conexao_servidor._marcas_caixa, 0)
+
+    def test_esvaziar_reescreve_sem_as_marcas(self):
+        self.acrescentar("a", "b")
+        conexao_servidor._concluir_caixa([_registro("a")], ["OK"])
+        self.assertEqual(conexao_servidor._ler_caixa(), ({"b": _registro("b")}, 1))
+        conexao_servidor._concluir_caixa([_registro("b")], ["OK"])
+        self.assertEqual(os.path.getsize(self.caminho), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
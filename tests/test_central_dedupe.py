@@ -0,0 +1,67 @@
+# tests/test_central_dedupe.py
+"""
+Envio idempotente (id_envio): um reenvio devolve o registro original marcado
+"duplicado" e não grava de novo — no mesmo lote, depois da compactação (o id
+já está no snapshot, não no journal) e depois de reiniciar o servidor.
+    python -m unittest discover tests    (ou: python -m pytest tests)
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import central  # noqa: E402
+from test_central_journal import CentralTemporario  # noqa: E402
+
+
+def _registro(nome: str, id_envio: str) -> dict:
+    return {"nome": nome, "turma": "3A", "nota": 7.0, "id_envio": id_envio}
+
+
+class DeduplicacaoEntreCompactacoes(CentralTemporario):
+    def test_reenvio_depois_da_compactacao(self):
+        self.iniciar()
+        original = central.anexar(_registro("Ana", "envio-1"))
+        self.assertEqual(central.compactar(), 1)
+        reenvio = central.anexar(_registro("Ana", "envio-1"))
+        self.assertTrue(reenvio.get("duplicado"))
+        self.assertEqual(reenvio["seq"], original["seq"])
+        central.compactar()
+        self.assertEqual(len(self.snapshot()), 1)
+
+    def test_reenvio_depois_de_reiniciar(self):
+        self.iniciar()
+        central.anexar(_registro("Ana", "envio-1"))
+        self.reiniciar()  # encerrar() compacta: o id fica só no snapshot
+        self.assertTrue(central.anexar(_registro("Ana", "envio-1")).get("duplicado"))
+        self.assertEqual(central.total_alunos(), 1)
+
+    def test_reenvio_de_registro_recuperado_do_journal(self):
+        # queda antes da compactação: um id no snapshot, outro só no journal
+        self.gravar_snapshot([dict(_registro("Ana", "envio-1"), seq=1)])
+        self.gravar_journal(central.JOURNAL_FILE, [dict(_registro("Bia", "envio-2"), seq=2)])
+        self.iniciar()
+        for nome, id_envio in (("Ana", "envio-1"), ("Bia", "envio-2")):
+            self.assertTrue(central.anexar(_registro(nome, id_envio)).get("duplicado"), id_envio)
+        self.assertEqual(central.total_alunos(), 2)
+
+    def test_repetido_no_mesmo_lote(self):
+        self.iniciar()
+        resultado = central.anexar_grupos([[_registro("Ana", "envio-1"), _registro("Ana", "envio-1")],
+                                           [_registro("Ana", "envio-1")]])
+        gravados = [r for grupo in resultado for r in grupo]
+        self.assertEqual([bool(r.get("duplicado")) for r in gravados], [False, True, True])
+        self.assertEqual({r["seq"] for r in gravados}, {gravados[0]["seq"]})
+        self.assertEqual(central.total_alunos(), 1)
+
+    def test_sem_id_envio_nao_deduplica(self):
+        self.iniciar()
+        central.anexar({"nome": "Ana", "turma": "3A", "nota": 7.0})
+        central.anexar({"nome": "Ana", "turma": "3A", "nota": 7.0})
+        self.assertEqual(central.total_alunos(), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+# tests/test_central_journal.py
+"""
+Journal do servidor no modo JSON (central.py): recuperação ao iniciar, linha
+cortada no fim do journal (queda no meio de um write) e ordem da compactação
+(journal congelado antes do atual, nada perdido nem duplicado).
+
+O central roda neste processo, numa pasta temporária (os caminhos dele são
+relativos a data/).
+    python -m unittest discover tests    (ou: python -m pytest tests)
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import central  # noqa: E402
+
+
+def _aluno(seq: int, nome: str = None) -> dict:
+    return {"nome": nome or f"Aluno {seq}", "turma": "3A", "nota": float(seq % 11), "seq": seq}
+
+
+class CentralTemporario(unittest.TestCase):
+    """Base: pasta temporária com data/; iniciar()/encerrar() do central nela."""
+
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self.pasta = tempfile.mkdtemp(prefix="teste_central_")
+        os.chdir(self.pasta)
+        os.makedirs("data")
+        # compactação só quando o teste pedir
+        central.configurar(intervalo=3600, limite=10 ** 9, armazenamento="json", fsync="sempre")
+        self.iniciado = False
+
+    def tearDown(self):
+        self.encerrar()
+        os.chdir(self._cwd)
+        shutil.rmtree(self.pasta, ignore_errors=True)
+
+    def iniciar(self):
+        central.iniciar()
+        self.iniciado = True
+
+    def encerrar(self):
+        if self.iniciado:
+            central.encerrar()
+            self.iniciado = False
+
+    def reiniciar(self):
+        self.encerrar()
+        self.iniciar()
+
+    @staticmethod
+    def gravar_snapshot(alunos: list):
+        with open(central.DATA_FILE, "w", encoding="utf-8") as f:
+            json.dump(alunos, f)
+
+    @staticmethod
+    def gravar_journal(caminho: str, alunos: list, cauda: str = ""):
+        with open(caminho, "w", encoding="utf-8") as f:
+            f.write("".join(json.dumps(a) + "\n" for a in alunos) + cauda)
+
+    @staticmethod
+    def snapshot() -> list:
+        with open(central.DATA_FILE, encoding="utf-8") as f:
+            return json.load(f)
+
+
+class RecuperacaoJournal(CentralTemporario):
+    def test_journal_reaplicado_e_compactado_ao_iniciar(self):
+        self.gravar_snapshot([_aluno(1), _aluno(2)])
+        self.gravar_journal(central.JOURNAL_FILE, [_aluno(2), _aluno(3), _aluno(4)])  # seq 2 já compactado
+        self.iniciar()
+        self.assertEqual(central.total_alunos(), 4)
+        self.assertEqual([a["seq"] for a in self.snapshot()], [1, 2, 3, 4])
+        self.assertEqual(os.path.getsize(central.JOURNAL_FILE), 0)
+        self.assertEqual(central.anexar(_aluno(0, "Novo"))["seq"], 5)
+
+    def test_linha_cortada_no_fim_nao_engole_o_proximo_registro(self):
+        self.gravar_journal(central.JOURNAL_FILE, [_aluno(1)], cauda='{"nome": "Cortado", "tu')
+        self.iniciar()
+        self.assertEqual(central.total_alunos(), 1)
+        central.anexar(_aluno(0, "Depois da queda"))
+        self.reiniciar()
+        self.assertEqual(sorted(a["nome"] for a in self.snapshot()), ["Aluno 1", "Depois da queda"])
+
+    def test_linha_cortada_sem_compactar(self):
+        # a cauda é cortada antes do primeiro acréscimo, mesmo sem compactação no meio
+        self.gravar_snapshot([])
+        self.gravar_journal(central.JOURNAL_FILE, [], cauda='{"nome": "Cortado"')
+        self.iniciar()
+        central.anexar(_aluno(0, "A"))
+        central.anexar(_aluno(0, "B"))
+        with open(central.JOURNAL_FILE, encoding="utf-8") as f:
+            self.assertEqual([json.loads(linha)["nome"] for linha in f], ["A", "B"])
+
+    def test_compactacao_interrompida_journal_antigo_vem_antes(self):
+        self.gravar_snapshot([_aluno(1)])
+        self.gravar_journal(central.JOURNAL_OLD_FILE, [_aluno(2), _aluno(3)])
+        self.gravar_journal(central.JOURNAL_FILE, [_aluno(4)])
+        self.iniciar()
+        self.assertFalse(os.path.exists(central.JOURNAL_OLD_FILE))
+        self.assertEqual([a["seq"] for a in self.snapshot()], [1, 2, 3, 4])
+        self.assertEqual(central.anexar(_aluno(0, "Novo"))["seq"], 5)
+
+
+class Compactacao(CentralTemporario):
+    def test_compactar_durante_gravacoes_nao_perde_nem_duplica(self):
+        self.iniciar()
+        parar = threading.Event()
+
+        def compactando():
+            while not parar.is_set():
+                central.compactar()
+
+        compactador = threading.Thread(target=compactando)
+        compactador.start()
+        try:
+            for i in range(300):
+                central.anexar({"nome": f"N{i}", "turma": "3A", "nota": 5.0})
+        finally:
+            parar.set()
+            compactador.join()
+        central.compactar()
+        seqs = [a["seq"] for a in self.snapshot()]
+        self.assertEqual(seqs, list(range(1, 301)))
+        self.reiniciar()
+        self.assertEqual(central.total_alunos(), 300)
+        self.assertEqual([a["seq"] for a in self.snapshot()], seqs)
+
+
+if __name__ == "__main__":
+    unittest.main()
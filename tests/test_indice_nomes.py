@@ -0,0 +1,59 @@
+# tests/test_indice_nomes.py
+"""
+Busca ao vivo de alunos (indice_nomes.py): o termo vale em qualquer parte do
+nome, inclusive com 1 ou 2 letras (pelas listas de gramas, sem percorrer os
+nomes), e o refinamento tecla a tecla dá o mesmo
+resultado que a busca direta.
+    python -m unittest discover tests    (ou: python -m pytest tests)
+"""
+
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indice_nomes import BuscaIncremental, IndiceNomes, normalizar  # noqa: E402
+
+NOMES = ["Ana", "Bruna", "Natália", "Andre", "João", "Luana", "Mariana", "Otávio"]
+
+
+def _esperado(nomes, termo):
+    chave = normalizar(termo).strip()
+    return [i for i, nome in enumerate(nomes) if chave in normalizar(nome)]
+
+
+class BuscaTermoCurto(unittest.TestCase):
+    def test_uma_e_duas_letras_em_qualquer_parte(self):
+        busca = BuscaIncremental(IndiceNomes.de_nomes(NOMES))
+        self.assertEqual(busca.buscar("na"), [0, 1, 2, 5, 6])  # "na" acha "Ana"
+        busca.reiniciar()
+        self.assertEqual(busca.buscar("v"), [7])
+
+    def test_termo_curto_usa_a_lista_do_grama(self):
+        class SemVarredura(list):
+            def __iter__(self):
+                raise AssertionError("termo curto percorreu todos os nomes")
+
+        indice = IndiceNomes.de_nomes(NOMES)
+        indice.chaves = SemVarredura(indice.chaves)
+        busca = BuscaIncremental(indice)
+        for termo in ("a", "an", "ana"):
+            self.assertEqual(busca.buscar(termo), [i for i, n in enumerate(NOMES) if termo in normalizar(n)])
+
+    def test_refinar_igual_a_busca_direta(self):
+        aleatorio = random.Random(22)
+        nomes = ["".join(aleatorio.choice("aãbnrs") for _ in range(aleatorio.randint(1, 8)))
+                 for _ in range(500)]
+        indice = IndiceNomes.de_nomes(nomes)
+        busca = BuscaIncremental(indice)
+        for _ in range(200):
+            termo = "".join(aleatorio.choice("anrs") for _ in range(aleatorio.randint(1, 5)))
+            for k in range(1, len(termo) + 1):  # digitando: cada tecla refina a anterior
+                self.assertEqual(busca.buscar(termo[:k]), _esperado(nomes, termo[:k]), termo[:k])
+            self.assertEqual(BuscaIncremental(indice).buscar(termo), _esperado(nomes, termo))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+# tests/test_indice_registros.py
+"""
+Ids estáveis dos registros (indice_registros.py): posições certas depois de
+remoções (lápides e compactação delas, comparado com uma lista comum) e ids
+dados aos registros antigos uma única vez — no snapshot do servidor e no
+SQLite —, iguais depois de reiniciar/reconectar.
+    python -m unittest discover tests    (ou: python -m pytest tests)
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import banco  # noqa: E402
+import central  # noqa: E402
+from indice_registros import CAMPO_ID, IndiceRegistros, garantir_ids, novo_id  # noqa: E402
+from test_central_journal import CentralTemporario  # noqa: E402
+
+
+class Lapides(unittest.TestCase):
+    def _conferir(self, indice, lista):
+        self.assertEqual(len(indice), len(lista))
+        for i, id_registro in enumerate(lista):
+            self.assertEqual(indice.posicao(id_registro), i, id_registro)
+
+    def test_remover_e_acrescentar_igual_a_lista(self):
+        aleatorio = random.Random(24)
+        lista = [novo_id() for _ in range(300)]
+        indice = IndiceRegistros.de_lista([{CAMPO_ID: i} for i in lista])
+        removidos = []
+        for passo in range(2000):
+            if lista and aleatorio.random() < 0.55:
+                id_registro = lista.pop(aleatorio.randrange(len(lista)))
+                indice.remover(id_registro)
+                removidos.append(id_registro)
+            else:
+                lista.append(novo_id())
+                indice.acrescentar(lista[-1], len(lista) - 1)
+            if passo % 50 == 0:
+                self._conferir(indice, lista)
+        self._conferir(indice, lista)
+        self.assertTrue(all(indice.posicao(i) is None for i in removidos))
+
+    def test_lapides_sao_compactadas(self):
+        lista = [novo_id() for _ in range(1000)]
+        indice = IndiceRegistros.de_lista([{CAMPO_ID: i} for i in lista])
+        for _ in range(124):  # compacta na 112ª: 112 lápides > 888 restantes // 8
+            indice.remover(lista.pop(0))
+        self.assertLess(len(indice._removidas), 124)
+        self._conferir(indice, lista)
+
+    def test_registro_sem_id_fica_fora_do_indice(self):
+        registros = [{"nome": "a"}, {CAMPO_ID: "x"}, "lixo"]
+        self.assertEqual(IndiceRegistros.de_lista(registros).posicao("x"), 1)
+        self.assertEqual(len(IndiceRegistros.de_lista(registros)), 1)
+
+
+class GarantirIds(unittest.TestCase):
+    def test_so_os_sem_id_recebem(self):
+        registros = [{"nome": "a"}, {"nome": "b", CAMPO_ID: "fixo"}, {"nome": "c", CAMPO_ID: ""}]
+        self.assertEqual(garantir_ids(registros), 2)
+        self.assertEqual(registros[1][CAMPO_ID], "fixo")
+        self.assertEqual(len({r[CAMPO_ID] for r in registros}), 3)
+        self.assertEqual(garantir_ids(registros), 0)
+
+
+class MigracaoSnapshot(CentralTemporario):
+    def test_ids_gravados_uma_vez_no_snapshot(self):
+        self.gravar_snapshot([{"nome": "Ana", "turma": "3A", "nota": 7.0, "seq": 1},
+                              {"nome": "Ana", "turma": "3A", "nota": 7.0, "seq": 2}])
+        self.iniciar()
+        ids = [a[CAMPO_ID] for a in self.snapshot()]
+        self.assertEqual(len(set(ids)), 2)  # registros iguais, ids diferentes
+        self.reiniciar()
+        self.assertEqual([a[CAMPO_ID] for a in self.snapshot()], ids)
+        self.assertEqual(central.total_alunos(), 2)
+
+
+class MigracaoSQLite(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp(prefix="teste_ids_")
+        self.caminho = os.path.join(self.pasta, "sistema.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.pasta, ignore_errors=True)
+
+    def _ids(self) -> list:
+        conn = banco.conectar(self.caminho)
+        try:
+            return [a[CAMPO_ID] for a in banco.ler(conn, "aulas")]
+        finally:
+            conn.close()
+
+    def test_linhas_antigas_recebem_id_estavel(self):
+        conn = banco.conectar(self.caminho)
+        banco.inserir(conn, "aulas", [{"turma": "3A", "conteudo": "Frações"}] * 2)
+        with conn:  # como ficariam linhas gravadas antes dos ids
+            conn.execute(f"UPDATE aulas SET extra = json_remove(extra, '$.{CAMPO_ID}')")
+        conn.close()
+        ids = self._ids()
+        self.assertEqual(len(set(ids)), 2)
+        self.assertTrue(all(ids))
+        self.assertEqual(self._ids(), ids)
+
+
+if __name__ == "__main__":
+    unittest.main()
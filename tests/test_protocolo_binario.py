@@ -0,0 +1,155 @@
+# tests/test_protocolo_binario.py
+"""
+Protocolo binário (protocolo_binario.py): ida e volta de varints, textos e
+notas float64, quadros entregues aos pedaços e quadros malformados (rejeitados
+inteiros, sem gravar nada).
+    python -m unittest discover tests    (ou: python -m pytest tests)
+"""
+
+import math
+import os
+import socket
+import struct
+import sys
+import types
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import benchmark_servidor  # noqa: E402
+import protocolo_binario as pb  # noqa: E402
+from test_servidor_pipeline import _conversar, _json  # noqa: E402
+
+
+def _payload(quadro: bytes) -> bytes:
+    quadros, resto = pb.extrair_quadros(quadro)
+    assert len(quadros) == 1 and not resto
+    return quadros[0][2]
+
+
+class Varint(unittest.TestCase):
+    def test_ida_e_volta_nos_limites(self):
+        for n in (0, 1, 127, 128, 255, 300, 16383, 16384, 2 ** 21, 2 ** 32 - 1, 2 ** 35 - 1):
+            dados = pb.codificar_varint(n)
+            self.assertEqual(pb.ler_varint(dados, 0), (n, len(dados)), n)
+        self.assertEqual(pb.codificar_varint(127), b"\x7f")
+        self.assertEqual(pb.codificar_varint(128), b"\x80\x01")
+
+    def test_varint_invalido(self):
+        with self.assertRaises(ValueError):
+            pb.codificar_varint(-1)
+        with self.assertRaises(ValueError):
+            pb.ler_varint(b"\x80\x80", 0)           # truncado
+        with self.assertRaises(ValueError):
+            pb.ler_varint(b"\xff" * 6 + b"\x01", 0)  # longo demais
+
+
+class Lote(unittest.TestCase):
+    REGISTROS = [("Ana", "3A", 7.5), ("José Ângelo", "Turma Ç", 0.1), ("", "", -0.0),
+                 ("x" * 300, "1B", 1e308), ("Bia", "3A", 10.0)]
+
+    def test_ida_e_volta(self):
+        decodificados = pb.decodificar_lote(_payload(pb.codificar_lote(self.REGISTROS, 7)))
+        self.assertEqual(decodificados, self.REGISTROS)
+        self.assertEqual(math.copysign(1, decodificados[2][2]), -1)  # -0.0 preservado
+
+    def test_ida_e_volta_com_id(self):
+        registros = [("Ana", "3A", 7.5, "abc-1"), ("Bia", "3B", 8.0, None)]
+        quadro = pb.codificar_lote_com_id(registros, 3)
+        [(tipo, id_quadro, payload)], _ = pb.extrair_quadros(quadro)
+        self.assertEqual((tipo, id_quadro), (pb.LOTE_ID, 3))
+        self.assertEqual(pb.decodificar_lote(payload, com_id=True), registros)
+
+    def test_nota_nao_finita_atravessa_o_codec_e_e_recusada(self):
+        nota = pb.decodificar_lote(_payload(pb.codificar_lote([("Ana", "3A", float("nan"))])))[0][2]
+        self.assertTrue(math.isnan(nota))
+        self.assertFalse(pb.validar_nota(nota))
+        self.assertFalse(pb.validar_nota(float("inf")))
+        self.assertTrue(pb.validar_nota(7.0))
+
+    def test_resultado_e_erro(self):
+        self.assertEqual(pb.decodificar_resultado(_payload(pb.codificar_resultado(1, [0, 2, 3]))), [0, 2, 3])
+        self.assertEqual(pb.decodificar_erro(_payload(pb.codificar_erro(1, pb.STATUS_LOTE_GRANDE))),
+                         (pb.STATUS_LOTE_GRANDE, "lote grande demais"))
+
+
+class QuadrosMalformados(unittest.TestCase):
+    def test_quadros_entregues_aos_pedacos(self):
+        fluxo = pb.codificar_lote([("Ana", "3A", 7.0)], 1) + pb.codificar_quit(2)
+        buffer, recebidos = b"", []
+        for i in range(len(fluxo)):  # um byte por vez
+            quadros, buffer = pb.extrair_quadros(buffer + fluxo[i:i + 1])
+            recebidos.extend(quadros)
+        self.assertEqual(buffer, b"")
+        self.assertEqual([(t, i) for t, i, _ in recebidos], [(pb.LOTE, 1), (pb.QUIT, 2)])
+
+    def test_payload_malformado(self):
+        bom = _payload(pb.codificar_lote([("Ana", "3A", 7.0)]))
+        casos = {
+            "nota truncada": bom[:-1],
+            "bytes sobrando": bom + b"\x00",
+            "texto truncado": b"\x01\x05Ana",
+            "quantidade maior que o conteúdo": b"\x02" + bom[1:],
+            "utf-8 inválido": b"\x01\x02\xff\xfe\x02" + b"3A" + struct.pack(">d", 7.0),
+            "varint truncado": b"\x80",
+        }
+        for motivo, payload in casos.items():
+            with self.assertRaises(ValueError, msg=motivo):
+                pb.decodificar_lote(payload)
+
+    def test_quadro_acima_do_maximo(self):
+        cabecalho = pb.CABECALHO.pack(pb.LOTE, 1, pb.TAMANHO_MAX_QUADRO + 1)
+        with self.assertRaises(ValueError):
+            pb.extrair_quadros(cabecalho)
+
+    def test_saudacao(self):
+        self.assertEqual(pb.ler_saudacao(pb.codificar_saudacao() + b"resto"), (pb.VERSAO_BINARIA, b"resto"))
+        self.assertEqual(pb.ler_saudacao(pb.MAGICO), (None, pb.MAGICO))
+        with self.assertRaises(ValueError):
+            pb.ler_saudacao(b"XXXXX")
+        self.assertIsNone(pb.detectar(b"\x00S"))
+        self.assertFalse(pb.detectar(b"HELLO"))
+
+
+class ServidorBinario(unittest.TestCase):
+    def setUp(self):
+        opcoes = types.SimpleNamespace(engine="threads", workers=1, fsync="sempre")
+        self.processo, self.pasta, self.porta = benchmark_servidor.iniciar_servidor_local(0, opcoes)
+
+    def tearDown(self):
+        benchmark_servidor.parar_servidor_local(self.processo, self.pasta)
+
+    def _sessao(self, *quadros) -> list:
+        with socket.create_connection(("127.0.0.1", self.porta), timeout=10) as conn:
+            conn.sendall(pb.codificar_saudacao() + b"".join(quadros))
+            recebido = b""
+            while True:
+                parte = conn.recv(65536)
+                if not parte:
+                    break
+                recebido += parte
+        versao, resto = pb.ler_saudacao(recebido)
+        self.assertEqual(versao, pb.VERSAO_BINARIA)
+        return pb.extrair_quadros(resto)[0]
+
+    def _total(self) -> int:
+        resumo = _json(_conversar(self.porta, "HELLO 2\nAGG\nQUIT\n")[1])["turmas"]
+        return sum(t["quantidade"] for t in resumo.values())
+
+    def test_lote_com_nota_invalida(self):
+        quadros = self._sessao(pb.codificar_lote([("Ana", "3A", 7.0), ("Bia", "3A", float("inf"))], 5),
+                               pb.codificar_quit(6))
+        self.assertEqual([(t, i) for t, i, _ in quadros], [(pb.RESULTADO, 5), (pb.BYE, 6)])
+        self.assertEqual(pb.decodificar_resultado(quadros[0][2]), [pb.STATUS_OK, pb.STATUS_NOTA_INVALIDA])
+        self.assertEqual(self._total(), 1)
+
+    def test_quadro_malformado_rejeitado_inteiro(self):
+        malformado = pb.codificar_quadro(pb.LOTE, 9, _payload(pb.codificar_lote([("Ana", "3A", 7.0)]))[:-1])
+        quadros = self._sessao(malformado, pb.codificar_quit(10))
+        self.assertEqual(quadros[0][:2], (pb.ERRO, 9))
+        self.assertEqual(pb.decodificar_erro(quadros[0][2])[0], pb.STATUS_QUADRO_INVALIDO)
+        self.assertEqual(self._total(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+# tests/test_servidor_assinatura.py
+"""
+Feed de alterações (SUBSCRIBE): retomada a partir de um seq (primeiro os
+perdidos, depois os novos, sem repetir nem pular) e desconexão do assinante
+que não acompanha (fila cheia -> "ERR: assinante atrasado").
+    python -m unittest discover tests    (ou: python -m pytest tests)
+"""
+
+import os
+import socket
+import sys
+import threading
+import time
+import types
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import benchmark_servidor  # noqa: E402
+import central  # noqa: E402
+import servidor  # noqa: E402
+from test_servidor_pipeline import _conversar  # noqa: E402
+
+
+class RetomadaAssinatura(unittest.TestCase):
+    engine = "threads"
+    workers = 1
+
+    def setUp(self):
+        opcoes = types.SimpleNamespace(engine=self.engine, workers=self.workers, fsync="sempre")
+        self.processo, self.pasta, self.porta = benchmark_servidor.iniciar_servidor_local(0, opcoes)
+        texto = "".join(f"A{i};3A;{i}\n" for i in range(1, 6))
+        self.assertEqual(_conversar(self.porta, "HELLO 2\n" + texto + "QUIT\n")[1:6], ["OK"] * 5)
+
+    def tearDown(self):
+        benchmark_servidor.parar_servidor_local(self.processo, self.pasta)
+
+    def _assinar(self, desde: int):
+        conn = socket.create_connection(("127.0.0.1", self.porta), timeout=10)
+        self.addCleanup(conn.close)
+        conn.sendall(f"HELLO 2\nSUBSCRIBE {desde}\n".encode("utf-8"))
+        linhas = conn.makefile("r", encoding="utf-8")
+        self.assertEqual(linhas.readline().strip(), "HELLO 2")
+        return conn, linhas
+
+    def test_retoma_do_seq_e_segue_com_os_novos(self):
+        conn, linhas = self._assinar(2)
+        self.assertEqual(linhas.readline().strip(), "SUBSCRIBED 5")
+        perdidos = [linhas.readline().split(" ", 2)[:2] for _ in range(3)]
+        self.assertEqual(perdidos, [["EVT", "3"], ["EVT", "4"], ["EVT", "5"]])
+        self.assertEqual(_conversar(self.porta, "HELLO 2\nNovo;3B;9\nQUIT\n")[1], "OK")
+        self.assertEqual(linhas.readline().split(" ", 2)[:2], ["EVT", "6"])
+        conn.sendall(b"QUIT\n")
+        self.assertEqual(linhas.readline().strip(), "BYE")
+
+    def test_seq_desconhecido_pede_recarga(self):
+        _, linhas = self._assinar(99)
+        self.assertEqual(linhas.readline().strip(), "SUBSCRIBED 5")
+        self.assertEqual(linhas.readline().strip(), "RELOAD 5")
+
+
+class RetomadaAssinaturaWorkers(RetomadaAssinatura):
+    workers = 2
+
+
+class AssinanteAtrasado(unittest.TestCase):
+    def test_assinante_que_nao_le_e_desconectado(self):
+        servidor_conn, cliente = socket.socketpair()
+        self.addCleanup(servidor_conn.close)
+        self.addCleanup(cliente.close)
+        for s in (servidor_conn, cliente):  # buffers pequenos: o sendall trava logo
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        antes = len(central._assinantes)
+        sessao = {"client_id": "teste", "assinar": {"desde": None}}
+        with mock.patch.object(servidor, "FILA_ASSINANTE_MAX", 5):
+            sessao_thread = threading.Thread(target=servidor._sessao_assinatura, args=(servidor_conn, sessao))
+            sessao_thread.start()
+            limite = time.monotonic() + 5
+            while len(central._assinantes) == antes and time.monotonic() < limite:
+                time.sleep(0.01)
+            self.assertEqual(len(central._assinantes), antes + 1)
+
+            # o cliente não lê: cada lote notificado vai para a fila até ela encher
+            aluno = {"nome": "x" * 20000, "turma": "3A", "nota": 5.0}
+            for seq in range(1, 50):
+                with central.journal_lock:
+                    central._notificar([{"tipo": "inserido", "seq": seq, "aluno": aluno}])
+
+            cliente.settimeout(10)
+            recebido = b""
+            while b"ERR: assinante atrasado" not in recebido:
+                parte = cliente.recv(1 << 20)
+                if not parte:
+                    break
+                recebido += parte
+            sessao_thread.join(10)
+        self.assertIn(b"ERR: assinante atrasado", recebido)
+        self.assertFalse(sessao_thread.is_alive())
+        self.assertEqual(len(central._assinantes), antes)  # assinatura cancelada
+
+
+if __name__ == "__main__":
+    unittest.main()
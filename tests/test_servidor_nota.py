@@ -0,0 +1,60 @@
+# tests/test_servidor_nota.py
+"""
+Notas não finitas (nan, inf) são recusadas na entrada do protocolo texto, como
+no binário: não chegam ao journal nem aos agregados, e o lote de quem envia
+uma nota válida junto não falha.
+    python -m unittest discover tests    (ou: python -m pytest tests)
+"""
+
+import os
+import socket
+import sys
+import types
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import agregados  # noqa: E402
+import benchmark_servidor  # noqa: E402
+from test_servidor_pipeline import _conversar, _json  # noqa: E402
+
+
+class NotaNaoFinita(unittest.TestCase):
+    def setUp(self):
+        opcoes = types.SimpleNamespace(engine="threads", workers=1, fsync="sempre")
+        self.processo, self.pasta, self.porta = benchmark_servidor.iniciar_servidor_local(0, opcoes)
+
+    def tearDown(self):
+        benchmark_servidor.parar_servidor_local(self.processo, self.pasta)
+
+    def test_v2_recusa_nan_e_inf(self):
+        linhas = _conversar(self.porta, "HELLO 2\nAna;3A;nan\nBia;3A;inf\nCaio;3A;-inf\n"
+                                        "BULK 2\nDani;3A;NaN\nEdu;3A;8\nFabi;3A;7\nAGG 3A\nQUIT\n")
+        self.assertEqual(linhas[1:4], ["ERR: nota inválida"] * 3)
+        self.assertEqual(linhas[4], "BULK 1 1")  # aceitos, recusados
+        self.assertTrue(linhas[5].startswith("1 ERR"), linhas[5])
+        self.assertEqual(linhas[6:8], ["2 OK", "OK"])
+        turma = _json(linhas[8])["turmas"]["3A"]
+        self.assertEqual(turma["quantidade"], 2)
+        self.assertEqual((turma["minimo"], turma["maximo"]), (7.0, 8.0))
+
+    def test_legado_recusa_nan(self):
+        for nota in ("nan", "inf"):
+            with socket.create_connection(("127.0.0.1", self.porta), timeout=10) as conn:
+                conn.sendall(f"Ana;3A;{nota}".encode("utf-8"))
+                self.assertEqual(conn.recv(100), "ERR: nota inválida".encode("utf-8"))
+        linhas = _conversar(self.porta, "HELLO 2\nAGG\nQUIT\n")
+        self.assertEqual(_json(linhas[1])["turmas"], {})
+
+
+class FaixaHistograma(unittest.TestCase):
+    def test_faixa_de_notas_fora_do_intervalo(self):
+        self.assertEqual(agregados._faixa(float("nan")), 0)
+        self.assertEqual(agregados._faixa(float("inf")), agregados.FAIXAS_HISTOGRAMA - 1)
+        self.assertEqual(agregados._faixa(float("-inf")), 0)
+        self.assertEqual(agregados._faixa(10.0), agregados.FAIXAS_HISTOGRAMA - 1)
+        self.assertEqual(agregados._faixa(7.5), 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
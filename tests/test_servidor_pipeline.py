@@ -0,0 +1,152 @@
+# tests/test_servidor_pipeline.py
+"""
+Pipeline do protocolo v2: consultas enviadas no mesmo bloco depois de gravações
+enxergam essas gravações (servidor.py, _resolver_pipeline).
+
+Sobe servidor.py numa pasta temporária (como benchmark_servidor.py) para cada
+engine, com e sem workers. Na engine asyncio as consultas rodam fora do loop.
+    python -m unittest discover tests    (ou: python -m pytest tests)
+"""
+
+import asyncio
+import json
+import os
+import socket
+import sys
+import threading
+import types
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import benchmark_servidor  # noqa: E402
+import servidor  # noqa: E402
+
+PIPELINE = (
+    "HELLO 2\n"
+    "Bob;3A;7\n"
+    "BULK 3\n"
+    "Ana;3A;8\n"
+    "Andre;3A;9\n"
+    "Anna;3B;6\n"
+    "LIST 3A\n"
+    "TOP 2\n"
+    "AGG\n"
+    "FIND an\n"
+    "STATS\n"
+    "QUIT\n"
+)
+
+
+def _conversar(porta: int, texto: str) -> list:
+    with socket.create_connection(("127.0.0.1", porta), timeout=10) as conn:
+        conn.sendall(texto.encode("utf-8"))
+        recebido = b""
+        while not recebido.endswith(b"BYE\n"):
+            parte = conn.recv(65536)
+            if not parte:
+                break
+            recebido += parte
+    return recebido.decode("utf-8").splitlines()
+
+
+def _json(linha: str) -> dict:
+    assert linha.startswith("OK "), linha
+    return json.loads(linha[3:])
+
+
+class PipelineEscritaConsulta(unittest.TestCase):
+    engine = "threads"
+    workers = 1
+
+    def setUp(self):
+        opcoes = types.SimpleNamespace(engine=self.engine, workers=self.workers, fsync="sempre")
+        self.processo, self.pasta, self.porta = benchmark_servidor.iniciar_servidor_local(0, opcoes)
+
+    def tearDown(self):
+        benchmark_servidor.parar_servidor_local(self.processo, self.pasta)
+
+    def test_consultas_veem_gravacoes_anteriores_do_mesmo_bloco(self):
+        linhas = _conversar(self.porta, PIPELINE)
+        self.assertEqual(linhas[0], "HELLO 2")
+        self.assertEqual(linhas[1], "OK")                       # Bob
+        self.assertEqual(linhas[2:6], ["BULK 3 0", "1 OK", "2 OK", "3 OK"])
+
+        listados = sorted(a["nome"] for a in _json(linhas[6])["alunos"])
+        self.assertEqual(listados, ["Ana", "Andre", "Bob"])
+        self.assertEqual([a["nome"] for a in _json(linhas[7])["alunos"]], ["Andre", "Ana"])
+        self.assertEqual(_json(linhas[8])["turmas"]["3A"]["quantidade"], 3)
+        self.assertEqual(sorted(a["nome"] for a in _json(linhas[9])["alunos"]), ["Ana", "Andre", "Anna"])
+        self.assertTrue(linhas[10].startswith("OK "))           # STATS
+        self.assertEqual(linhas[11], "BYE")
+
+    def test_gravacao_depois_da_consulta_nao_aparece_nela(self):
+        linhas = _conversar(self.porta, "HELLO 2\nLIST 3C\nCarla;3C;5\nLIST 3C\nQUIT\n")
+        self.assertEqual(_json(linhas[1])["alunos"], [])
+        self.assertEqual(linhas[2], "OK")
+        self.assertEqual([a["nome"] for a in _json(linhas[3])["alunos"]], ["Carla"])
+
+
+    def test_conexoes_intercalando_gravacoes_e_consultas(self):
+        def cliente(k):
+            texto = "".join(f"C{k}x{j};T{k};{j % 10}\nLIST T{k}\nAGG T{k}\n" for j in range(20))
+            return _conversar(self.porta, "HELLO 2\n" + texto + "QUIT\n")
+
+        with ThreadPoolExecutor(8) as executor:
+            respostas = list(executor.map(cliente, range(8)))
+        for k, linhas in enumerate(respostas):
+            self.assertEqual(len(linhas), 2 + 3 * 20, linhas[-3:])
+            for j in range(20):
+                gravado, listados, resumo = linhas[1 + 3 * j:4 + 3 * j]
+                self.assertEqual(gravado, "OK")
+                self.assertEqual(len(_json(listados)["alunos"]), j + 1)
+                self.assertEqual(_json(resumo)["turmas"][f"T{k}"]["quantidade"], j + 1)
+
+
+class PipelineEscritaConsultaAsyncio(PipelineEscritaConsulta):
+    engine = "asyncio"
+
+
+class PipelineEscritaConsultaWorkers(PipelineEscritaConsulta):
+    workers = 2
+
+
+class PipelineEscritaConsultaAsyncioWorkers(PipelineEscritaConsulta):
+    # consultas de um worker vão ao escritor pelo pipe: rodam fora do loop
+    engine = "asyncio"
+    workers = 2
+
+
+class ConsultaForaDoLoop(unittest.TestCase):
+    def test_consulta_demorada_nao_para_o_loop(self):
+        # num worker, a consulta espera o escritor (EscritorRemoto.consultar): aqui, um sleep
+        fora_do_loop = []
+
+        def consulta():
+            fora_do_loop.append(threading.current_thread() is not threading.main_thread())
+            threading.Event().wait(0.3)
+            return "OK {}"
+
+        async def cenario():
+            loop = asyncio.get_running_loop()
+            ticks = 0
+
+            async def relogio():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            tarefa = asyncio.ensure_future(relogio())
+            respondidos, _ = await servidor._resolver_pipeline_async([consulta], loop)
+            tarefa.cancel()
+            return respondidos, ticks
+
+        respondidos, ticks = asyncio.run(cenario())
+        self.assertEqual(respondidos, ["OK {}"])
+        self.assertEqual(fora_do_loop, [True])
+        self.assertGreater(ticks, 10)
+
+if __name__ == "__main__":
+    unittest.main()
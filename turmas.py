@@ -1,31 +1,20 @@
 # turmas.py
 # Cadastro simples de turmas (modal)
-import json
-import os
 import customtkinter as ctk
 from tkinter import messagebox
-from interface import configurar_janela, garantir_pasta_data
+from interface import configurar_janela
+import repositorio
 
-PASTA = garantir_pasta_data()
-CAMINHO = os.path.join(PASTA, "turmas.json")
+CAMINHO = repositorio.caminho("turmas")
 
 def carregar_turmas():
-    if not os.path.exists(CAMINHO):
-        return []
-    try:
-        with open(CAMINHO, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (json.JSONDecodeError, IOError):
-        return []
+    """Turmas do JSON (lista compartilhada em cache; usada por alunos, aulas e atividades)."""
+    return repositorio.carregar("turmas")
 
 def salvar_turmas(lista):
-    if not os.path.exists(PASTA):
-        os.makedirs(PASTA)
-    with open(CAMINHO, "w", encoding="utf-8") as f:
-        json.dump(lista, f, indent=4, ensure_ascii=False)
+    repositorio.salvar("turmas", lista)
 
 def adicionar_turma(app):
-    turmas = carregar_turmas()
     janela = ctk.CTkToplevel(app)
     configurar_janela(janela, "Cadastro de Turma", "420x320")
 
@@ -46,11 +35,11 @@ def adicionar_turma(app):
             messagebox.showwarning("Atenção", "Preencha todos os campos.")
             return
         # checar duplicado
+        turmas = carregar_turmas()
         if any(t.get("nome","").lower() == nome.lower() for t in turmas):
             messagebox.showwarning("Aviso", "Turma já cadastrada.")
             return
-        turmas.append({"nome": nome, "professor": prof, "turno": turno})
-        salvar_turmas(turmas)
+        repositorio.inserir("turmas", {"nome": nome, "professor": prof, "turno": turno})
         messagebox.showinfo("Sucesso", f"Turma '{nome}' cadastrada!")
         janela.destroy()
 
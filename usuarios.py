@@ -1,25 +1,16 @@
 # usuarios.py
 # Manipulação de usuários (salva em data/usuarios.json)
-import json
-import os
-from interface import garantir_pasta_data
+import repositorio
 
-CAMINHO = os.path.join(garantir_pasta_data(), "usuarios.json")
+CAMINHO = repositorio.caminho("usuarios")
 
 def carregar_usuarios():
-    """Lê os usuários do JSON, trata arquivo inexistente ou inválido."""
-    if not os.path.exists(CAMINHO):
-        return []
-    try:
-        with open(CAMINHO, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (json.JSONDecodeError, IOError):
-        return []
+    """Usuários do JSON (cache do repositorio.py; lista vazia se inexistente ou inválido)."""
+    return repositorio.carregar("usuarios")
 
 def salvar_usuarios(lista):
     """Salva lista de usuários (sobrescreve)."""
-    with open(CAMINHO, "w", encoding="utf-8") as f:
-        json.dump(lista, f, indent=4, ensure_ascii=False)
+    repositorio.salvar("usuarios", lista)
 
 def autenticar_usuario(usuario, senha):
     """Retorna True se usuário+senha existirem."""
@@ -35,6 +26,5 @@ def adicionar_usuario(usuario, senha):
     for u in usuarios:
         if u.get("usuario") == usuario:
             return False
-    usuarios.append({"usuario": usuario, "senha": senha})
-    salvar_usuarios(usuarios)
+    repositorio.inserir("usuarios", {"usuario": usuario, "senha": senha})
     return True